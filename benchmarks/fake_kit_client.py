@@ -0,0 +1,73 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from benchmarks.fleet_generator import FakeSaleModel, FakeVendingMachineModel, SyntheticFleet
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+
+class FakeSalesCollection:
+    def __init__(self, sales: list[FakeSaleModel]):
+        self._sales = sales
+
+    def get_all(self) -> list[FakeSaleModel]:
+        return self._sales
+
+
+class FakeVendingMachinesCollection:
+    def __init__(self, vending_machines: list[FakeVendingMachineModel]):
+        self._vending_machines = vending_machines
+
+    def get_all(self) -> list[FakeVendingMachineModel]:
+        return self._vending_machines
+
+    def get_active(self) -> list[FakeVendingMachineModel]:
+        return [vm for vm in self._vending_machines if vm.is_active]
+
+
+class FakeKitVendingAPIClient:
+    """Офлайн-замена KitVendingAPIClient поверх синтетического парка.
+
+    Повторяет используемую часть интерфейса (get_sales, get_vending_machines, close)
+    и может добавлять задержку на каждый вызов, чтобы имитировать сеть.
+    """
+
+    def __init__(self, fleet: SyntheticFleet, latency_seconds: float = 0.0):
+        self._fleet = fleet
+        self._latency_seconds = latency_seconds
+        self._timestamps: list[datetime] = [sale.timestamp for sale in fleet.sales]
+        self.sales_calls: int = 0
+        self.sales_returned: int = 0
+        self.vending_machines_calls: int = 0
+
+    def login(self, login: str, password: str, company_id: int) -> None:
+        return None
+
+    async def get_sales(self, from_date: datetime, to_date: datetime) -> FakeSalesCollection:
+        await self._simulate_latency()
+        start: int = bisect_left(self._timestamps, self._to_local_naive(from_date))
+        end: int = bisect_right(self._timestamps, self._to_local_naive(to_date))
+        sales: list[FakeSaleModel] = self._fleet.sales[start:end]
+        self.sales_calls += 1
+        self.sales_returned += len(sales)
+        return FakeSalesCollection(sales)
+
+    async def get_vending_machines(self) -> FakeVendingMachinesCollection:
+        await self._simulate_latency()
+        self.vending_machines_calls += 1
+        return FakeVendingMachinesCollection(self._fleet.vending_machines)
+
+    async def close(self) -> None:
+        return None
+
+    async def _simulate_latency(self) -> None:
+        if self._latency_seconds > 0:
+            await asyncio.sleep(self._latency_seconds)
+
+    @staticmethod
+    def _to_local_naive(value: datetime) -> datetime:
+        if value.tzinfo is None:
+            return value
+        return value.astimezone(_PROJECT_TZ).replace(tzinfo=None)
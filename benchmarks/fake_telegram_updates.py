@@ -0,0 +1,157 @@
+"""Локальная проверка режима вебхука: поддельный Telegram шлет обновления и принимает ответы бота.
+
+Скрипт поднимает заглушку Bot API, которая записывает вызовы sendMessage, и отправляет
+на вебхук бота обновления с командой. Для каждого обновления выводится время до первого
+ответа бота в его чат.
+
+Запуск из корня репозитория (бот и скрипт — в разных терминалах):
+    WEBHOOK_SECRET=local-secret TELEGRAM_API_URL=http://127.0.0.1:8081 python main.py --bot --webhook
+    python -m benchmarks.fake_telegram_updates --secret local-secret --updates 5
+"""
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+
+from aiohttp import ClientResponse, ClientSession, web
+
+_COMMAND: str = "/get_sales_report"
+_SECRET_HEADER: str = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class FakeBotAPI:
+    """Отвечает на методы Bot API так, чтобы aiogram мог разобрать ответ, и запоминает время ответов по чатам."""
+
+    def __init__(self):
+        self._message_ids: itertools.count = itertools.count(1)
+        self._replies: dict[int, list[float]] = {}
+        self._reply_event: asyncio.Event = asyncio.Event()
+
+    def build_application(self) -> web.Application:
+        application: web.Application = web.Application()
+        application.router.add_post("/bot{token}/{method}", self._handle)
+        return application
+
+    def replies(self, chat_id: int) -> list[float]:
+        return self._replies.get(chat_id, [])
+
+    async def wait_for_reply(self, chat_id: int, timeout: float) -> float | None:
+        deadline: float = time.perf_counter() + timeout
+        while not self._replies.get(chat_id):
+            remaining: float = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            self._reply_event.clear()
+            try:
+                await asyncio.wait_for(self._reply_event.wait(), remaining)
+            except TimeoutError:
+                return None
+        return self._replies[chat_id][0]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method: str = request.match_info["method"].lower()
+        if method == "getme":
+            return web.json_response({
+                "ok": True,
+                "result": {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"},
+            })
+        if method in ("sendmessage", "editmessagetext"):
+            fields: dict[str, str] = await self._read_fields(request)
+            chat_id: int = int(fields["chat_id"])
+            self._replies.setdefault(chat_id, []).append(time.perf_counter())
+            self._reply_event.set()
+            return web.json_response({
+                "ok": True,
+                "result": {
+                    "message_id": next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": fields.get("text", ""),
+                },
+            })
+        return web.json_response({"ok": True, "result": True})
+
+    @staticmethod
+    async def _read_fields(request: web.Request) -> dict[str, str]:
+        if request.content_type == "application/json":
+            return {key: str(value) for key, value in (await request.json()).items()}
+        return {key: str(value) for key, value in (await request.post()).items()}
+
+
+def _build_update(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(_COMMAND)}],
+        },
+    }
+
+
+def _parse_args() -> argparse.Namespace:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Поддельный Telegram для режима вебхука")
+    parser.add_argument("--webhook-url", default="http://127.0.0.1:8080/telegram/webhook", help="Адрес вебхука бота")
+    parser.add_argument("--secret", required=True, help="Значение WEBHOOK_SECRET бота")
+    parser.add_argument("--api-host", default="127.0.0.1", help="Адрес заглушки Bot API")
+    parser.add_argument("--api-port", type=int, default=8081, help="Порт заглушки Bot API")
+    parser.add_argument("--updates", type=int, default=1, help="Сколько обновлений отправить (каждое из своего чата)")
+    parser.add_argument("--text", default=_COMMAND, help="Текст сообщения")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Сколько ждать ответа на обновление, секунд")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args: argparse.Namespace = _parse_args()
+    fake_api: FakeBotAPI = FakeBotAPI()
+    runner: web.AppRunner = web.AppRunner(fake_api.build_application(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host=args.api_host, port=args.api_port).start()
+    print(f"Заглушка Bot API: http://{args.api_host}:{args.api_port}")
+
+    try:
+        async with ClientSession() as session:
+            rejected: ClientResponse = await session.post(
+                args.webhook_url,
+                json=_build_update(0, 0, args.text),
+                headers={_SECRET_HEADER: f"{args.secret}-wrong"},
+            )
+            print(f"Обновление с неверным секретом: HTTP {rejected.status}")
+
+            sent_at: dict[int, float] = {}
+            update_id: int
+            for update_id in range(1, args.updates + 1):
+                chat_id: int = 1000 + update_id
+                sent_at[chat_id] = time.perf_counter()
+                response: ClientResponse = await session.post(
+                    args.webhook_url,
+                    json=_build_update(update_id, chat_id, args.text),
+                    headers={_SECRET_HEADER: args.secret},
+                )
+                if response.status != 200:
+                    print(f"Обновление {update_id}: HTTP {response.status}")
+
+        failed: int = 0
+        chat_id: int
+        started: float
+        for chat_id, started in sent_at.items():
+            replied_at: float | None = await fake_api.wait_for_reply(chat_id, args.timeout)
+            if replied_at is None:
+                failed += 1
+                print(f"Чат {chat_id}: ответа нет за {args.timeout:.0f} с")
+                continue
+            print(
+                f"Чат {chat_id}: первый ответ через {(replied_at - started) * 1000:.0f} мс, "
+                f"сообщений {len(fake_api.replies(chat_id))}",
+            )
+        return 1 if failed else 0
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,98 @@
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+_PRICES: tuple[float, ...] = (50.0, 70.0, 90.0, 120.0, 150.0, 200.0)
+_DECLINE_FACTOR: float = 0.3
+
+
+@dataclass(frozen=True, slots=True)
+class FleetSpec:
+    """Параметры синтетического парка: machines аппаратов × days дней × sales_per_day продаж в день."""
+
+    machines: int
+    days: int
+    sales_per_day: int
+    seed: int = 42
+    silent_share: float = 0.05
+    decline_share: float = 0.1
+
+    @property
+    def key(self) -> str:
+        return f"m{self.machines}-d{self.days}-s{self.sales_per_day}-seed{self.seed}"
+
+
+@dataclass(frozen=True, slots=True)
+class FakeVendingMachineModel:
+    id: int
+    name: str
+    is_active: bool
+
+
+@dataclass(frozen=True, slots=True)
+class FakeSaleModel:
+    vending_machine_id: int
+    price: float
+    timestamp: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticFleet:
+    spec: FleetSpec
+    vending_machines: list[FakeVendingMachineModel]
+    sales: list[FakeSaleModel]
+    generated_at: datetime
+
+
+def generate_fleet(spec: FleetSpec, now: datetime | None = None) -> SyntheticFleet:
+    """Строит воспроизводимый парк с продажами, отсортированными по времени.
+
+    Часть аппаратов молчит последние два дня, часть — с падением продаж за вчера,
+    чтобы оба раздела отчета были непустыми. Время продаж — наивное локальное, как у KIT API.
+    """
+    rng: random.Random = random.Random(spec.seed)
+    moment: datetime = (now or datetime.now(_PROJECT_TZ)).astimezone(_PROJECT_TZ).replace(tzinfo=None)
+    today: date = moment.date()
+    yesterday: date = today - timedelta(days=1)
+    first_day: date = today - timedelta(days=spec.days - 1)
+
+    vending_machines: list[FakeVendingMachineModel] = []
+    sales: list[FakeSaleModel] = []
+    machine_index: int
+    for machine_index in range(spec.machines):
+        vm_id: int = 10_000 + machine_index
+        vending_machines.append(
+            FakeVendingMachineModel(id=vm_id, name=f"Аппарат №{machine_index + 1} (ТЦ «Синтетика»)", is_active=True),
+        )
+        roll: float = rng.random()
+        is_silent: bool = roll < spec.silent_share
+        is_declining: bool = not is_silent and roll < spec.silent_share + spec.decline_share
+
+        day_offset: int
+        for day_offset in range(spec.days):
+            day: date = first_day + timedelta(days=day_offset)
+            if is_silent and day >= yesterday:
+                continue
+            day_start: datetime = datetime.combine(day, time.min)
+            day_seconds: int = 86_400 if day < today else int((moment - day_start).total_seconds())
+            if day_seconds <= 0:
+                continue
+            count: int = rng.randint(spec.sales_per_day // 2, spec.sales_per_day * 3 // 2)
+            count = count * day_seconds // 86_400
+            if is_declining and day == yesterday:
+                count = max(1, int(count * _DECLINE_FACTOR))
+            _: int
+            for _ in range(count):
+                sales.append(
+                    FakeSaleModel(
+                        vending_machine_id=vm_id,
+                        price=rng.choice(_PRICES),
+                        timestamp=day_start + timedelta(seconds=rng.randrange(day_seconds)),
+                    ),
+                )
+
+    sales.sort(key=lambda sale: sale.timestamp)
+    return SyntheticFleet(spec=spec, vending_machines=vending_machines, sales=sales, generated_at=moment)
@@ -0,0 +1,292 @@
+"""Офлайн-бенчмарк этапов отчета на синтетическом парке.
+
+Запуск из корня репозитория:
+    python -m benchmarks.run_benchmarks --machines 500 --days 30 --sales-per-day 40
+    python -m benchmarks.run_benchmarks --check            # сравнить с baselines.json
+    python -m benchmarks.run_benchmarks --update-baseline  # записать текущие значения
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from benchmarks.fake_kit_client import FakeKitVendingAPIClient
+from benchmarks.fleet_generator import FleetSpec, SyntheticFleet, generate_fleet
+from srс.controllers.sales_report_controller import SalesReportController
+from srс.domain.entities.report_document import ReportDocument, ReportSection
+from srс.domain.entities.sales_analyze_report import SalesAnalyzeReport
+from srс.domain.entities.sales_matrix import SalesMatrixBuilder
+from srс.domain.entities.vending_machine import VendingMachine
+from srс.infra.kit_api_sales_repository import KitAPISalesRepository
+from srс.infra.kit_api_session import KitAPICredentials, KitAPISession
+from srс.infra.kit_api_vending_machine_repository import KitAPIVendingMachineRepository
+from srс.infra.markdown_v2_renderer import render_quote_markdown_v2_chunks
+from srс.infra.sqlite_sales_repository import SQLiteSalesRepository
+from srс.infra.sqlite_sales_stats_repository import SQLiteSalesStatsRepository
+from srс.services.no_sales_report_message_service import NoSalesReportMessageService
+from srс.services.no_sales_report_service import NoSalesReportService
+from srс.services.sales_aggregation_service import SalesAggregationService
+from srс.services.sales_analyze_service import SalesAnalyzeService
+from srс.services.sales_report_message_service import SalesReportMessageService
+from srс.services.sales_stats_service import SalesStatsService
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+_BASELINES_PATH: Path = Path(__file__).resolve().parent / "baselines.json"
+_LAST_SALE_DAYS: int = 10
+_DECLINE_THRESHOLD: float = 0.7
+_MIN_SIGNIFICANT_SECONDS: float = 0.005
+
+
+@dataclass(frozen=True, slots=True)
+class StageResult:
+    seconds: float
+    peak_kib: float
+
+
+class StageRecorder:
+    """Меряет время этапа и, если включен tracemalloc, пик памяти сверх уровня на входе в этап."""
+
+    def __init__(self, trace_memory: bool):
+        self._trace_memory = trace_memory
+        self.seconds: dict[str, float] = {}
+        self.peak_kib: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        base_bytes: int = 0
+        if self._trace_memory:
+            tracemalloc.reset_peak()
+            base_bytes = tracemalloc.get_traced_memory()[0]
+        started_at: float = time.perf_counter()
+        yield
+        self.seconds[name] = time.perf_counter() - started_at
+        if self._trace_memory:
+            self.peak_kib[name] = (tracemalloc.get_traced_memory()[1] - base_bytes) / 1024
+
+
+async def _run_scenario(
+        fleet: SyntheticFleet,
+        recorder: StageRecorder,
+        work_dir: Path,
+        days_for_average: int,
+        latency_seconds: float,
+) -> None:
+    fake_client: FakeKitVendingAPIClient = FakeKitVendingAPIClient(fleet, latency_seconds=latency_seconds)
+    client: KitAPISession = KitAPISession(
+        KitAPICredentials(login="benchmark", password="benchmark", company_id=0),
+        client_factory=lambda: fake_client,
+    )
+    now: datetime = datetime.now(_PROJECT_TZ)
+    today: date = now.date()
+    from_date: datetime = now - timedelta(days=fleet.spec.days - 1)
+
+    vending_machine_repo: KitAPIVendingMachineRepository = KitAPIVendingMachineRepository(client)
+    with recorder.stage("vending_machines"):
+        vending_machines: list[VendingMachine] = await vending_machine_repo.get_all()
+
+    vending_machine_ids: list[int] = [vending_machine.kit_id for vending_machine in vending_machines]
+    first_day: int = from_date.date().toordinal()
+    sales_repo: KitAPISalesRepository = KitAPISalesRepository(client)
+    with recorder.stage("kit_api_raw_sales"):
+        await sales_repo.get_sales(from_date=from_date, to_date=now)
+    with recorder.stage("kit_api_repository_cold"):
+        await sales_repo.aggregate_daily_sales(SalesMatrixBuilder(vending_machine_ids, first_day, today.toordinal()))
+    with recorder.stage("kit_api_repository_warm"):
+        await sales_repo.aggregate_daily_sales(SalesMatrixBuilder(vending_machine_ids, first_day, today.toordinal()))
+
+    sqlite_repo: SQLiteSalesRepository = SQLiteSalesRepository(client, work_dir / "sales.sqlite3")
+    with recorder.stage("sqlite_repository_cold"):
+        await sqlite_repo.aggregate_daily_sales(SalesMatrixBuilder(vending_machine_ids, first_day, today.toordinal()))
+    with recorder.stage("sqlite_repository_warm"):
+        await sqlite_repo.aggregate_daily_sales(SalesMatrixBuilder(vending_machine_ids, first_day, today.toordinal()))
+    with recorder.stage("sqlite_raw_sales"):
+        await sqlite_repo.get_sales(from_date=from_date, to_date=now)
+
+    aggregation_service: SalesAggregationService = SalesAggregationService(sales_repo)
+    with recorder.stage("aggregation"):
+        await aggregation_service.aggregate(vending_machines=vending_machines, from_date=from_date, to_date=now)
+
+    no_sales_service: NoSalesReportService = NoSalesReportService(aggregation_service)
+    with recorder.stage("no_sales_report"):
+        await no_sales_service.create_report_for_days(
+            vending_machines=vending_machines,
+            days=[today - timedelta(days=1), today],
+            last_sale_days=_LAST_SALE_DAYS,
+        )
+
+    stats_service: SalesStatsService = SalesStatsService(
+        sales_repo,
+        SQLiteSalesStatsRepository(work_dir / "sales.sqlite3", windows=(days_for_average, fleet.spec.days)),
+        history_days=fleet.spec.days,
+    )
+    with recorder.stage("sales_stats_bootstrap"):
+        await stats_service.get_stats(vending_machines)
+    analyze_service: SalesAnalyzeService = SalesAnalyzeService(
+        stats_service,
+        days_for_average,
+        _DECLINE_THRESHOLD,
+    )
+    with recorder.stage("sales_analyze_report"):
+        await analyze_service.create_sales_analyze_report(vending_machines=vending_machines)
+
+    async def _build_decline_report(machines: list[VendingMachine]) -> ReportSection | None:
+        report: SalesAnalyzeReport = await analyze_service.create_sales_analyze_report(vending_machines=machines)
+        return SalesReportMessageService().create_section(report)
+
+    controller: SalesReportController = SalesReportController(
+        vending_machines_repository=vending_machine_repo,
+        no_sales_service=no_sales_service,
+        no_sales_message_service=NoSalesReportMessageService(last_sale_days=_LAST_SALE_DAYS),
+        last_sale_days=_LAST_SALE_DAYS,
+        decline_report_builder=_build_decline_report,
+    )
+    with recorder.stage("build_report_warm"):
+        document: ReportDocument = await controller.build_report(argparse.Namespace(no_sales_today=False))
+    with recorder.stage("render_markdown_v2"):
+        render_quote_markdown_v2_chunks(document)
+
+
+async def _measure(
+        fleet: SyntheticFleet,
+        repeat: int,
+        days_for_average: int,
+        latency_seconds: float,
+) -> dict[str, StageResult]:
+    best_seconds: dict[str, float] = {}
+    _: int
+    for _ in range(repeat):
+        timing_recorder: StageRecorder = StageRecorder(trace_memory=False)
+        with tempfile.TemporaryDirectory() as work_dir:
+            await _run_scenario(fleet, timing_recorder, Path(work_dir), days_for_average, latency_seconds)
+        name: str
+        seconds: float
+        for name, seconds in timing_recorder.seconds.items():
+            best_seconds[name] = min(seconds, best_seconds.get(name, seconds))
+
+    memory_recorder: StageRecorder = StageRecorder(trace_memory=True)
+    tracemalloc.start()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            await _run_scenario(fleet, memory_recorder, Path(work_dir), days_for_average, latency_seconds)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        name: StageResult(seconds=seconds, peak_kib=memory_recorder.peak_kib[name])
+        for name, seconds in best_seconds.items()
+    }
+
+
+def _load_baselines() -> dict[str, dict[str, dict[str, float]]]:
+    if not _BASELINES_PATH.exists():
+        return {}
+    return json.loads(_BASELINES_PATH.read_text(encoding="utf-8"))
+
+
+def _save_baseline(key: str, results: dict[str, StageResult]) -> None:
+    baselines: dict[str, dict[str, dict[str, float]]] = _load_baselines()
+    baselines[key] = {
+        name: {"seconds": round(result.seconds, 6), "peak_kib": round(result.peak_kib, 1)}
+        for name, result in results.items()
+    }
+    _BASELINES_PATH.write_text(json.dumps(baselines, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _format_delta(current: float, baseline: float | None) -> str:
+    if not baseline:
+        return "—"
+    return f"{(current - baseline) / baseline * 100:+.0f}%"
+
+
+def _report(
+        results: dict[str, StageResult],
+        baseline: dict[str, dict[str, float]] | None,
+        tolerance: float,
+) -> list[str]:
+    regressions: list[str] = []
+    print(f"{'этап':<26}{'время, мс':>12}{'Δ':>8}{'пик, КиБ':>14}{'Δ':>8}")
+    name: str
+    result: StageResult
+    for name, result in results.items():
+        stage_baseline: dict[str, float] = (baseline or {}).get(name, {})
+        base_seconds: float | None = stage_baseline.get("seconds")
+        base_peak: float | None = stage_baseline.get("peak_kib")
+        print(
+            f"{name:<26}{result.seconds * 1000:>12.1f}{_format_delta(result.seconds, base_seconds):>8}"
+            f"{result.peak_kib:>14.1f}{_format_delta(result.peak_kib, base_peak):>8}",
+        )
+        if base_seconds and result.seconds - base_seconds > max(base_seconds * tolerance, _MIN_SIGNIFICANT_SECONDS):
+            regressions.append(f"{name}: время {base_seconds * 1000:.1f} → {result.seconds * 1000:.1f} мс")
+        if base_peak and result.peak_kib > base_peak * (1 + tolerance):
+            regressions.append(f"{name}: память {base_peak:.1f} → {result.peak_kib:.1f} КиБ")
+    return regressions
+
+
+def _parse_args() -> argparse.Namespace:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Бенчмарк этапов отчета на синтетическом парке")
+    parser.add_argument("--machines", type=int, default=500, help="Количество аппаратов")
+    parser.add_argument("--days", type=int, default=30, help="Глубина истории в днях")
+    parser.add_argument("--sales-per-day", type=int, default=40, help="Среднее число продаж аппарата в день")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора")
+    parser.add_argument("--days-for-average", type=int, default=7, help="Окно среднего для анализа падения")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Имитация задержки KIT API на каждый вызов")
+    parser.add_argument("--repeat", type=int, default=3, help="Число прогонов для замера времени (берется минимум)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустимое ухудшение относительно базовой линии")
+    parser.add_argument("--check", action="store_true", help="Завершиться с ошибкой при регрессии")
+    parser.add_argument("--update-baseline", action="store_true", help="Сохранить результаты как базовую линию")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args: argparse.Namespace = _parse_args()
+    spec: FleetSpec = FleetSpec(
+        machines=args.machines,
+        days=args.days,
+        sales_per_day=args.sales_per_day,
+        seed=args.seed,
+    )
+    started_at: float = time.perf_counter()
+    fleet: SyntheticFleet = generate_fleet(spec)
+    print(
+        f"Парк {spec.key}: {len(fleet.vending_machines)} аппаратов, {len(fleet.sales)} продаж, "
+        f"сгенерирован за {time.perf_counter() - started_at:.2f} с",
+    )
+
+    results: dict[str, StageResult] = await _measure(
+        fleet,
+        max(1, args.repeat),
+        args.days_for_average,
+        args.latency_ms / 1000,
+    )
+    baseline_key: str = spec.key if not args.latency_ms else f"{spec.key}-lat{args.latency_ms:g}ms"
+    baseline: dict[str, dict[str, float]] | None = _load_baselines().get(baseline_key)
+    regressions: list[str] = _report(results, baseline, args.tolerance)
+
+    if args.update_baseline:
+        _save_baseline(baseline_key, results)
+        print(f"Базовая линия {baseline_key} сохранена в {_BASELINES_PATH.name}")
+    elif baseline is None:
+        print(f"Базовой линии для {baseline_key} нет, запустите с --update-baseline")
+
+    if regressions:
+        print("Регрессии:")
+        message: str
+        for message in regressions:
+            print(f"  {message}")
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -22,8 +22,14 @@ cron_file="/etc/cron.d/sales_checker"
   printf '%s\n' "KIT_API_PASSWORD=$KIT_API_PASSWORD"
   printf '%s\n' "DAYS_FOR_AVERAGE=$DAYS_FOR_AVERAGE"
   printf '%s\n' "DECLINE_THRESHOLD=$DECLINE_THRESHOLD"
-  printf '%s\n' "0 3 * * * root python /app/main.py >> /var/log/cron.log 2>&1"
-  printf '%s\n' "0 10 * * * root python /app/main.py --no-sales-today >> /var/log/cron.log 2>&1"
+  [ -n "${SALES_STORE:-}" ] && printf '%s\n' "SALES_STORE=$SALES_STORE"
+  [ -n "${SALES_DB_PATH:-}" ] && printf '%s\n' "SALES_DB_PATH=$SALES_DB_PATH"
+  [ -n "${DECLINE_BASELINE:-}" ] && printf '%s\n' "DECLINE_BASELINE=$DECLINE_BASELINE"
+  [ -n "${STATS_HISTORY_DAYS:-}" ] && printf '%s\n' "STATS_HISTORY_DAYS=$STATS_HISTORY_DAYS"
+  if [ -z "${BOT_SCHEDULE:-}" ]; then
+    printf '%s\n' "0 3 * * * root python /app/main.py >> /var/log/cron.log 2>&1"
+    printf '%s\n' "0 10 * * * root python /app/main.py --no-sales-today >> /var/log/cron.log 2>&1"
+  fi
 } > "$cron_file"
 
 chmod 0644 "$cron_file"
@@ -1,10 +1,19 @@
 import asyncio
+import sys
 
-from dotenv import load_dotenv
+from srс.infra.startup_profile import enable_startup_profile, startup_phase
 
-from srс.app import app
+if "--profile-startup" in sys.argv[1:]:
+    enable_startup_profile()
+
+with startup_phase("Загрузка .env"):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+with startup_phase("Импорт srс.app"):
+    from srс.app import app
 
-load_dotenv()
 
 async def main():
     await app()
@@ -1,26 +1,52 @@
 import argparse
 import logging
 import os
+import sys
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
-from dotenv import load_dotenv
-from kit_api import KitVendingAPIClient
-
-from srс.controllers.sales_report_controller import SalesReportController
+from srс.domain.ports.sales_repository import SalesRepository
+from srс.domain.ports.vending_machine_repository import VendingMachineRepository
 from srс.infra.app_logger import get_logger
-from srс.infra.kit_api_sales_repository import KitAPISalesRepository
-from srс.infra.kit_api_vending_machine_repository import KitAPIVendingMachineRepository
-from srс.infra.telegram_client import TelegramClient
-from srс.telegram_bot import apply_heading_bold, run_bot
-from srс.services.no_sales_report_message_service import NoSalesReportMessageService
-from srс.services.no_sales_report_service import NoSalesReportService
-from srс.domain.entities.sales_analyze_report import SalesAnalyzeReport
-from srс.domain.entities.vending_machine import VendingMachine
-from srс.services.sales_analyze_service import SalesAnalyzeService
-from srс.services.sales_report_message_service import SalesReportMessageService
-
-load_dotenv()
+from srс.infra.kit_api_resilience import ResiliencePolicy, ResilientCaller
+from srс.infra.kit_api_session import KitAPICredentials, KitAPISession
+from srс.infra.metrics import get_metrics
+from srс.infra.startup_profile import StartupProfile, get_startup_profile, startup_phase
+
+if TYPE_CHECKING:
+    from srс.controllers.sales_report_controller import SalesReportController
+    from srс.domain.entities.report_document import ReportDocument
+    from srс.services.sales_stats_service import SalesStatsService
+    from srс.silent_machine_watcher import SilentMachineWatcher
 
 LAST_SALE_DAYS: int = 10
+VENDING_MACHINES_TTL_SECONDS: float = 3600.0
+VENDING_MACHINES_STALE_TTL_SECONDS: float = 86400.0
+SALES_FETCH_WINDOW_DAYS: int = 1
+SALES_FETCH_CONCURRENCY: int = 4
+STATS_HISTORY_DAYS: int = 90
+STATS_MEDIUM_WINDOW_DAYS: int = 28
+STATS_EWMA_ALPHA: float = 0.1
+STATS_WEEKDAY_ALPHA: float = 0.3
+STATS_RECLOSE_DAYS: int = 1
+STATS_RECHECK_SECONDS: float = 600.0
+KIT_API_TIMEOUT_SECONDS: float = 30.0
+KIT_API_MAX_ATTEMPTS: int = 3
+KIT_API_BACKOFF_SECONDS: float = 0.5
+KIT_API_HEDGE_QUANTILE: float = 0.0
+KIT_API_BREAKER_FAILURES: int = 5
+KIT_API_BREAKER_RESET_SECONDS: float = 60.0
+WATCHER_POLL_SECONDS: float = 300.0
+WATCHER_LEARN_DAYS: int = 14
+WATCHER_EXPECTED_SALES: float = 6.0
+WATCHER_MIN_SILENCE_MINUTES: float = 60.0
+EXPORT_CHUNK_DAYS: int = 1
+EXPORT_BATCH_SIZE: int = 10000
+BACKFILL_CHUNK_DAYS: int = 7
 
 
 def _get_required_env(name: str) -> str:
@@ -40,22 +66,112 @@ def _build_cli_parser() -> argparse.ArgumentParser:
     parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Отчеты по продажам")
     _add_report_args(parser)
     parser.add_argument("--bot", action="store_true", help="Запуск в режиме Telegram-бота")
+    parser.add_argument(
+        "--webhook",
+        action="store_true",
+        help="Получать обновления бота через вебхук вместо long polling (вместе с --bot)",
+    )
     parser.add_argument("--dev", action="store_true", help="Запуск в режиме разработки.")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Вывести в stderr время импорта модулей и этапов запуска",
+    )
+    commands: argparse._SubParsersAction = parser.add_subparsers(dest="command")
+    _add_export_command(commands)
+    _add_backfill_command(commands)
     return parser
 
 
+def _add_export_command(commands: argparse._SubParsersAction):
+    from srс.infra.export_writers import EXPORT_FORMATS
+
+    parser: argparse.ArgumentParser = commands.add_parser(
+        "export",
+        help="Выгрузить продажи или дневные итоги в файл",
+        description="Потоковая выгрузка продаж или дневных итогов по аппаратам за интервал дней",
+    )
+    parser.add_argument(
+        "--kind",
+        choices=("sales", "daily"),
+        default="sales",
+        help="sales — отдельные продажи, daily — итоги по аппаратам за день",
+    )
+    _add_date_range_args(parser)
+    parser.add_argument("--format", dest="export_format", choices=EXPORT_FORMATS, default="csv", help="Формат файла")
+    parser.add_argument("--output", required=True, help="Путь к файлу; «-» — stdout (кроме parquet)")
+    parser.add_argument(
+        "--chunk-days",
+        type=int,
+        default=EXPORT_CHUNK_DAYS,
+        help="Сколько дней запрашивать из хранилища за раз",
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Строк в одной записи в файл")
+
+
+def _add_backfill_command(commands: argparse._SubParsersAction):
+    parser: argparse.ArgumentParser = commands.add_parser(
+        "backfill",
+        help="Загрузить историю продаж в локальное хранилище",
+        description="Параллельная загрузка истории продаж в SQLite частями; прерванная загрузка продолжается "
+                    "с незавершенных частей при повторном запуске с теми же датами",
+    )
+    _add_date_range_args(parser)
+    parser.add_argument(
+        "--chunk-days",
+        type=int,
+        default=BACKFILL_CHUNK_DAYS,
+        help="Дней в одной части (часть сохраняется одной транзакцией)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Сколько запросов к KIT API выполнять одновременно (по умолчанию SALES_FETCH_CONCURRENCY)",
+    )
+
+
+def _add_date_range_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--from",
+        dest="from_day",
+        type=date.fromisoformat,
+        required=True,
+        help="Первый день, ГГГГ-ММ-ДД",
+    )
+    parser.add_argument(
+        "--to",
+        dest="to_day",
+        type=date.fromisoformat,
+        required=True,
+        help="Последний день включительно, ГГГГ-ММ-ДД",
+    )
+
+
 def _add_report_args(parser: argparse.ArgumentParser):
     parser.add_argument("--no-sales-today", action="store_true", help="Отчет без продаж за сегодня")
 
 
-def _create_client() -> KitVendingAPIClient:
+def _create_client() -> KitAPISession:
     login: str = _get_required_env("KIT_API_LOGIN")
     password: str = _get_required_env("KIT_API_PASSWORD")
     company_id_str: str = _get_required_env("KIT_API_COMPANY_ID")
     company_id: int = int(company_id_str)
-    client: KitVendingAPIClient = KitVendingAPIClient()
-    client.login(login, password, company_id)
-    return client
+    credentials: KitAPICredentials = KitAPICredentials(login=login, password=password, company_id=company_id)
+    return KitAPISession(credentials, caller=ResilientCaller(_get_resilience_policy()))
+
+
+def _get_resilience_policy() -> ResiliencePolicy:
+    """KIT_API_HEDGE_QUANTILE (например, 0.95) включает дублирование запросов, 0 — выключает."""
+    hedge_quantile: float = _get_float_env("KIT_API_HEDGE_QUANTILE", KIT_API_HEDGE_QUANTILE)
+    return ResiliencePolicy(
+        timeout_seconds=_get_float_env("KIT_API_TIMEOUT_SECONDS", KIT_API_TIMEOUT_SECONDS),
+        max_attempts=max(1, _get_int_env("KIT_API_MAX_ATTEMPTS", KIT_API_MAX_ATTEMPTS)),
+        backoff_base_seconds=_get_float_env("KIT_API_BACKOFF_SECONDS", KIT_API_BACKOFF_SECONDS),
+        hedge_quantile=hedge_quantile if hedge_quantile > 0 else None,
+        failure_threshold=_get_int_env("KIT_API_BREAKER_FAILURES", KIT_API_BREAKER_FAILURES),
+        reset_timeout_seconds=_get_float_env("KIT_API_BREAKER_RESET_SECONDS", KIT_API_BREAKER_RESET_SECONDS),
+    )
 
 
 def _get_sales_analyze_settings() -> tuple[int, float]:
@@ -66,31 +182,148 @@ def _get_sales_analyze_settings() -> tuple[int, float]:
     return days_for_average, decline_threshold
 
 
+def _get_float_env(name: str, default: float) -> float:
+    value: str | None = os.getenv(name)
+    if not value:
+        return default
+    return float(value)
+
+
+def _get_int_env(name: str, default: int) -> int:
+    value: str | None = os.getenv(name)
+    if not value:
+        return default
+    return int(value)
+
+
+def _create_vending_machine_repository(client: KitAPISession) -> VendingMachineRepository:
+    from srс.infra.cached_vending_machine_repository import CachedVendingMachineRepository
+    from srс.infra.kit_api_vending_machine_repository import KitAPIVendingMachineRepository
+
+    repository: KitAPIVendingMachineRepository = KitAPIVendingMachineRepository(client)
+    cached_repository: CachedVendingMachineRepository = CachedVendingMachineRepository(
+        repository,
+        ttl_seconds=_get_float_env("VENDING_MACHINES_TTL_SECONDS", VENDING_MACHINES_TTL_SECONDS),
+        stale_ttl_seconds=_get_float_env("VENDING_MACHINES_STALE_TTL_SECONDS", VENDING_MACHINES_STALE_TTL_SECONDS),
+    )
+    return cached_repository
+
+
+def _create_sales_repository(client: KitAPISession) -> SalesRepository:
+    sales_store: str = os.getenv("SALES_STORE", "sqlite")
+    fetch_window_days: int = _get_int_env("SALES_FETCH_WINDOW_DAYS", SALES_FETCH_WINDOW_DAYS)
+    fetch_concurrency: int = _get_int_env("SALES_FETCH_CONCURRENCY", SALES_FETCH_CONCURRENCY)
+    if sales_store == "memory":
+        from srс.infra.kit_api_sales_repository import KitAPISalesRepository
+
+        return KitAPISalesRepository(
+            client,
+            fetch_window_days=fetch_window_days,
+            fetch_concurrency=fetch_concurrency,
+        )
+    if sales_store != "sqlite":
+        raise ValueError(f"Неизвестное значение SALES_STORE: {sales_store}")
+    from srс.infra.sqlite_sales_repository import SQLiteSalesRepository
+
+    return SQLiteSalesRepository(
+        client,
+        _get_db_path(),
+        fetch_window_days=fetch_window_days,
+        fetch_concurrency=fetch_concurrency,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class _Repositories:
+    sales: SalesRepository
+    vending_machines: VendingMachineRepository
+
+
+_client_repositories: WeakKeyDictionary[KitAPISession, _Repositories] = WeakKeyDictionary()
 
 
-def _build_controller(client: KitVendingAPIClient) -> SalesReportController:
-    vending_machine_repo: KitAPIVendingMachineRepository = KitAPIVendingMachineRepository(client)
-    sales_repo: KitAPISalesRepository = KitAPISalesRepository(client)
-    no_sales_service: NoSalesReportService = NoSalesReportService(sales_repo)
+def _get_repositories(client: KitAPISession) -> _Repositories:
+    """Одни репозитории на клиента: контроллер и наблюдатель бота делят их кэши."""
+    repositories: _Repositories | None = _client_repositories.get(client)
+    if repositories is None:
+        repositories = _Repositories(
+            sales=_create_sales_repository(client),
+            vending_machines=_create_vending_machine_repository(client),
+        )
+        _client_repositories[client] = repositories
+    return repositories
+
+
+def _get_db_path() -> Path:
+    from srс.infra.sqlite_sales_repository import get_default_db_path
+
+    db_path_str: str | None = os.getenv("SALES_DB_PATH")
+    return Path(db_path_str) if db_path_str else get_default_db_path()
+
+
+def _create_sales_stats_service(sales_repo: SalesRepository, days_for_average: int) -> "SalesStatsService":
+    from srс.infra.sqlite_sales_stats_repository import SQLiteSalesStatsRepository
+    from srс.services.sales_stats_service import SalesStatsService
+
+    history_days: int = max(_get_int_env("STATS_HISTORY_DAYS", STATS_HISTORY_DAYS), days_for_average)
+    windows: tuple[int, ...] = tuple(
+        window for window in {days_for_average, STATS_MEDIUM_WINDOW_DAYS, history_days} if window <= history_days
+    )
+    stats_repo: SQLiteSalesStatsRepository = SQLiteSalesStatsRepository(
+        _get_db_path(),
+        windows=windows,
+        ewma_alpha=_get_float_env("STATS_EWMA_ALPHA", STATS_EWMA_ALPHA),
+        weekday_alpha=_get_float_env("STATS_WEEKDAY_ALPHA", STATS_WEEKDAY_ALPHA),
+        reclose_days=_get_int_env("STATS_RECLOSE_DAYS", STATS_RECLOSE_DAYS),
+    )
+    return SalesStatsService(
+        sales_repo,
+        stats_repo,
+        history_days=history_days,
+        recheck_interval_seconds=_get_float_env("STATS_RECHECK_SECONDS", STATS_RECHECK_SECONDS),
+    )
+
+
+def _build_controller(client: KitAPISession) -> "SalesReportController":
+    from srс.controllers.sales_report_controller import SalesReportController
+    from srс.domain.entities.report_document import ReportSection
+    from srс.domain.entities.sales_analyze_report import SalesAnalyzeReport
+    from srс.domain.entities.vending_machine import VendingMachine
+    from srс.services.no_sales_report_message_service import NoSalesReportMessageService
+    from srс.services.no_sales_report_service import NoSalesReportService
+    from srс.services.sales_aggregation_service import SalesAggregationService
+    from srс.services.sales_analyze_service import BASELINE_MEAN, SalesAnalyzeService
+    from srс.services.sales_report_message_service import SalesReportMessageService
+
+    repositories: _Repositories = _get_repositories(client)
+    vending_machine_repo: VendingMachineRepository = repositories.vending_machines
+    sales_repo: SalesRepository = repositories.sales
+    aggregation_service: SalesAggregationService = SalesAggregationService(sales_repo)
+    no_sales_service: NoSalesReportService = NoSalesReportService(aggregation_service)
     no_sales_message_service: NoSalesReportMessageService = NoSalesReportMessageService(
         last_sale_days=LAST_SALE_DAYS,
     )
-    async def _build_decline_report() -> str:
+    stats_service: SalesStatsService | None = None
+
+    async def _build_decline_report(vending_machines: list[VendingMachine]) -> ReportSection | None:
+        nonlocal stats_service
         days_for_average: int
         decline_threshold: float
         days_for_average, decline_threshold = _get_sales_analyze_settings()
+        if stats_service is None:
+            stats_service = _create_sales_stats_service(sales_repo, days_for_average)
         sales_analyze_service: SalesAnalyzeService = SalesAnalyzeService(
-            sales_repo,
+            stats_service,
             days_for_average,
             decline_threshold,
+            baseline=os.getenv("DECLINE_BASELINE") or BASELINE_MEAN,
         )
         sales_message_service: SalesReportMessageService = SalesReportMessageService()
-        vending_machines: list[VendingMachine] = await vending_machine_repo.get_all()
         report: SalesAnalyzeReport = await sales_analyze_service.create_sales_analyze_report(
             vending_machines=vending_machines,
         )
-        message: str = sales_message_service.create_message(report)
-        return message
+        section: ReportSection | None = sales_message_service.create_section(report)
+        return section
 
     controller: SalesReportController = SalesReportController(
         vending_machines_repository=vending_machine_repo,
@@ -102,28 +335,145 @@ def _build_controller(client: KitVendingAPIClient) -> SalesReportController:
     return controller
 
 
+def _build_watcher(
+        client: KitAPISession,
+        send_report: "Callable[[ReportDocument], Awaitable[None]]",
+) -> "SilentMachineWatcher | None":
+    if os.getenv("WATCHER_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+    from srс.silent_machine_watcher import SilentMachineWatcher
+
+    repositories: _Repositories = _get_repositories(client)
+    watcher: SilentMachineWatcher = SilentMachineWatcher(
+        client=client,
+        sales_repository=repositories.sales,
+        vending_machine_repository=repositories.vending_machines,
+        send_report=send_report,
+        poll_interval_seconds=_get_float_env("WATCHER_POLL_SECONDS", WATCHER_POLL_SECONDS),
+        learn_days=_get_int_env("WATCHER_LEARN_DAYS", WATCHER_LEARN_DAYS),
+        expected_sales_threshold=_get_float_env("WATCHER_EXPECTED_SALES", WATCHER_EXPECTED_SALES),
+        min_silence_seconds=_get_float_env("WATCHER_MIN_SILENCE_MINUTES", WATCHER_MIN_SILENCE_MINUTES) * 60,
+    )
+    return watcher
+
+
+def _print_startup_profile() -> None:
+    profile: StartupProfile | None = get_startup_profile()
+    if profile is None:
+        return
+    profile.uninstall()
+    print(profile.render(), file=sys.stderr)
+
+
+async def _run_export(args: argparse.Namespace) -> None:
+    from srс.infra.export_writers import ExportColumns, ExportWriter, create_export_writer
+    from srс.services.sales_export_service import DAILY_COLUMNS, SALES_COLUMNS, SalesExportService
+
+    if args.from_day > args.to_day:
+        raise ValueError("Дата --from позже даты --to")
+    logger: logging.Logger = get_logger()
+    client: KitAPISession = _create_client()
+    try:
+        service: SalesExportService = SalesExportService(
+            sales_repository=_create_sales_repository(client),
+            vending_machine_repository=_create_vending_machine_repository(client),
+            chunk_days=args.chunk_days,
+            batch_size=args.batch_size,
+        )
+        is_daily: bool = args.kind == "daily"
+        columns: ExportColumns = DAILY_COLUMNS if is_daily else SALES_COLUMNS
+        writer: ExportWriter
+        with create_export_writer(args.export_format, columns, args.output) as writer:
+            if is_daily:
+                exported: int = await service.export_daily_totals(args.from_day, args.to_day, writer)
+            else:
+                exported = await service.export_sales(args.from_day, args.to_day, writer)
+        logger.info(
+            "Выгрузка завершена: %s строк (%s, %s) в %s",
+            exported,
+            args.kind,
+            args.export_format,
+            args.output,
+        )
+    finally:
+        await client.close()
+        logger.info(get_metrics().summary_line())
+
+
+async def _run_backfill(args: argparse.Namespace) -> None:
+    from srс.infra.sqlite_sales_repository import BackfillResult, SQLiteSalesRepository
+
+    if args.from_day > args.to_day:
+        raise ValueError("Дата --from позже даты --to")
+    logger: logging.Logger = get_logger()
+    if os.getenv("SALES_STORE", "sqlite") != "sqlite":
+        logger.warning("SALES_STORE не sqlite: отчеты не будут читать загруженную историю")
+    concurrency: int = args.concurrency or _get_int_env("SALES_FETCH_CONCURRENCY", SALES_FETCH_CONCURRENCY)
+    client: KitAPISession = _create_client()
+    try:
+        repository: SQLiteSalesRepository = SQLiteSalesRepository(
+            client,
+            _get_db_path(),
+            fetch_window_days=_get_int_env("SALES_FETCH_WINDOW_DAYS", SALES_FETCH_WINDOW_DAYS),
+            fetch_concurrency=concurrency,
+        )
+        result: BackfillResult = await repository.backfill(args.from_day, args.to_day, args.chunk_days)
+        logger.info(
+            "Загрузка истории: загружено частей %s, пропущено %s, с ошибкой %s, продаж %s",
+            result.chunks_loaded,
+            result.chunks_skipped,
+            result.chunks_failed,
+            result.records,
+        )
+        if result.chunks_failed:
+            raise RuntimeError(
+                f"Не загружено частей: {result.chunks_failed}; повторите команду, чтобы продолжить загрузку",
+            )
+    finally:
+        await client.close()
+        logger.info(get_metrics().summary_line())
+
+
 async def app():
+    """Модули каждого режима импортируются только в нем: export и backfill не загружают отчеты и бота."""
     logger: logging.Logger = get_logger()
     logger.info("Запуск приложения")
     args: argparse.Namespace = _parse_args()
     try:
+        if args.command == "export":
+            await _run_export(args)
+            return
+        if args.command == "backfill":
+            await _run_backfill(args)
+            return
         if getattr(args, "bot", False):
-            logger.info("Запуск в режиме бота")
-            await run_bot(_create_client, _build_controller)
+            logger.info("Запуск в режиме бота%s", " (вебхук)" if args.webhook else "")
+            with startup_phase("Импорт режима бота"):
+                from srс.telegram_bot import run_bot
+            _print_startup_profile()
+            await run_bot(_create_client, _build_controller, _build_watcher, webhook=args.webhook)
             return
-        client: KitVendingAPIClient = _create_client()
-        try:
+        with startup_phase("Создание клиента и контроллера"):
+            client: KitAPISession = _create_client()
             controller: SalesReportController = _build_controller(client)
-            message: str = await controller.build_report(args)
+        try:
+            with startup_phase("Формирование отчета"):
+                report: ReportDocument = await controller.build_report(args)
 
-            if message:
-                formatted_message: str = apply_heading_bold(message)
+            if not report.is_empty():
                 if getattr(args, "dev", False):
-                    print(formatted_message)
+                    from srс.infra.markdown_v2_renderer import render_plain_text
+
+                    print(render_plain_text(report))
                 else:
-                    telegram_client: TelegramClient = TelegramClient.from_env()
-                    await telegram_client.send_message(formatted_message, as_quote=True)
+                    with startup_phase("Импорт клиента Telegram"):
+                        from srс.infra.telegram_client import TelegramClient
+                    with startup_phase("Отправка в Telegram"):
+                        async with TelegramClient.from_env() as telegram_client:
+                            await telegram_client.send_report(report)
         finally:
             await client.close()
+            logger.info(get_metrics().summary_line())
+            _print_startup_profile()
     finally:
         logger.info("Завершение приложения")
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Hashable
+
+from srс.controllers.sales_report_controller import SalesReportController
+from srс.domain.entities.report_document import ReportDocument, ReportSection
+from srс.infra.metrics import get_metrics
+
+
+class _InFlightReport:
+    """Сборка отчета, к которой подключаются одинаковые запросы: готовые разделы достаются каждому."""
+
+    def __init__(self):
+        self.sections: list[ReportSection] = []
+        self.is_finished: bool = False
+        self.changed: asyncio.Condition = asyncio.Condition()
+        self.task: asyncio.Task[ReportDocument] | None = None
+
+    async def add_section(self, section: ReportSection) -> None:
+        async with self.changed:
+            self.sections.append(section)
+            self.changed.notify_all()
+
+    async def finish(self) -> None:
+        async with self.changed:
+            self.is_finished = True
+            self.changed.notify_all()
+
+    async def follow(self, on_section: Callable[[ReportSection], Awaitable[None]]) -> None:
+        delivered: int = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: len(self.sections) > delivered or self.is_finished)
+                ready: list[ReportSection] = self.sections[delivered:]
+                is_finished: bool = self.is_finished
+            section: ReportSection
+            for section in ready:
+                await on_section(section)
+            delivered += len(ready)
+            if is_finished and delivered == len(self.sections):
+                return
+
+
+class CoalescingReportController:
+    """Объединяет одинаковые одновременные запросы отчета и кэширует готовый текст на ttl_seconds.
+
+    Неполные отчеты (сборка не уложилась в срок) не кэшируются.
+    """
+
+    def __init__(self, controller: SalesReportController, ttl_seconds: float):
+        self._controller = controller
+        self._ttl_seconds = ttl_seconds
+        self._in_flight: dict[Hashable, _InFlightReport] = {}
+        self._results: dict[Hashable, tuple[float, ReportDocument]] = {}
+
+    async def build_report(
+            self,
+            args: argparse.Namespace,
+            on_section: Callable[[ReportSection], Awaitable[None]] | None = None,
+            deadline_seconds: float | None = None,
+    ) -> ReportDocument:
+        """Разделы передаются в on_section по мере готовности, в том числе подключившимся к уже идущей сборке.
+
+        deadline_seconds задает срок той сборки, которую запрос запускает сам.
+        """
+        key: Hashable = self._make_key(args)
+        cached: tuple[float, ReportDocument] | None = self._results.get(key)
+        if cached is not None:
+            created_at: float
+            report: ReportDocument
+            created_at, report = cached
+            if (time.monotonic() - created_at) < self._ttl_seconds:
+                get_metrics().increment("cache_hits", cache="reports")
+                if on_section is not None:
+                    section: ReportSection
+                    for section in report.sections:
+                        await on_section(section)
+                return report
+            del self._results[key]
+
+        in_flight: _InFlightReport | None = self._in_flight.get(key)
+        if in_flight is None:
+            get_metrics().increment("cache_misses", cache="reports")
+            in_flight = _InFlightReport()
+            in_flight.task = asyncio.create_task(self._build(key, args, in_flight, deadline_seconds))
+            self._in_flight[key] = in_flight
+        else:
+            get_metrics().increment("coalesced_requests", cache="reports")
+        if on_section is not None:
+            await in_flight.follow(on_section)
+        return await asyncio.shield(in_flight.task)
+
+    async def _build(
+            self,
+            key: Hashable,
+            args: argparse.Namespace,
+            in_flight: _InFlightReport,
+            deadline_seconds: float | None,
+    ) -> ReportDocument:
+        try:
+            report: ReportDocument = await self._controller.build_report(
+                args,
+                on_section=in_flight.add_section,
+                deadline_seconds=deadline_seconds,
+            )
+            if self._ttl_seconds > 0 and not report.is_partial():
+                self._results[key] = (time.monotonic(), report)
+            return report
+        finally:
+            self._in_flight.pop(key, None)
+            await in_flight.finish()
+
+    @staticmethod
+    def _make_key(args: argparse.Namespace) -> Hashable:
+        return tuple(sorted(vars(args).items()))
@@ -1,16 +1,24 @@
 import argparse
+import asyncio
 from collections.abc import Awaitable, Callable
 from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from srс.domain.entities.no_sales_report import NoSalesReport
+from srс.domain.entities.report_document import ReportDocument, ReportSection
 from srс.domain.entities.vending_machine import VendingMachine
 from srс.domain.ports.vending_machine_repository import VendingMachineRepository
+from srс.infra.metrics import MetricsRegistry, get_metrics
 from srс.services.no_sales_report_message_service import NoSalesReportMessageService
 from srс.services.no_sales_report_service import NoSalesReportService
 
 _PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
 
+_SECTION_TITLES: dict[str, str] = {
+    "no_sales_section": "аппараты без продаж",
+    "decline_section": "падение продаж",
+}
+
 
 class SalesReportController:
     def __init__(
@@ -19,7 +27,7 @@ class SalesReportController:
             no_sales_service: NoSalesReportService,
             no_sales_message_service: NoSalesReportMessageService,
             last_sale_days: int,
-            decline_report_builder: Callable[[], Awaitable[str]],
+            decline_report_builder: Callable[[list[VendingMachine]], Awaitable[ReportSection | None]],
     ):
         self._vending_machines_repository = vending_machines_repository
         self._no_sales_service = no_sales_service
@@ -27,51 +35,112 @@ class SalesReportController:
         self._last_sale_days = last_sale_days
         self._decline_report_builder = decline_report_builder
 
-    async def build_report(self, args: argparse.Namespace) -> str:
-        no_sales_today: bool = args.no_sales_today
+    async def build_report(
+            self,
+            args: argparse.Namespace,
+            on_section: Callable[[ReportSection], Awaitable[None]] | None = None,
+            deadline_seconds: float | None = None,
+    ) -> ReportDocument:
+        """Собирает разделы параллельно; готовый раздел сразу передается в on_section.
+
+        По истечении deadline_seconds (отсчет от начала сборки) незавершенные разделы отменяются,
+        а отчет возвращается из готовых разделов с перечнем пропущенных в missing_sections.
+        Срок распространяется и на загрузку списка аппаратов: если он не успел загрузиться,
+        пропущенными считаются все разделы.
+        """
+        metrics: MetricsRegistry = get_metrics()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        deadline_at: float | None = loop.time() + deadline_seconds if deadline_seconds is not None else None
+        with metrics.span("build_report"):
+            no_sales_today: bool = args.no_sales_today
+            stage_names: list[str] = ["no_sales_section"] if no_sales_today else ["no_sales_section", "decline_section"]
+            try:
+                async with asyncio.timeout_at(deadline_at):
+                    with metrics.span("vending_machines"):
+                        vending_machines: list[VendingMachine] = await self._vending_machines_repository.get_all()
+            except TimeoutError:
+                metrics.increment("partial_reports")
+                return ReportDocument(
+                    sections=[],
+                    missing_sections=[_SECTION_TITLES.get(stage, stage) for stage in stage_names],
+                )
+
+            stages: dict[str, Awaitable[ReportSection | None]]
+            if no_sales_today:
+                stages = {"no_sales_section": self._build_no_sales_today(vending_machines)}
+            else:
+                stages = {
+                    "no_sales_section": self._build_no_sales_yesterday_today(vending_machines),
+                    "decline_section": self._decline_report_builder(vending_machines),
+                }
+            return await self._collect_sections(stages, on_section, deadline_at)
+
+    async def _collect_sections(
+            self,
+            stages: dict[str, Awaitable[ReportSection | None]],
+            on_section: Callable[[ReportSection], Awaitable[None]] | None,
+            deadline_at: float | None,
+    ) -> ReportDocument:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        tasks: dict[asyncio.Task[ReportSection | None], str] = {
+            asyncio.create_task(self._timed(stage, section)): stage for stage, section in stages.items()
+        }
+        sections: dict[str, ReportSection | None] = {}
+        pending: set[asyncio.Task[ReportSection | None]] = set(tasks)
+        try:
+            while pending:
+                timeout: float | None = max(deadline_at - loop.time(), 0.0) if deadline_at is not None else None
+                done: set[asyncio.Task[ReportSection | None]]
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                task: asyncio.Task[ReportSection | None]
+                for task in done:
+                    section: ReportSection | None = task.result()
+                    sections[tasks[task]] = section
+                    if section is not None and on_section is not None:
+                        await on_section(section)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
 
-        if no_sales_today:
-            report_today: str = await self._build_no_sales_today()
-            return report_today
+        missing_stages: list[str] = [stage for stage in stages if stage not in sections]
+        if missing_stages:
+            get_metrics().increment("partial_reports")
+        return ReportDocument(
+            sections=[section for stage in stages if (section := sections.get(stage)) is not None],
+            missing_sections=[_SECTION_TITLES.get(stage, stage) for stage in missing_stages],
+        )
 
-        no_sales_report: str = await self._build_no_sales_yesterday_today()
-        decline_report: str = await self._decline_report_builder()
-        combined: str = self._combine_messages(no_sales_report, decline_report)
-        return combined
+    @staticmethod
+    async def _timed(stage: str, section: Awaitable[ReportSection | None]) -> ReportSection | None:
+        with get_metrics().span(stage):
+            return await section
 
-    async def _build_no_sales_today(self) -> str:
+    async def _build_no_sales_today(self, vending_machines: list[VendingMachine]) -> ReportSection | None:
         today: date = datetime.now(_PROJECT_TZ).date()
 
         days: list[date] = [today]
-        vending_machines: list[VendingMachine] = await self._vending_machines_repository.get_all()
         report: NoSalesReport = await self._no_sales_service.create_report_for_days(
             vending_machines=vending_machines,
             days=days,
             last_sale_days=self._last_sale_days,
         )
-        message: str = self._no_sales_message_service.create_message(report)
-        return message
+        section: ReportSection | None = self._no_sales_message_service.create_section(report)
+        return section
 
-    async def _build_no_sales_yesterday_today(self) -> str:
+    async def _build_no_sales_yesterday_today(self, vending_machines: list[VendingMachine]) -> ReportSection | None:
         today: date = datetime.now(_PROJECT_TZ).date()
         yesterday: date = today - timedelta(days=1)
 
         days: list[date] = [yesterday, today]
-        vending_machines: list[VendingMachine] = await self._vending_machines_repository.get_all()
         report: NoSalesReport = await self._no_sales_service.create_report_for_days(
             vending_machines=vending_machines,
             days=days,
             last_sale_days=self._last_sale_days,
         )
-        message: str = self._no_sales_message_service.create_message(report)
-        return message
-
-    @staticmethod
-    def _combine_messages(first: str, second: str) -> str:
-        parts: list[str] = []
-        if first:
-            parts.append(first)
-        if second:
-            parts.append(second)
-        combined: str = "\n\n".join(parts)
-        return combined
+        section: ReportSection | None = self._no_sales_message_service.create_section(report)
+        return section
@@ -0,0 +1,58 @@
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+_NO_SALE: int = -1
+
+
+@dataclass(frozen=True, slots=True)
+class DailySalesTotals:
+    """Итоги одного локального дня по аппаратам: сумма, число продаж и время последней продажи.
+
+    Размер не зависит от числа продаж — по одной строке на аппарат, продававший в этот день.
+    """
+
+    day_ordinal: int
+    vending_machine_ids: memoryview
+    totals: memoryview
+    counts: memoryview
+    last_timestamps: memoryview
+
+    def __len__(self) -> int:
+        return len(self.vending_machine_ids)
+
+    def rows(self) -> Iterator[tuple[int, float, int, int]]:
+        return zip(self.vending_machine_ids, self.totals, self.counts, self.last_timestamps)
+
+
+class DailySalesTotalsBuilder:
+    def __init__(self, day_ordinal: int):
+        self._day_ordinal = day_ordinal
+        self._rows: dict[int, int] = {}
+        self._vm_ids: array = array("i")
+        self._totals: array = array("d")
+        self._counts: array = array("q")
+        self._last_timestamps: array = array("q")
+
+    def add(self, vending_machine_id: int, amount: float, timestamp: int) -> None:
+        row: int | None = self._rows.get(vending_machine_id)
+        if row is None:
+            row = len(self._vm_ids)
+            self._rows[vending_machine_id] = row
+            self._vm_ids.append(vending_machine_id)
+            self._totals.append(0.0)
+            self._counts.append(0)
+            self._last_timestamps.append(_NO_SALE)
+        self._totals[row] += amount
+        self._counts[row] += 1
+        if timestamp > self._last_timestamps[row]:
+            self._last_timestamps[row] = timestamp
+
+    def build(self) -> DailySalesTotals:
+        return DailySalesTotals(
+            day_ordinal=self._day_ordinal,
+            vending_machine_ids=memoryview(self._vm_ids),
+            totals=memoryview(self._totals),
+            counts=memoryview(self._counts),
+            last_timestamps=memoryview(self._last_timestamps),
+        )
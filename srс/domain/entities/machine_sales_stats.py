@@ -0,0 +1,69 @@
+from dataclasses import dataclass, replace
+from datetime import date
+
+_WEEKDAYS: int = 7
+
+
+@dataclass(frozen=True, slots=True)
+class MachineSalesStats:
+    """Скользящая статистика продаж аппарата по закрытым дням до last_day включительно.
+
+    rolling_sums — суммы за последние N дней для каждого окна N, ewma — экспоненциальное
+    среднее дневной выручки, weekday_ewma — такое же среднее отдельно по дням недели (0 — понедельник).
+    """
+
+    vending_machine_id: int
+    last_day: int
+    last_day_total: float
+    rolling_sums: dict[int, float]
+    ewma: float
+    weekday_ewma: tuple[float, ...]
+    days_observed: int
+
+    @classmethod
+    def empty(cls, vending_machine_id: int, windows: tuple[int, ...]) -> "MachineSalesStats":
+        return cls(
+            vending_machine_id=vending_machine_id,
+            last_day=0,
+            last_day_total=0.0,
+            rolling_sums={window: 0.0 for window in windows},
+            ewma=0.0,
+            weekday_ewma=(0.0,) * _WEEKDAYS,
+            days_observed=0,
+        )
+
+    def rolling_mean(self, window: int) -> float:
+        return self.rolling_sums.get(window, 0.0) / window
+
+    def weekday_baseline(self, day: int) -> float:
+        return self.weekday_ewma[date.fromordinal(day).weekday()]
+
+    def with_closed_day(
+            self,
+            day: int,
+            total: float,
+            dropped_totals: dict[int, float],
+            ewma_alpha: float,
+            weekday_alpha: float,
+    ) -> "MachineSalesStats":
+        """Учитывает закрытый день за O(число окон): dropped_totals — выручка дня, выпадающего из каждого окна."""
+        rolling_sums: dict[int, float] = {
+            window: current + total - dropped_totals.get(window, 0.0)
+            for window, current in self.rolling_sums.items()
+        }
+        weekday: int = date.fromordinal(day).weekday()
+        weekday_ewma: list[float] = list(self.weekday_ewma)
+        is_first_weekday: bool = self.days_observed < _WEEKDAYS and weekday_ewma[weekday] == 0.0
+        weekday_ewma[weekday] = total if is_first_weekday else (
+            weekday_alpha * total + (1 - weekday_alpha) * weekday_ewma[weekday]
+        )
+        ewma: float = total if self.days_observed == 0 else ewma_alpha * total + (1 - ewma_alpha) * self.ewma
+        return replace(
+            self,
+            last_day=day,
+            last_day_total=total,
+            rolling_sums=rolling_sums,
+            ewma=ewma,
+            weekday_ewma=tuple(weekday_ewma),
+            days_observed=self.days_observed + 1,
+        )
@@ -0,0 +1,24 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True, slots=True)
+class ReportEntry:
+    lines: list[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ReportSection:
+    heading: str
+    entries: list[ReportEntry]
+
+
+@dataclass(frozen=True, slots=True)
+class ReportDocument:
+    sections: list[ReportSection]
+    missing_sections: list[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.sections
+
+    def is_partial(self) -> bool:
+        return bool(self.missing_sections)
@@ -0,0 +1,196 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+
+_SECONDS_PER_HOUR: int = 3600
+_SECONDS_PER_DAY: int = 86400
+_UNIX_EPOCH_ORDINAL: int = 719163
+
+
+def _extend(target: array, source: memoryview) -> None:
+    target.frombytes(source.cast("B"))
+
+
+class LocalDayResolver:
+    """Переводит epoch-секунды в ordinal локального дня, кэшируя смещение зоны по часам."""
+
+    def __init__(self, tz: tzinfo):
+        self._tz = tz
+        self._offsets: dict[int, int] = {}
+
+    def day_ordinal(self, timestamp: int) -> int:
+        hour: int = timestamp // _SECONDS_PER_HOUR
+        offset: int | None = self._offsets.get(hour)
+        if offset is None:
+            local: datetime = datetime.fromtimestamp(hour * _SECONDS_PER_HOUR, self._tz)
+            offset = int(local.utcoffset().total_seconds())
+            self._offsets[hour] = offset
+        return (timestamp + offset) // _SECONDS_PER_DAY + _UNIX_EPOCH_ORDINAL
+
+
+@dataclass(frozen=True, slots=True)
+class SalesBatch:
+    """Колоночный набор продаж, отсортированный по (vending_machine_id, timestamp).
+
+    Колонки — memoryview поверх array, поэтому срезы по аппарату и по времени одного аппарата
+    не копируют данные.
+    """
+
+    vending_machine_ids: memoryview
+    amounts: memoryview
+    timestamps: memoryview
+    day_ordinals: memoryview
+    offsets: dict[int, tuple[int, int]]
+
+    @classmethod
+    def empty(cls) -> "SalesBatch":
+        return SalesBatchBuilder.from_sorted_columns(array("i"), array("d"), array("q"), array("i"))
+
+    @classmethod
+    def concat(cls, batches: Iterable["SalesBatch"]) -> "SalesBatch":
+        """Склеивает наборы, идущие по времени друг за другом (например, по дням)."""
+        parts: list[SalesBatch] = [batch for batch in batches if len(batch)]
+        if len(parts) == 1:
+            return parts[0]
+        vm_ids: array = array("i")
+        amounts: array = array("d")
+        timestamps: array = array("q")
+        day_ordinals: array = array("i")
+        machine_ids: list[int] = sorted({vm_id for batch in parts for vm_id in batch.offsets})
+        vm_id: int
+        for vm_id in machine_ids:
+            batch: SalesBatch
+            for batch in parts:
+                bounds: tuple[int, int] | None = batch.offsets.get(vm_id)
+                if bounds is None:
+                    continue
+                start: int
+                end: int
+                start, end = bounds
+                _extend(vm_ids, batch.vending_machine_ids[start:end])
+                _extend(amounts, batch.amounts[start:end])
+                _extend(timestamps, batch.timestamps[start:end])
+                _extend(day_ordinals, batch.day_ordinals[start:end])
+        return SalesBatchBuilder.from_sorted_columns(vm_ids, amounts, timestamps, day_ordinals)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def for_vending_machine(self, vending_machine_id: int) -> "SalesBatch":
+        bounds: tuple[int, int] | None = self.offsets.get(vending_machine_id)
+        if bounds is None:
+            return SalesBatch.empty()
+        start: int
+        end: int
+        start, end = bounds
+        return self._slice(start, end, {vending_machine_id: (0, end - start)})
+
+    def between(self, from_timestamp: int, to_timestamp: int) -> "SalesBatch":
+        """Продажи с from_timestamp <= timestamp < to_timestamp."""
+        return self._filter_sorted(self.timestamps, from_timestamp, to_timestamp)
+
+    def last_timestamp(self) -> int | None:
+        if not len(self):
+            return None
+        return max(self.timestamps[end - 1] for _, end in self.offsets.values())
+
+    def _slice(self, start: int, end: int, offsets: dict[int, tuple[int, int]]) -> "SalesBatch":
+        return SalesBatch(
+            vending_machine_ids=self.vending_machine_ids[start:end],
+            amounts=self.amounts[start:end],
+            timestamps=self.timestamps[start:end],
+            day_ordinals=self.day_ordinals[start:end],
+            offsets=offsets,
+        )
+
+    def _filter_sorted(self, column: memoryview, low: int, high: int) -> "SalesBatch":
+        ranges: list[tuple[int, int]] = []
+        start: int
+        end: int
+        for start, end in self.offsets.values():
+            range_start: int = bisect_left(column, low, start, end)
+            range_end: int = bisect_left(column, high, range_start, end)
+            if range_start < range_end:
+                ranges.append((range_start, range_end))
+
+        if not ranges:
+            return SalesBatch.empty()
+        if len(ranges) == 1:
+            range_start, range_end = ranges[0]
+            vm_id: int = self.vending_machine_ids[range_start]
+            return self._slice(range_start, range_end, {vm_id: (0, range_end - range_start)})
+
+        vm_ids: array = array("i")
+        amounts: array = array("d")
+        timestamps: array = array("q")
+        day_ordinals: array = array("i")
+        for start, end in ranges:
+            _extend(vm_ids, self.vending_machine_ids[start:end])
+            _extend(amounts, self.amounts[start:end])
+            _extend(timestamps, self.timestamps[start:end])
+            _extend(day_ordinals, self.day_ordinals[start:end])
+        return SalesBatchBuilder.from_sorted_columns(vm_ids, amounts, timestamps, day_ordinals)
+
+
+class SalesBatchBuilder:
+    def __init__(self, tz: tzinfo):
+        self._day_resolver: LocalDayResolver = LocalDayResolver(tz)
+        self._vm_ids: array = array("i")
+        self._amounts: array = array("d")
+        self._timestamps: array = array("q")
+        self._day_ordinals: array = array("i")
+        self._is_sorted: bool = True
+        self._last_key: tuple[int, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def append(self, vending_machine_id: int, amount: float, timestamp: int) -> None:
+        key: tuple[int, int] = (vending_machine_id, timestamp)
+        if self._last_key is not None and key < self._last_key:
+            self._is_sorted = False
+        self._last_key = key
+        self._vm_ids.append(vending_machine_id)
+        self._amounts.append(amount)
+        self._timestamps.append(timestamp)
+        self._day_ordinals.append(self._day_resolver.day_ordinal(timestamp))
+
+    def build(self) -> SalesBatch:
+        if self._is_sorted:
+            return self.from_sorted_columns(self._vm_ids, self._amounts, self._timestamps, self._day_ordinals)
+
+        order: list[int] = sorted(
+            range(len(self._timestamps)),
+            key=lambda index: (self._vm_ids[index], self._timestamps[index]),
+        )
+        return self.from_sorted_columns(
+            array("i", [self._vm_ids[index] for index in order]),
+            array("d", [self._amounts[index] for index in order]),
+            array("q", [self._timestamps[index] for index in order]),
+            array("i", [self._day_ordinals[index] for index in order]),
+        )
+
+    @staticmethod
+    def from_sorted_columns(
+            vm_ids: array,
+            amounts: array,
+            timestamps: array,
+            day_ordinals: array,
+    ) -> SalesBatch:
+        offsets: dict[int, tuple[int, int]] = {}
+        start: int = 0
+        count: int = len(vm_ids)
+        while start < count:
+            vm_id: int = vm_ids[start]
+            end: int = bisect_left(vm_ids, vm_id + 1, start, count)
+            offsets[vm_id] = (start, end)
+            start = end
+        return SalesBatch(
+            vending_machine_ids=memoryview(vm_ids),
+            amounts=memoryview(amounts),
+            timestamps=memoryview(timestamps),
+            day_ordinals=memoryview(day_ordinals),
+            offsets=offsets,
+        )
@@ -0,0 +1,121 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from srс.domain.entities.daily_sales_totals import DailySalesTotals
+from srс.domain.entities.sales_batch import SalesBatch
+
+_NO_SALE: int = -1
+
+
+@dataclass(frozen=True, slots=True)
+class SalesMatrix:
+    """Агрегаты продаж «аппараты × дни»: суммы и количество продаж по дням и последняя продажа аппарата."""
+
+    machine_rows: dict[int, int]
+    first_day: int
+    day_count: int
+    totals: memoryview
+    counts: memoryview
+    last_timestamps: memoryview
+
+    def total(self, vending_machine_id: int, first_day: int, last_day: int) -> float:
+        return sum(self._row_slice(self.totals, vending_machine_id, first_day, last_day))
+
+    def count(self, vending_machine_id: int, first_day: int, last_day: int) -> int:
+        return sum(self._row_slice(self.counts, vending_machine_id, first_day, last_day))
+
+    def last_timestamp(self, vending_machine_id: int) -> int | None:
+        row: int | None = self.machine_rows.get(vending_machine_id)
+        if row is None or self.last_timestamps[row] == _NO_SALE:
+            return None
+        return self.last_timestamps[row]
+
+    def _row_slice(self, column: memoryview, vending_machine_id: int, first_day: int, last_day: int) -> memoryview:
+        row: int | None = self.machine_rows.get(vending_machine_id)
+        start: int = max(first_day - self.first_day, 0)
+        end: int = min(last_day - self.first_day + 1, self.day_count)
+        if row is None or start >= end:
+            return column[0:0]
+        row_start: int = row * self.day_count
+        return column[row_start + start: row_start + end]
+
+
+class SalesMatrixBuilder:
+    """Накапливает SalesMatrix по мере поступления продаж или готовых дневных итогов.
+
+    Продажи аппаратов вне списка и дней вне [first_day, last_day] отбрасываются, поэтому
+    память ограничена размером «аппараты × дни», а не числом продаж.
+    """
+
+    def __init__(self, vending_machine_ids: Iterable[int], first_day: int, last_day: int):
+        self.first_day = first_day
+        self.last_day = last_day
+        self._machine_rows: dict[int, int] = {}
+        vm_id: int
+        for vm_id in vending_machine_ids:
+            self._machine_rows.setdefault(vm_id, len(self._machine_rows))
+        self._day_count: int = max(last_day - first_day + 1, 0)
+        self._totals: array = array("d", bytes(8 * len(self._machine_rows) * self._day_count))
+        self._counts: array = array("q", bytes(8 * len(self._machine_rows) * self._day_count))
+        self._last_timestamps: array = array("q", [_NO_SALE]) * len(self._machine_rows)
+
+    def add_totals(self, vending_machine_id: int, day: int, total: float, count: int, last_timestamp: int) -> None:
+        row: int | None = self._machine_rows.get(vending_machine_id)
+        column: int = day - self.first_day
+        if row is None or column < 0 or column >= self._day_count:
+            return
+        cell: int = row * self._day_count + column
+        self._totals[cell] += total
+        self._counts[cell] += count
+        if last_timestamp > self._last_timestamps[row]:
+            self._last_timestamps[row] = last_timestamp
+
+    def add_day_totals(self, day_totals: DailySalesTotals) -> None:
+        day: int = day_totals.day_ordinal
+        vm_id: int
+        total: float
+        count: int
+        last_timestamp: int
+        for vm_id, total, count, last_timestamp in day_totals.rows():
+            self.add_totals(vm_id, day, total, count, last_timestamp)
+
+    def add_batch(self, sales: SalesBatch) -> None:
+        """Набор отсортирован по (аппарат, время), поэтому продажи аппарата за день идут подряд.
+
+        Границы дней находятся бисекцией, а сумма считается по срезу колонки: цикл на Python
+        идет по ячейкам «аппарат × день», а не по продажам.
+        """
+        day_ordinals: memoryview = sales.day_ordinals
+        vm_id: int
+        start: int
+        end: int
+        for vm_id, (start, end) in sales.offsets.items():
+            row: int | None = self._machine_rows.get(vm_id)
+            if row is None:
+                continue
+            first: int = bisect_left(day_ordinals, self.first_day, start, end)
+            last: int = bisect_left(day_ordinals, self.last_day + 1, first, end)
+            if first >= last:
+                continue
+            row_start: int = row * self._day_count - self.first_day
+            position: int = first
+            while position < last:
+                day: int = day_ordinals[position]
+                day_end: int = bisect_left(day_ordinals, day + 1, position, last)
+                self._totals[row_start + day] += sum(sales.amounts[position:day_end])
+                self._counts[row_start + day] += day_end - position
+                position = day_end
+            if sales.timestamps[last - 1] > self._last_timestamps[row]:
+                self._last_timestamps[row] = sales.timestamps[last - 1]
+
+    def build(self) -> SalesMatrix:
+        return SalesMatrix(
+            machine_rows=self._machine_rows,
+            first_day=self.first_day,
+            day_count=self._day_count,
+            totals=memoryview(self._totals),
+            counts=memoryview(self._counts),
+            last_timestamps=memoryview(self._last_timestamps),
+        )
@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
+
+_HOURS_PER_DAY: int = 24
+_SECONDS_PER_HOUR: int = 3600
+
+
+@dataclass(slots=True)
+class _MachineRhythm:
+    hourly_rates: list[float] = field(default_factory=lambda: [0.0] * _HOURS_PER_DAY)
+    day_counts: list[int] = field(default_factory=lambda: [0] * _HOURS_PER_DAY)
+    last_timestamp: int | None = None
+
+
+class SalesRhythmIndex:
+    """Последняя продажа и почасовой ритм продаж каждого аппарата.
+
+    Ритм — среднее число продаж в каждый час суток; по нему считается, сколько продаж
+    аппарат «должен был» сделать за время молчания, поэтому ночные паузы не считаются простоем.
+    Закрытый день вливается в ритм экспоненциально с весом 1 / learn_days.
+    """
+
+    def __init__(self, tz: tzinfo, learn_days: int):
+        self._tz = tz
+        self._learn_days = learn_days
+        self._machines: dict[int, _MachineRhythm] = {}
+
+    def learn(self, vending_machine_id: int, timestamp: int) -> None:
+        """Учитывает продажу уже закрытого дня: из истории за learn_days дней или запоздавшую.
+
+        Для запоздавшей продажи это то же, что учесть ее до close_day: вклад дня в ритм линеен.
+        """
+        rhythm: _MachineRhythm = self._get(vending_machine_id)
+        rhythm.hourly_rates[self._hour(timestamp)] += 1 / self._learn_days
+        self._update_last(rhythm, timestamp)
+
+    def add_sale(self, vending_machine_id: int, timestamp: int) -> None:
+        rhythm: _MachineRhythm = self._get(vending_machine_id)
+        rhythm.day_counts[self._hour(timestamp)] += 1
+        self._update_last(rhythm, timestamp)
+
+    def close_day(self) -> None:
+        weight: float = 1 / self._learn_days
+        rhythm: _MachineRhythm
+        for rhythm in self._machines.values():
+            hour: int
+            for hour in range(_HOURS_PER_DAY):
+                rhythm.hourly_rates[hour] += weight * (rhythm.day_counts[hour] - rhythm.hourly_rates[hour])
+                rhythm.day_counts[hour] = 0
+
+    def last_timestamp(self, vending_machine_id: int) -> int | None:
+        rhythm: _MachineRhythm | None = self._machines.get(vending_machine_id)
+        return rhythm.last_timestamp if rhythm is not None else None
+
+    def expected_sales(self, vending_machine_id: int, from_timestamp: int, to_timestamp: int) -> float:
+        rhythm: _MachineRhythm | None = self._machines.get(vending_machine_id)
+        if rhythm is None:
+            return 0.0
+        expected: float = 0.0
+        moment: int = from_timestamp
+        while moment < to_timestamp:
+            hour_end: int = (moment // _SECONDS_PER_HOUR + 1) * _SECONDS_PER_HOUR
+            span_end: int = min(hour_end, to_timestamp)
+            expected += rhythm.hourly_rates[self._hour(moment)] * (span_end - moment) / _SECONDS_PER_HOUR
+            moment = span_end
+        return expected
+
+    def _get(self, vending_machine_id: int) -> _MachineRhythm:
+        rhythm: _MachineRhythm | None = self._machines.get(vending_machine_id)
+        if rhythm is None:
+            rhythm = _MachineRhythm()
+            self._machines[vending_machine_id] = rhythm
+        return rhythm
+
+    def _hour(self, timestamp: int) -> int:
+        return datetime.fromtimestamp(timestamp, self._tz).hour
+
+    @staticmethod
+    def _update_last(rhythm: _MachineRhythm, timestamp: int) -> None:
+        if rhythm.last_timestamp is None or timestamp > rhythm.last_timestamp:
+            rhythm.last_timestamp = timestamp
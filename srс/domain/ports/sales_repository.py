@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
 
-from srс.domain.entities.sale import Sale
+from srс.domain.entities.sales_batch import SalesBatch
+from srс.domain.entities.sales_matrix import SalesMatrixBuilder
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
 
 
 class SalesRepository(ABC):
@@ -11,4 +15,23 @@ class SalesRepository(ABC):
             from_date: datetime,
             to_date: datetime,
             vending_machine_id: int | None = None,
-    ) -> list[Sale]: pass
+    ) -> SalesBatch: pass
+
+    async def aggregate_daily_sales(self, builder: SalesMatrixBuilder) -> None:
+        """Добавляет в builder итоги продаж за локальные дни [builder.first_day, builder.last_day].
+
+        Реализация по умолчанию материализует все продажи через get_sales; хранилища
+        переопределяют ее, чтобы агрегировать без списка отдельных продаж.
+        """
+        from_date: datetime = datetime.combine(date.fromordinal(builder.first_day), time.min).replace(tzinfo=_PROJECT_TZ)
+        to_date: datetime = datetime.combine(date.fromordinal(builder.last_day + 1), time.min).replace(tzinfo=_PROJECT_TZ)
+        sales: SalesBatch = await self.get_sales(from_date=from_date, to_date=to_date)
+        builder.add_batch(sales)
+
+    async def refresh_days(self, first_day: int, last_day: int) -> None:
+        """Заново запрашивает у источника продажи за уже загруженные локальные дни [first_day, last_day].
+
+        Источник может прислать продажу за закрытый день с опозданием, а кэширующие хранилища
+        такие дни сами не перечитывают. Реализация по умолчанию ничего не делает: без кэша
+        get_sales и так читает источник.
+        """
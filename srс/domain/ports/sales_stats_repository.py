@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+from srс.domain.entities.machine_sales_stats import MachineSalesStats
+
+
+class SalesStatsRepository(ABC):
+    @abstractmethod
+    async def get_last_closed_day(self) -> int | None:
+        """Последний день, итоги которого переданы в apply_closed_days."""
+
+    @abstractmethod
+    async def get_settled_day(self) -> int | None:
+        """Последний окончательно учтенный день; дни после него можно передавать в apply_closed_days повторно."""
+
+    @abstractmethod
+    async def apply_closed_days(
+            self,
+            closed_days: list[tuple[int, dict[int, float]]],
+            reset: bool = False,
+    ) -> None:
+        """Применяет итоги закрытых дней (день, выручка по аппаратам) по порядку.
+
+        Дни после get_settled_day заменяют ранее переданные итоги тех же дней, более ранние пропускаются.
+        """
+
+    @abstractmethod
+    async def get_stats(self, vending_machine_ids: Iterable[int]) -> dict[int, MachineSalesStats]: pass
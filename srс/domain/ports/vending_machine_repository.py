@@ -5,4 +5,9 @@ from srс.domain.entities.vending_machine import VendingMachine
 
 class VendingMachineRepository(ABC):
     @abstractmethod
-    def get_all(self) -> list[VendingMachine]: pass
+    async def get_all(self) -> list[VendingMachine]: pass
+
+    async def get_index(self) -> dict[int, VendingMachine]:
+        """Аппараты по kit_id. Словарь может быть общим кэшем реализации: не изменяйте его."""
+        vending_machines: list[VendingMachine] = await self.get_all()
+        return {vending_machine.kit_id: vending_machine for vending_machine in vending_machines}
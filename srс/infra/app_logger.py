@@ -1,33 +1,121 @@
+import atexit
+import json
 import logging
-from datetime import date
+import logging.handlers
+import os
+import queue
+import re
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 _LOGGER_NAME: str = "sales_checker"
 _IS_CONFIGURED: bool = False
+_DEFAULT_RETENTION_DAYS: int = 30
+_LOG_FILE_NAME_PATTERN: re.Pattern[str] = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 
-def _get_log_file_path() -> Path:
-    today: date = date.today()
+def _get_log_dir() -> Path:
     base_dir: Path = Path(__file__).resolve().parents[2]
     log_dir: Path = base_dir / "data"
     log_dir.mkdir(parents=True, exist_ok=True)
-    return log_dir / today.isoformat()
+    return log_dir
+
+
+class _DailyFileHandler(logging.Handler):
+    """Пишет в файл data/<YYYY-MM-DD> текущего локального дня и переключается в полночь."""
+
+    def __init__(self, log_dir: Path, retention_days: int):
+        super().__init__()
+        self._log_dir = log_dir
+        self._retention_days = retention_days
+        self._current_day: date | None = None
+        self._stream = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            today: date = date.today()
+            if today != self._current_day:
+                self._open_for_day(today)
+            self._stream.write(self.format(record) + "\n")
+            self._stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+        finally:
+            self.release()
+        super().close()
+
+    def _open_for_day(self, day: date) -> None:
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = open(self._log_dir / day.isoformat(), "a", encoding="utf-8")
+        self._current_day = day
+        self._remove_expired_files(day)
+
+    def _remove_expired_files(self, today: date) -> None:
+        if self._retention_days <= 0:
+            return
+        oldest_kept: str = (today - timedelta(days=self._retention_days - 1)).isoformat()
+        path: Path
+        for path in self._log_dir.iterdir():
+            if _LOG_FILE_NAME_PATTERN.match(path.name) and path.name < oldest_kept:
+                path.unlink(missing_ok=True)
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, object] = {
+            "time": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def _build_formatter() -> logging.Formatter:
+    if os.getenv("LOG_FORMAT", "").lower() == "json":
+        return _JsonFormatter()
+    return logging.Formatter(
+        fmt="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+
+
+def _get_retention_days() -> int:
+    value: str | None = os.getenv("LOG_RETENTION_DAYS")
+    if not value:
+        return _DEFAULT_RETENTION_DAYS
+    return int(value)
 
 
 def _configure_logging() -> None:
     root_logger: logging.Logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    log_file: Path = _get_log_file_path()
-    file_handler: logging.FileHandler = logging.FileHandler(log_file, encoding="utf-8")
-    formatter: logging.Formatter = logging.Formatter(
-        fmt="%(asctime)s %(levelname)s %(name)s %(message)s",
-    )
+    formatter: logging.Formatter = _build_formatter()
+    file_handler: _DailyFileHandler = _DailyFileHandler(_get_log_dir(), _get_retention_days())
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
     stdout_handler: logging.StreamHandler = logging.StreamHandler()
     stdout_handler.setLevel(logging.WARNING)
     stdout_handler.setFormatter(formatter)
-    root_logger.addHandler(stdout_handler)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener: logging.handlers.QueueListener = logging.handlers.QueueListener(
+        log_queue,
+        file_handler,
+        stdout_handler,
+        respect_handler_level=True,
+    )
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
 
 
 def get_logger(name: str | None = None) -> logging.Logger:
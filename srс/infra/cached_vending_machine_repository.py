@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import time
+
+from srс.domain.entities.vending_machine import VendingMachine
+from srс.domain.ports.vending_machine_repository import VendingMachineRepository
+from srс.infra.app_logger import get_logger
+from srс.infra.metrics import get_metrics
+
+
+class CachedVendingMachineRepository(VendingMachineRepository):
+    """Справочник аппаратов с TTL: после ttl_seconds отдает старые данные и обновляет их в фоне,
+    после stale_ttl_seconds ждет обновления. Если обновить не удалось, отдает последние полученные данные."""
+
+    def __init__(
+            self,
+            repository: VendingMachineRepository,
+            ttl_seconds: float,
+            stale_ttl_seconds: float,
+    ):
+        self._repository = repository
+        self._ttl_seconds = ttl_seconds
+        self._stale_ttl_seconds = max(stale_ttl_seconds, ttl_seconds)
+        self._machines: list[VendingMachine] | None = None
+        self._index: dict[int, VendingMachine] = {}
+        self._loaded_at: float = 0.0
+        self._refresh_lock: asyncio.Lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    async def get_all(self) -> list[VendingMachine]:
+        machines: list[VendingMachine] = await self._get_machines()
+        return list(machines)
+
+    async def get_index(self) -> dict[int, VendingMachine]:
+        await self._get_machines()
+        return self._index
+
+    async def _get_machines(self) -> list[VendingMachine]:
+        age: float = time.monotonic() - self._loaded_at
+        if self._machines is None or age >= self._stale_ttl_seconds:
+            get_metrics().increment("cache_misses", cache="vending_machines")
+            try:
+                await self._refresh()
+            except Exception:
+                if self._machines is None:
+                    raise
+                get_logger().warning("KIT API недоступен, используется последний справочник аппаратов", exc_info=True)
+                get_metrics().increment("stale_served", cache="vending_machines")
+            return self._machines
+        get_metrics().increment("cache_hits", cache="vending_machines")
+        if age >= self._ttl_seconds and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+        assert self._machines is not None
+        return self._machines
+
+    async def _refresh(self) -> None:
+        requested_at: float = time.monotonic()
+        async with self._refresh_lock:
+            if self._machines is not None and self._loaded_at >= requested_at:
+                return
+            machines: list[VendingMachine] = await self._repository.get_all()
+            self._machines = machines
+            self._index = {machine.kit_id: machine for machine in machines}
+            self._loaded_at = time.monotonic()
+
+    async def _refresh_in_background(self) -> None:
+        logger: logging.Logger = get_logger()
+        try:
+            await self._refresh()
+        except Exception:
+            logger.warning("Не удалось обновить справочник аппаратов, используются старые данные", exc_info=True)
+        finally:
+            self._refresh_task = None
@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, tzinfo
+
+_MAX_LOOKAHEAD_DAYS: int = 366 * 5
+
+
+def _parse_field(field: str, minimum: int, maximum: int) -> frozenset[int]:
+    values: set[int] = set()
+    part: str
+    for part in field.split(","):
+        step: int = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+            if step <= 0:
+                raise ValueError(f"Некорректный шаг в cron-выражении: {field}")
+        start: int
+        end: int
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = int(part)
+            end = maximum if step > 1 else start
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f"Значение вне диапазона в cron-выражении: {field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True, slots=True)
+class CronSchedule:
+    """Расписание в формате cron: минута, час, день месяца, месяц, день недели (0 и 7 — воскресенье).
+
+    Как в cron, если ограничены и день месяца, и день недели, достаточно совпадения любого из них.
+    Поле, начинающееся с «*» (в том числе «*/N»), ограничением не считается.
+    """
+
+    expression: str
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days_of_month: frozenset[int]
+    months: frozenset[int]
+    days_of_week: frozenset[int]
+    is_day_of_month_restricted: bool
+    is_day_of_week_restricted: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> "CronSchedule":
+        fields: list[str] = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron-выражение должно содержать 5 полей: {expression}")
+        days_of_week: frozenset[int] = frozenset(day % 7 for day in _parse_field(fields[4], 0, 7))
+        return cls(
+            expression=" ".join(fields),
+            minutes=_parse_field(fields[0], 0, 59),
+            hours=_parse_field(fields[1], 0, 23),
+            days_of_month=_parse_field(fields[2], 1, 31),
+            months=_parse_field(fields[3], 1, 12),
+            days_of_week=days_of_week,
+            is_day_of_month_restricted=not fields[2].startswith("*"),
+            is_day_of_week_restricted=not fields[4].startswith("*"),
+        )
+
+    def next_after(self, moment: datetime, tz: tzinfo) -> datetime:
+        local: datetime = moment.astimezone(tz)
+        day: date = local.date()
+        start_time: time | None = (local.replace(second=0, microsecond=0) + timedelta(minutes=1)).time()
+        if start_time == time.min:
+            day += timedelta(days=1)
+            start_time = None
+        _: int
+        for _ in range(_MAX_LOOKAHEAD_DAYS):
+            if self._matches_day(day):
+                candidate: time | None = self._first_time_from(start_time or time.min)
+                if candidate is not None:
+                    return datetime.combine(day, candidate).replace(tzinfo=tz)
+            day += timedelta(days=1)
+            start_time = None
+        raise ValueError(f"Расписание никогда не срабатывает: {self.expression}")
+
+    def _matches_day(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        day_of_month_match: bool = day.day in self.days_of_month
+        day_of_week_match: bool = (day.isoweekday() % 7) in self.days_of_week
+        if self.is_day_of_month_restricted and self.is_day_of_week_restricted:
+            return day_of_month_match or day_of_week_match
+        return day_of_month_match and day_of_week_match
+
+    def _first_time_from(self, start: time) -> time | None:
+        hour: int
+        for hour in sorted(h for h in self.hours if h >= start.hour):
+            min_minute: int = start.minute if hour == start.hour else 0
+            minutes: list[int] = sorted(m for m in self.minutes if m >= min_minute)
+            if minutes:
+                return time(hour=hour, minute=minutes[0])
+        return None
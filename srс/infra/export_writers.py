@@ -0,0 +1,104 @@
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO, Any
+
+EXPORT_FORMATS: tuple[str, ...] = ("csv", "jsonl", "parquet")
+_STDOUT_PATH: str = "-"
+
+ExportColumns = list[tuple[str, type]]
+
+
+class ExportWriter(ABC):
+    """Пишет выгрузку пачками строк; в памяти держится не больше одной пачки."""
+
+    def __init__(self, columns: ExportColumns):
+        self._columns = columns
+        self._names: list[str] = [name for name, _ in columns]
+
+    @abstractmethod
+    def write_batch(self, rows: list[tuple[Any, ...]]) -> None: pass
+
+    @abstractmethod
+    def close(self) -> None: pass
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+class _TextExportWriter(ExportWriter, ABC):
+    def __init__(self, columns: ExportColumns, output: str):
+        super().__init__(columns)
+        self._owns_stream: bool = output != _STDOUT_PATH
+        self._stream: IO[str] = (
+            open(output, "w", encoding="utf-8", newline="") if self._owns_stream else sys.stdout
+        )
+
+    def close(self) -> None:
+        if self._owns_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+
+
+class CsvExportWriter(_TextExportWriter):
+    def __init__(self, columns: ExportColumns, output: str):
+        super().__init__(columns, output)
+        self._writer = csv.writer(self._stream)
+        self._writer.writerow(self._names)
+
+    def write_batch(self, rows: list[tuple[Any, ...]]) -> None:
+        self._writer.writerows(rows)
+
+
+class JsonLinesExportWriter(_TextExportWriter):
+    def write_batch(self, rows: list[tuple[Any, ...]]) -> None:
+        row: tuple[Any, ...]
+        for row in rows:
+            self._stream.write(json.dumps(dict(zip(self._names, row)), ensure_ascii=False))
+            self._stream.write("\n")
+
+
+class ParquetExportWriter(ExportWriter):
+    """Каждая пачка записывается отдельной группой строк. Нужен необязательный пакет pyarrow."""
+
+    def __init__(self, columns: ExportColumns, output: str):
+        super().__init__(columns)
+        if output == _STDOUT_PATH:
+            raise ValueError("Формат parquet нельзя выводить в stdout, укажите файл")
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise ValueError("Для формата parquet нужен пакет pyarrow (pip install pyarrow)") from exc
+        self._pyarrow = pyarrow
+        types: dict[type, Any] = {int: pyarrow.int64(), float: pyarrow.float64(), str: pyarrow.string()}
+        self._schema = pyarrow.schema([(name, types[column_type]) for name, column_type in columns])
+        self._writer = pyarrow.parquet.ParquetWriter(output, self._schema)
+
+    def write_batch(self, rows: list[tuple[Any, ...]]) -> None:
+        arrays: list[list[Any]] = [list(column) for column in zip(*rows)] if rows else [[] for _ in self._names]
+        table: Any = self._pyarrow.Table.from_arrays(
+            [self._pyarrow.array(values, type=field.type) for values, field in zip(arrays, self._schema)],
+            schema=self._schema,
+        )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def create_export_writer(export_format: str, columns: ExportColumns, output: str | Path) -> ExportWriter:
+    output_path: str = str(output)
+    if export_format == "csv":
+        return CsvExportWriter(columns, output_path)
+    if export_format == "jsonl":
+        return JsonLinesExportWriter(columns, output_path)
+    if export_format == "parquet":
+        return ParquetExportWriter(columns, output_path)
+    raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
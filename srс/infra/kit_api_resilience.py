@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+from aiohttp import ClientError, ClientResponseError
+
+from srс.infra.app_logger import get_logger
+from srс.infra.metrics import MetricsRegistry, get_metrics
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+_LATENCY_WINDOW: int = 200
+
+
+class KitAPIUnavailableError(RuntimeError):
+    """KIT API признан неработающим: запросы не отправляются до пробного запроса после паузы."""
+
+
+@dataclass(frozen=True, slots=True)
+class ResiliencePolicy:
+    timeout_seconds: float = 30.0
+    max_attempts: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 10.0
+    hedge_quantile: float | None = None
+    hedge_min_samples: int = 20
+    failure_threshold: int = 5
+    reset_timeout_seconds: float = 60.0
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, TimeoutError):
+        return True
+    if isinstance(exc, ClientResponseError):
+        return exc.status in _RETRYABLE_STATUSES
+    if isinstance(exc, (ClientError, OSError)):
+        return True
+    status: object = getattr(exc, "status", None) or getattr(exc, "status_code", None)
+    return status in _RETRYABLE_STATUSES
+
+
+class LatencyTracker:
+    """Времена последних успешных запросов одной операции для оценки порога дублирования."""
+
+    def __init__(self, window: int = _LATENCY_WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> float | None:
+        if len(self._samples) < min_samples:
+            return None
+        ordered: list[float] = sorted(self._samples)
+        index: int = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """После failure_threshold сбоев подряд размыкается на reset_timeout_seconds.
+
+    По истечении паузы переходит в полуоткрытое состояние: пропускает ровно один пробный
+    запрос, остальные отклоняются, пока он не завершится. Успех пробного запроса замыкает
+    цепь, сбой снова размыкает ее на полную паузу.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_seconds: float):
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout_seconds = reset_timeout_seconds
+        self._failures: int = 0
+        self._opened_at: float | None = None
+        self._is_probing: bool = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None and (time.monotonic() - self._opened_at) < self._reset_timeout_seconds
+
+    def check(self) -> bool:
+        """Пропускает запрос или бросает KitAPIUnavailableError.
+
+        True означает, что запрос пробный: после него нужно вызвать end_probe.
+        """
+        if self._opened_at is None:
+            return False
+        if self.is_open or self._is_probing:
+            raise KitAPIUnavailableError("KIT API временно недоступен: слишком много сбоев подряд")
+        self._is_probing = True
+        return True
+
+    def end_probe(self) -> None:
+        """Освобождает место пробного запроса, даже если он не дал ни успеха, ни сбоя (отмена, ошибка запроса)."""
+        self._is_probing = False
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            get_logger().info("KIT API снова отвечает, цепь замкнута")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self._failure_threshold:
+            if not self.is_open:
+                get_logger().warning(
+                    "KIT API признан недоступным на %s с после %s сбоев подряд",
+                    self._reset_timeout_seconds,
+                    self._failures,
+                )
+                get_metrics().increment("circuit_opened", target="kit_api")
+            self._opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """Выполняет запросы к KIT API по политике устойчивости.
+
+    Каждая попытка ограничена timeout_seconds; временные сбои (таймауты, сетевые ошибки,
+    429 и 5xx) повторяются с экспоненциальной паузой со случайным разбросом. Если задан
+    hedge_quantile, то запрос, не ответивший за этот квантиль недавних времен ответа,
+    дублируется, и берется первый успешный ответ. Все операции — чтение, поэтому дубли безопасны.
+    """
+
+    def __init__(self, policy: ResiliencePolicy):
+        self._policy = policy
+        self._breaker: CircuitBreaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout_seconds)
+        self._latencies: dict[str, LatencyTracker] = {}
+
+    async def call(self, operation: str, request: Callable[[], Awaitable[T]]) -> T:
+        logger: logging.Logger = get_logger()
+        metrics: MetricsRegistry = get_metrics()
+        attempt: int = 0
+        while True:
+            attempt += 1
+            is_probe: bool = self._breaker.check()
+            try:
+                result: T = await self._attempt(operation, request)
+            except Exception as exc:
+                if not _is_retryable(exc):
+                    raise
+                self._breaker.record_failure()
+                metrics.increment("kit_api_failures", operation=operation)
+                if attempt == self._policy.max_attempts:
+                    raise
+                delay: float = self._backoff(attempt)
+                logger.warning(
+                    "Сбой запроса KIT API %s (попытка %s из %s), повтор через %.1f с: %r",
+                    operation,
+                    attempt,
+                    self._policy.max_attempts,
+                    delay,
+                    exc,
+                )
+                metrics.increment("kit_api_retries", operation=operation)
+                await asyncio.sleep(delay)
+                continue
+            else:
+                self._breaker.record_success()
+                return result
+            finally:
+                if is_probe:
+                    self._breaker.end_probe()
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling: float = min(self._policy.backoff_max_seconds, self._policy.backoff_base_seconds * 2 ** (attempt - 1))
+        return random.uniform(0.0, ceiling)
+
+    async def _attempt(self, operation: str, request: Callable[[], Awaitable[T]]) -> T:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        started_at: float = loop.time()
+        deadline_at: float = started_at + self._policy.timeout_seconds
+        tracker: LatencyTracker = self._latencies.setdefault(operation, LatencyTracker())
+        hedge_after: float | None = (
+            tracker.quantile(self._policy.hedge_quantile, self._policy.hedge_min_samples)
+            if self._policy.hedge_quantile is not None
+            else None
+        )
+
+        tasks: set[asyncio.Task[T]] = {asyncio.create_task(request())}
+        try:
+            if hedge_after is not None and hedge_after < self._policy.timeout_seconds:
+                done: set[asyncio.Task[T]]
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    get_metrics().increment("kit_api_hedges", operation=operation)
+                    tasks.add(asyncio.create_task(request()))
+            result: T = await self._first_successful(tasks, deadline_at)
+        finally:
+            task: asyncio.Task[T]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        tracker.record(loop.time() - started_at)
+        return result
+
+    @staticmethod
+    async def _first_successful(tasks: set[asyncio.Task[T]], deadline_at: float) -> T:
+        """Ждет первый успешный ответ; запрос, отмененный извне, считается неудачной попыткой.
+
+        Ошибки всех завершившихся задач забираются, чтобы asyncio не жаловался на непрочитанные исключения.
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        pending: set[asyncio.Task[T]] = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done: set[asyncio.Task[T]]
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(deadline_at - loop.time(), 0.0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                raise TimeoutError("Превышено время ожидания ответа KIT API")
+            succeeded: asyncio.Task[T] | None = None
+            task: asyncio.Task[T]
+            for task in done:
+                if task.cancelled():
+                    error = error or ConnectionError("Запрос к KIT API отменен")
+                    continue
+                task_error: BaseException | None = task.exception()
+                if task_error is None:
+                    succeeded = succeeded or task
+                else:
+                    error = task_error
+            if succeeded is not None:
+                return succeeded.result()
+        assert error is not None
+        raise error
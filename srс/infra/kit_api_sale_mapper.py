@@ -0,0 +1,14 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from kit_api.models.sales import SaleModel
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+
+def map_sale_model(sale_model: SaleModel) -> tuple[int, float, int]:
+    """Возвращает (vending_machine_id, amount, epoch-секунды) без создания промежуточных объектов."""
+    timestamp: datetime = sale_model.timestamp
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=_PROJECT_TZ)
+    return sale_model.vending_machine_id, float(sale_model.price), int(timestamp.timestamp())
@@ -1,75 +1,226 @@
+import asyncio
 import time
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta
 from zoneinfo import ZoneInfo
 
-from kit_api import KitVendingAPIClient, SalesCollection
+from kit_api import SalesCollection
 from kit_api.models.sales import SaleModel
 
-from srс.domain.entities.sale import Sale
+from srс.domain.entities.daily_sales_totals import DailySalesTotals, DailySalesTotalsBuilder
+from srс.domain.entities.sales_batch import LocalDayResolver, SalesBatch, SalesBatchBuilder
+from srс.domain.entities.sales_matrix import SalesMatrixBuilder
 from srс.domain.ports.sales_repository import SalesRepository
+from srс.infra.app_logger import get_logger
+from srс.infra.kit_api_sale_mapper import map_sale_model
+from srс.infra.kit_api_session import KitAPISession
+from srс.infra.metrics import MetricsRegistry, get_metrics
 
 _PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
 
 _CACHE_TTL_SECONDS: float = 60.0
+_MAX_CACHED_DAYS: int = 62
+_FETCH_WINDOW_DAYS: int = 1
+_FETCH_CONCURRENCY: int = 4
+
+
+@dataclass(slots=True)
+class _DayBucket:
+    totals: DailySalesTotals
+    fetched_at: float
+    is_closed: bool
 
 
 class KitAPISalesRepository(SalesRepository):
-    def __init__(self, client: KitVendingAPIClient):
+    """Кэширует дневные итоги продаж по аппаратам: закрытые дни — до вытеснения, текущий — не дольше TTL.
+
+    Закрытые дни перечитываются только по refresh_days. Отдельные продажи не хранятся: ответ
+    KIT API сразу сворачивается в итоги, а get_sales запрашивает продажи заново. Если KIT API недоступен, устаревшие итоги текущего дня
+    отдаются как есть. Недостающие дни запрашиваются окнами по fetch_window_days дней,
+    не более fetch_concurrency окон одновременно; каждое окно попадает в кэш сразу по получении.
+    """
+
+    def __init__(
+            self,
+            client: KitAPISession,
+            max_cached_days: int = _MAX_CACHED_DAYS,
+            open_day_ttl_seconds: float = _CACHE_TTL_SECONDS,
+            fetch_window_days: int = _FETCH_WINDOW_DAYS,
+            fetch_concurrency: int = _FETCH_CONCURRENCY,
+    ):
         self._client = client
-        self._cache: dict[int, list[Sale]] = {}
-        self._cache_timestamp: float | None = None
-        self._cache_from: datetime | None = None
-        self._cache_to: datetime | None = None
+        self._max_cached_days = max_cached_days
+        self._open_day_ttl_seconds = open_day_ttl_seconds
+        self._fetch_window_days = max(1, fetch_window_days)
+        self._fetch_semaphore: asyncio.Semaphore = asyncio.Semaphore(max(1, fetch_concurrency))
+        self._days: dict[int, _DayBucket] = {}
+        self._day_resolver: LocalDayResolver = LocalDayResolver(_PROJECT_TZ)
+        self._refresh_lock: asyncio.Lock = asyncio.Lock()
 
     async def get_sales(
             self,
             from_date: datetime,
             to_date: datetime,
             vending_machine_id: int | None = None,
-    ) -> list[Sale]:
-        if not self._is_cache_valid(from_date=from_date, to_date=to_date):
-            await self._refresh_cache(from_date=from_date, to_date=to_date)
+    ) -> SalesBatch:
+        from_date = self._to_project_tz(from_date)
+        to_date = self._to_project_tz(to_date)
+        if from_date >= to_date:
+            return SalesBatch.empty()
 
-        if vending_machine_id is None:
-            return self._flatten_cache()
+        windows: list[list[int]] = self._split_into_windows(self._get_days(from_date, to_date))
+        batches: list[SalesBatch] = await asyncio.gather(*(self._fetch_sales(window) for window in windows))
+        sales: SalesBatch = SalesBatch.concat(batches)
+        if vending_machine_id is not None:
+            sales = sales.for_vending_machine(vending_machine_id)
+        return sales.between(int(from_date.timestamp()), int(to_date.timestamp()))
 
-        return self._cache.get(vending_machine_id, []).copy()
+    async def aggregate_daily_sales(self, builder: SalesMatrixBuilder) -> None:
+        days: list[int] = list(range(builder.first_day, builder.last_day + 1))
+        async with self._refresh_lock:
+            today: int = datetime.now(_PROJECT_TZ).date().toordinal()
+            missing_days: list[int] = [day for day in days if not self._is_day_valid(day)]
+            metrics: MetricsRegistry = get_metrics()
+            metrics.increment("cache_hits", len(days) - len(missing_days), cache="sales_days")
+            metrics.increment("cache_misses", len(missing_days), cache="sales_days")
+            if missing_days:
+                try:
+                    await self._refresh_days(missing_days, today)
+                except Exception:
+                    if any(day not in self._days for day in missing_days):
+                        raise
+                    get_logger().warning("KIT API недоступен, используются последние итоги продаж", exc_info=True)
+                    metrics.increment("stale_served", cache="sales_days")
 
-    def _is_cache_valid(self, from_date: datetime, to_date: datetime) -> bool:
-        if self._cache_timestamp is None:
-            return False
-        if not self._cache:
-            return False
-        if self._cache_from != from_date or self._cache_to != to_date:
+        day: int
+        for day in days:
+            builder.add_day_totals(self._days[day].totals)
+        self._evict_days(keep=set(days))
+
+    async def refresh_days(self, first_day: int, last_day: int) -> None:
+        """Перечитывает дни из кэша, включая закрытые, которые иначе не запрашиваются повторно."""
+        async with self._refresh_lock:
+            days: list[int] = [day for day in range(first_day, last_day + 1) if day in self._days]
+            if not days:
+                return
+            today: int = datetime.now(_PROJECT_TZ).date().toordinal()
+            try:
+                await self._refresh_days(days, today)
+            except Exception:
+                get_logger().warning("KIT API недоступен, закрытые дни не перечитаны", exc_info=True)
+                get_metrics().increment("stale_served", cache="sales_days")
+
+    @staticmethod
+    def _to_project_tz(value: datetime) -> datetime:
+        if value.tzinfo is None:
+            return value.replace(tzinfo=_PROJECT_TZ)
+        return value.astimezone(_PROJECT_TZ)
+
+    @staticmethod
+    def _get_days(from_date: datetime, to_date: datetime) -> list[int]:
+        first_day: int = from_date.date().toordinal()
+        last_day: int = (to_date - timedelta(microseconds=1)).date().toordinal()
+        return list(range(first_day, last_day + 1))
+
+    @staticmethod
+    def _day_start(day: int) -> datetime:
+        return datetime.combine(date.fromordinal(day), dt_time.min).replace(tzinfo=_PROJECT_TZ)
+
+    def _is_day_valid(self, day: int) -> bool:
+        bucket: _DayBucket | None = self._days.get(day)
+        if bucket is None:
             return False
-        return (time.monotonic() - self._cache_timestamp) < _CACHE_TTL_SECONDS
+        if bucket.is_closed:
+            return True
+        return (time.monotonic() - bucket.fetched_at) < self._open_day_ttl_seconds
+
+    async def _refresh_days(self, days: list[int], today: int) -> None:
+        """Обновляет окна параллельно и дожидается каждого, прежде чем вернуть первую ошибку.
 
-    async def _refresh_cache(self, from_date: datetime, to_date: datetime) -> None:
-        sales_model: SalesCollection = await self._client.get_sales(
-            from_date=from_date,
-            to_date=to_date,
+        Иначе окна, оставшиеся после сбоя соседнего, дописывали бы кэш уже после выхода из _refresh_lock.
+        """
+        windows: list[list[int]] = self._split_into_windows(days)
+        outcomes: list[None | BaseException] = await asyncio.gather(
+            *(self._refresh_window(window, today) for window in windows),
+            return_exceptions=True,
         )
-        cache: dict[int, list[Sale]] = {}
+        outcome: None | BaseException
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+    def _split_into_windows(self, days: list[int]) -> list[list[int]]:
+        return [
+            run[start:start + self._fetch_window_days]
+            for run in self._split_into_runs(days)
+            for start in range(0, len(run), self._fetch_window_days)
+        ]
+
+    @staticmethod
+    def _split_into_runs(days: list[int]) -> list[list[int]]:
+        runs: list[list[int]] = []
+        day: int
+        for day in sorted(days):
+            if runs and runs[-1][-1] + 1 == day:
+                runs[-1].append(day)
+            else:
+                runs.append([day])
+        return runs
+
+    async def _fetch_window(self, window: list[int]) -> SalesCollection:
+        async with self._fetch_semaphore:
+            with get_metrics().span("kit_api_sales_fetch"):
+                return await self._client.get_sales(
+                    from_date=self._day_start(window[0]),
+                    to_date=self._day_start(window[-1] + 1),
+                )
+
+    async def _fetch_sales(self, window: list[int]) -> SalesBatch:
+        sales_model: SalesCollection = await self._fetch_window(window)
+        from_ts: int = int(self._day_start(window[0]).timestamp())
+        to_ts: int = int(self._day_start(window[-1] + 1).timestamp())
+        builder: SalesBatchBuilder = SalesBatchBuilder(_PROJECT_TZ)
         sale_model: SaleModel
+        with get_metrics().span("sales_transform"):
+            for sale_model in sales_model.get_all():
+                vm_id: int
+                amount: float
+                timestamp: int
+                vm_id, amount, timestamp = map_sale_model(sale_model)
+                if from_ts <= timestamp < to_ts:
+                    builder.append(vm_id, amount, timestamp)
+        get_metrics().increment("records", len(builder), source="kit_api_sales")
+        return builder.build()
+
+    async def _refresh_window(self, window: list[int], today: int) -> None:
+        sales_model: SalesCollection = await self._fetch_window(window)
+        fetched_at: float = time.monotonic()
+        builders: dict[int, DailySalesTotalsBuilder] = {day: DailySalesTotalsBuilder(day) for day in window}
+        records: int = 0
+        sale_model: SaleModel
+        metrics: MetricsRegistry = get_metrics()
+        with metrics.span("sales_transform"):
+            for sale_model in sales_model.get_all():
+                vm_id: int
+                amount: float
+                timestamp: int
+                vm_id, amount, timestamp = map_sale_model(sale_model)
+                builder: DailySalesTotalsBuilder | None = builders.get(self._day_resolver.day_ordinal(timestamp))
+                if builder is None:
+                    continue
+                builder.add(vm_id, amount, timestamp)
+                records += 1
+
+            day: int
+            for day, builder in builders.items():
+                self._days[day] = _DayBucket(totals=builder.build(), fetched_at=fetched_at, is_closed=day < today)
+        metrics.increment("records", records, source="kit_api_sales")
 
-        for sale_model in sales_model.get_all():
-            timestamp: datetime = sale_model.timestamp
-            if timestamp.tzinfo is None:
-                timestamp = timestamp.replace(tzinfo=_PROJECT_TZ)
-            sale: Sale = Sale(
-                vending_machine_id=sale_model.vending_machine_id,
-                amount=float(sale_model.price),
-                timestamp=timestamp,
-            )
-            cache.setdefault(sale.vending_machine_id, []).append(sale)
-        self._cache = cache
-        self._cache_timestamp = time.monotonic()
-        self._cache_from = from_date
-        self._cache_to = to_date
-
-    def _flatten_cache(self) -> list[Sale]:
-        sales: list[Sale] = []
-        vm_sales: list[Sale]
-        for vm_sales in self._cache.values():
-            sales.extend(vm_sales)
-        return sales
+    def _evict_days(self, keep: set[int]) -> None:
+        excess: int = len(self._days) - self._max_cached_days
+        if excess <= 0:
+            return
+        candidates: list[int] = sorted(day for day in self._days if day not in keep)
+        day: int
+        for day in candidates[:excess]:
+            del self._days[day]
@@ -0,0 +1,111 @@
+import asyncio
+import inspect
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TypeVar
+
+from aiohttp import ClientResponseError
+from kit_api import KitVendingAPIClient, SalesCollection, VendingMachinesCollection
+
+from srс.infra.app_logger import get_logger
+from srс.infra.kit_api_resilience import ResilientCaller
+
+T = TypeVar("T")
+
+_AUTH_ERROR_STATUSES: frozenset[int] = frozenset({401, 403})
+
+
+@dataclass(frozen=True, slots=True)
+class KitAPICredentials:
+    login: str
+    password: str
+    company_id: int
+
+
+def _is_auth_error(exc: BaseException) -> bool:
+    if isinstance(exc, ClientResponseError):
+        return exc.status in _AUTH_ERROR_STATUSES
+    status: object = getattr(exc, "status", None) or getattr(exc, "status_code", None)
+    return status in _AUTH_ERROR_STATUSES
+
+
+class KitAPISession:
+    """Клиент KIT API с ленивой авторизацией внутри event loop.
+
+    Вход выполняется при первом запросе, а не при старте процесса. При ответе 401/403
+    выполняет повторный вход (один на все параллельные запросы) и повторяет запрос.
+    С caller каждый запрос (вместе с повторным входом) выполняется по его политике
+    таймаутов, повторов и размыкания цепи.
+    """
+
+    def __init__(
+            self,
+            credentials: KitAPICredentials,
+            client_factory: Callable[[], KitVendingAPIClient] = KitVendingAPIClient,
+            caller: ResilientCaller | None = None,
+    ):
+        self._credentials = credentials
+        self._client_factory = client_factory
+        self._caller = caller
+        self._client: KitVendingAPIClient | None = None
+        self._generation: int = 0
+        self._login_lock: asyncio.Lock = asyncio.Lock()
+
+    async def get_sales(self, from_date: datetime, to_date: datetime) -> SalesCollection:
+        return await self._call("get_sales", lambda client: client.get_sales(from_date=from_date, to_date=to_date))
+
+    async def get_vending_machines(self) -> VendingMachinesCollection:
+        return await self._call("get_vending_machines", lambda client: client.get_vending_machines())
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _call(self, operation: str, request: Callable[[KitVendingAPIClient], Awaitable[T]]) -> T:
+        if self._caller is None:
+            return await self._call_once(request)
+        return await self._caller.call(operation, lambda: self._call_once(request))
+
+    async def _call_once(self, request: Callable[[KitVendingAPIClient], Awaitable[T]]) -> T:
+        client: KitVendingAPIClient
+        generation: int
+        client, generation = await self._ensure_logged_in()
+        try:
+            return await request(client)
+        except Exception as exc:
+            if not _is_auth_error(exc):
+                raise
+            get_logger().warning("Сессия KIT API отклонена сервером, выполняется повторный вход")
+            client, _ = await self._relogin(generation)
+            return await request(client)
+
+    async def _ensure_logged_in(self) -> tuple[KitVendingAPIClient, int]:
+        if self._client is not None:
+            return self._client, self._generation
+        async with self._login_lock:
+            if self._client is None:
+                client: KitVendingAPIClient = self._client_factory()
+                await self._login(client)
+                self._client = client
+                self._generation += 1
+            return self._client, self._generation
+
+    async def _relogin(self, failed_generation: int) -> tuple[KitVendingAPIClient, int]:
+        async with self._login_lock:
+            if self._client is None or self._generation == failed_generation:
+                client: KitVendingAPIClient = self._client or self._client_factory()
+                await self._login(client)
+                self._client = client
+                self._generation += 1
+            return self._client, self._generation
+
+    async def _login(self, client: KitVendingAPIClient) -> None:
+        logger: logging.Logger = get_logger()
+        credentials: KitAPICredentials = self._credentials
+        result: object = client.login(credentials.login, credentials.password, credentials.company_id)
+        if inspect.isawaitable(result):
+            await result
+        logger.info("Выполнен вход в KIT API: company_id=%s", credentials.company_id)
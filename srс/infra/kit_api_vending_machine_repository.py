@@ -1,15 +1,19 @@
-from kit_api import KitVendingAPIClient, VendingMachinesCollection, VendingMachineModel
+from kit_api import VendingMachinesCollection, VendingMachineModel
 
 from srс.domain.entities.vending_machine import VendingMachine
 from srс.domain.ports.vending_machine_repository import VendingMachineRepository
+from srс.infra.kit_api_session import KitAPISession
+from srс.infra.metrics import MetricsRegistry, get_metrics
 
 
 class KitAPIVendingMachineRepository(VendingMachineRepository):
-    def __init__(self, client: KitVendingAPIClient):
+    def __init__(self, client: KitAPISession):
         self._client = client
 
     async def get_all(self) -> list[VendingMachine]:
-        vms: VendingMachinesCollection = await self._client.get_vending_machines()
+        metrics: MetricsRegistry = get_metrics()
+        with metrics.span("kit_api_vending_machines_fetch"):
+            vms: VendingMachinesCollection = await self._client.get_vending_machines()
         items: list[VendingMachine] = []
         vm_model: VendingMachineModel
 
@@ -21,4 +25,5 @@ class KitAPIVendingMachineRepository(VendingMachineRepository):
                 name=vm_model.name,
             )
             items.append(item)
+        metrics.increment("records", len(items), source="kit_api_vending_machines")
         return items
@@ -0,0 +1,157 @@
+from collections.abc import Callable, Iterator
+
+from srс.domain.entities.report_document import ReportDocument, ReportEntry, ReportSection
+
+MESSAGE_LENGTH_LIMIT: int = 4096
+
+_MARKDOWN_V2_SPECIAL_CHARS: str = "\\_*[]()~`>#+-=|{}.!"
+_ESCAPE_TABLE: dict[int, str] = str.maketrans({ch: f"\\{ch}" for ch in _MARKDOWN_V2_SPECIAL_CHARS})
+
+_ENTRY_SEPARATOR: str = "\n> \n"
+_SECTION_SEPARATOR: str = "\n> \n> \n"
+_PLAIN_ENTRY_SEPARATOR: str = "\n\n"
+_PLAIN_SECTION_SEPARATOR: str = "\n\n\n"
+
+_QuoteLine = tuple[str, Callable[[str], str]]
+
+
+def escape_markdown_v2(text: str) -> str:
+    return text.translate(_ESCAPE_TABLE)
+
+
+def quote_markdown_v2(text: str) -> str:
+    """Оформляет произвольный текст как цитату MarkdownV2."""
+    return "\n".join(_quote_line(line) for line in text.split("\n"))
+
+
+def render_quote_markdown_v2_chunks(document: ReportDocument, limit: int = MESSAGE_LENGTH_LIMIT) -> list[str]:
+    """Отрисовывает отчет за один проход и делит его на сообщения по границам записей.
+
+    Заголовок раздела остается в одном сообщении с первой записью (или ее первым куском).
+    Запись длиннее limit делится по строкам, а строка, не помещающаяся в сообщение, — на куски
+    по длине после экранирования, каждый из которых оформлен отдельно.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    current_length: int = 0
+    separator: str
+    lines: list[_QuoteLine]
+    keep_lines: int
+    for separator, lines, keep_lines in _iter_quote_blocks(document):
+        block: str = "\n".join(formatter(text) for text, formatter in lines)
+        if current and current_length + len(separator) + len(block) > limit:
+            chunks.append("".join(current))
+            current = []
+            current_length = 0
+        if len(block) > limit:
+            packed: list[str] = _pack_lines(lines, keep_lines, limit)
+            chunks.extend(packed[:-1])
+            block = packed[-1]
+        elif current:
+            current.append(separator)
+            current_length += len(separator)
+        current.append(block)
+        current_length += len(block)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def render_plain_text(document: ReportDocument) -> str:
+    parts: list[str] = []
+    section: ReportSection
+    for section in document.sections:
+        entries: list[str] = [section.heading]
+        entries.extend("\n".join(entry.lines) for entry in section.entries)
+        parts.append(_PLAIN_ENTRY_SEPARATOR.join(entries))
+    return _PLAIN_SECTION_SEPARATOR.join(parts)
+
+
+def _iter_quote_blocks(document: ReportDocument) -> Iterator[tuple[str, list[_QuoteLine], int]]:
+    """Выдает блоки (разделитель, строки, сколько первых строк нельзя оставлять в конце сообщения)."""
+    section_index: int
+    section: ReportSection
+    for section_index, section in enumerate(document.sections):
+        heading_separator: str = _SECTION_SEPARATOR if section_index else ""
+        lines: list[_QuoteLine] = [(section.heading, _quote_heading)]
+        if not section.entries:
+            yield heading_separator, lines, 0
+            continue
+        lines.append(("", _quote_line))
+        lines.extend(_quote_entry_lines(section.entries[0]))
+        yield heading_separator, lines, 2
+        entry: ReportEntry
+        for entry in section.entries[1:]:
+            yield _ENTRY_SEPARATOR, _quote_entry_lines(entry), 0
+
+
+def _quote_entry_lines(entry: ReportEntry) -> list[_QuoteLine]:
+    return [(line, _quote_line) for line in entry.lines]
+
+
+def _pack_lines(lines: list[_QuoteLine], keep_lines: int, limit: int) -> list[str]:
+    """Раскладывает строки блока по сообщениям, деля на куски строки, которые не помещаются.
+
+    Строка, помещающаяся в отдельное сообщение, переносится в новое сообщение целиком,
+    кроме строк сразу после первых keep_lines: ими дополняется текущее сообщение,
+    чтобы заголовок не ушел отдельно.
+    """
+    chunks: list[str] = []
+    current: str | None = None
+    index: int
+    text: str
+    formatter: Callable[[str], str]
+    for index, (text, formatter) in enumerate(lines):
+        formatted: str = formatter(text)
+        if current is None and len(formatted) <= limit:
+            current = formatted
+            continue
+        if current is not None and len(current) + 1 + len(formatted) <= limit:
+            current = f"{current}\n{formatted}"
+            continue
+        if current is not None and index > keep_lines and len(formatted) <= limit:
+            chunks.append(current)
+            current = formatted
+            continue
+        decoration: int = len(formatter(""))
+        while True:
+            prefix_length: int = 0 if current is None else len(current) + 1
+            piece: str = _take_escaped(text, limit - prefix_length - decoration)
+            if current is not None and (prefix_length + decoration > limit or (text and not piece)):
+                chunks.append(current)
+                current = None
+                continue
+            if text and not piece:
+                piece = text[:1]
+            current = formatter(piece) if current is None else f"{current}\n{formatter(piece)}"
+            text = text[len(piece):]
+            if not text:
+                break
+            chunks.append(current)
+            current = None
+    if current is not None:
+        chunks.append(current)
+    return chunks
+
+
+def _take_escaped(text: str, capacity: int) -> str:
+    """Возвращает самое длинное начало text, которое после экранирования занимает не больше capacity.
+
+    Экранированный символ занимает два знака, поэтому кусок не разрывает пару «\\x».
+    """
+    if capacity <= 0:
+        return ""
+    piece: str = text[:capacity]
+    excess: int = len(escape_markdown_v2(piece)) - capacity
+    while excess > 0:
+        piece = piece[:len(piece) - (excess + 1) // 2]
+        excess = len(escape_markdown_v2(piece)) - capacity
+    return piece
+
+
+def _quote_heading(heading: str) -> str:
+    return f"> *{escape_markdown_v2(heading)}*"
+
+
+def _quote_line(line: str) -> str:
+    return f"> {line.translate(_ESCAPE_TABLE)}" if line else "> "
@@ -0,0 +1,119 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+_METRIC_PREFIX: str = "sales_checker"
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass(slots=True)
+class _Timing:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class MetricsRegistry:
+    """Счетчики и длительности этапов в памяти процесса; выдаются в формате Prometheus или одной строкой."""
+
+    def __init__(self):
+        self._counters: dict[tuple[str, _Labels], float] = {}
+        self._timings: dict[str, _Timing] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key: tuple[str, _Labels] = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        timing: _Timing | None = self._timings.get(stage)
+        if timing is None:
+            timing = _Timing()
+            self._timings[stage] = timing
+        timing.count += 1
+        timing.total_seconds += seconds
+        timing.max_seconds = max(timing.max_seconds, seconds)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started_at: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started_at)
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        stage_metric: str = f"{_METRIC_PREFIX}_stage_seconds"
+        lines.append(f"# TYPE {stage_metric} summary")
+        stage: str
+        timing: _Timing
+        for stage, timing in sorted(self._timings.items()):
+            label: str = self._format_labels((("stage", stage),))
+            lines.append(f"{stage_metric}_count{label} {timing.count}")
+            lines.append(f"{stage_metric}_sum{label} {timing.total_seconds:.6f}")
+        lines.append(f"# TYPE {stage_metric}_max gauge")
+        for stage, timing in sorted(self._timings.items()):
+            label = self._format_labels((("stage", stage),))
+            lines.append(f"{stage_metric}_max{label} {timing.max_seconds:.6f}")
+
+        names: list[str] = sorted({name for name, _ in self._counters})
+        name: str
+        for name in names:
+            metric: str = f"{_METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            labels: _Labels
+            value: float
+            for (counter_name, labels), value in sorted(self._counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{self._format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self) -> str:
+        parts: list[str] = [
+            f"{stage}={timing.total_seconds * 1000:.1f}ms/{timing.count}"
+            for stage, timing in sorted(self._timings.items())
+        ]
+        parts.extend(
+            f"{name}{self._format_labels(labels)}={value:g}"
+            for (name, labels), value in sorted(self._counters.items())
+        )
+        return "Метрики: " + " ".join(parts)
+
+    @staticmethod
+    def _format_labels(labels: _Labels) -> str:
+        if not labels:
+            return ""
+        formatted: str = ",".join(f'{key}="{value}"' for key, value in labels)
+        return "{" + formatted + "}"
+
+
+_metrics: MetricsRegistry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _metrics
+
+
+async def start_metrics_server(host: str, port: int) -> "web.AppRunner":
+    """aiohttp.web импортируется здесь, чтобы разовые запуски по cron его не загружали."""
+    from aiohttp import web
+
+    async def _handle_metrics(_: web.Request) -> web.Response:
+        return web.Response(
+            text=_metrics.render_prometheus(),
+            content_type="text/plain",
+        )
+
+    application: web.Application = web.Application()
+    application.router.add_get("/metrics", _handle_metrics)
+    runner: web.AppRunner = web.AppRunner(application, access_log=None)
+    await runner.setup()
+    site: web.TCPSite = web.TCPSite(runner, host=host, port=port)
+    await site.start()
+    return runner
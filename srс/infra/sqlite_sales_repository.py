@@ -0,0 +1,503 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from kit_api import SalesCollection
+from kit_api.models.sales import SaleModel
+
+from srс.domain.entities.sales_batch import SalesBatch, SalesBatchBuilder
+from srс.domain.entities.sales_matrix import SalesMatrixBuilder
+from srс.domain.ports.sales_repository import SalesRepository
+from srс.infra.app_logger import get_logger
+from srс.infra.kit_api_sale_mapper import map_sale_model
+from srс.infra.kit_api_session import KitAPISession
+from srс.infra.metrics import MetricsRegistry, get_metrics
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+_MIN_SYNC_INTERVAL_SECONDS: float = 60.0
+_BUSY_TIMEOUT_SECONDS: float = 30.0
+_FETCH_WINDOW_DAYS: int = 1
+_FETCH_CONCURRENCY: int = 4
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS sales (
+    vending_machine_id INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sales_vm_timestamp ON sales (vending_machine_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_sales_timestamp ON sales (timestamp);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS backfill_chunks (
+    from_ts INTEGER NOT NULL,
+    to_ts INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    PRIMARY KEY (from_ts, to_ts)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class BackfillResult:
+    chunks_total: int
+    chunks_skipped: int
+    chunks_loaded: int
+    chunks_failed: int
+    records: int
+
+
+def get_default_db_path() -> Path:
+    base_dir: Path = Path(__file__).resolve().parents[2]
+    data_dir: Path = base_dir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir / "sales.sqlite3"
+
+
+class SQLiteSalesRepository(SalesRepository):
+    """Локальное хранилище продаж, общее для всех процессов контейнера.
+
+    Хранит непрерывный интервал покрытия [covered_from, covered_to) и догружает из KIT API
+    только недостающую голову интервала и дельту с последней сохраненной продажи. Длинные
+    интервалы запрашиваются окнами по локальным дням, параллельно пачками по fetch_concurrency окон;
+    каждое окно записывается своей транзакцией в порядке от границы покрытия, так что покрытие
+    растет непрерывно, а память не зависит от длины интервала.
+    Если дельту получить не удалось, отдаются уже сохраненные данные.
+
+    backfill заполняет длинную историю частями с контрольными точками, не трогая интервал
+    покрытия до полного завершения, поэтому прерванную загрузку можно продолжить.
+    """
+
+    def __init__(
+            self,
+            client: KitAPISession,
+            db_path: Path,
+            min_sync_interval_seconds: float = _MIN_SYNC_INTERVAL_SECONDS,
+            fetch_window_days: int = _FETCH_WINDOW_DAYS,
+            fetch_concurrency: int = _FETCH_CONCURRENCY,
+    ):
+        self._client = client
+        self._db_path = db_path
+        self._min_sync_interval_seconds = min_sync_interval_seconds
+        self._fetch_window_days = max(1, fetch_window_days)
+        self._fetch_concurrency = max(1, fetch_concurrency)
+        self._fetch_semaphore: asyncio.Semaphore = asyncio.Semaphore(self._fetch_concurrency)
+        self._sync_lock: asyncio.Lock = asyncio.Lock()
+        self._is_initialized: bool = False
+
+    async def get_sales(
+            self,
+            from_date: datetime,
+            to_date: datetime,
+            vending_machine_id: int | None = None,
+    ) -> SalesBatch:
+        from_ts: int = self._to_epoch(from_date)
+        to_ts: int = self._to_epoch(to_date)
+        if from_ts >= to_ts:
+            return SalesBatch.empty()
+
+        async with self._sync_lock:
+            await self._sync(from_ts, to_ts)
+
+        metrics: MetricsRegistry = get_metrics()
+        with metrics.span("sqlite_read"):
+            rows: list[tuple[int, float, int]] = await asyncio.to_thread(
+                self._select_sales, from_ts, to_ts, vending_machine_id,
+            )
+        with metrics.span("sales_transform"):
+            builder: SalesBatchBuilder = SalesBatchBuilder(_PROJECT_TZ)
+            vm_id: int
+            amount: float
+            timestamp: int
+            for vm_id, amount, timestamp in rows:
+                builder.append(vm_id, amount, timestamp)
+            sales: SalesBatch = builder.build()
+        metrics.increment("records", len(rows), source="sqlite_sales")
+        return sales
+
+    async def aggregate_daily_sales(self, builder: SalesMatrixBuilder) -> None:
+        from_ts: int = self._day_start_epoch(builder.first_day)
+        to_ts: int = self._day_start_epoch(builder.last_day + 1)
+        async with self._sync_lock:
+            await self._sync(from_ts, to_ts)
+
+        with get_metrics().span("sqlite_read"):
+            rows: list[tuple[int, int, float, int, int]] = await asyncio.to_thread(
+                self._select_daily_totals, builder.first_day, builder.last_day,
+            )
+        day: int
+        vm_id: int
+        total: float
+        count: int
+        last_timestamp: int
+        for day, vm_id, total, count, last_timestamp in rows:
+            builder.add_totals(vm_id, day, total, count, last_timestamp)
+
+    async def refresh_days(self, first_day: int, last_day: int) -> None:
+        """Перезаписывает покрытую часть дней ответом KIT API; непокрытую догрузит обычная синхронизация.
+
+        Дельта синхронизации начинается с последней сохраненной продажи, поэтому без этого
+        продажа, присланная с опозданием за уже сохраненный день, не попала бы в хранилище.
+        """
+        from_ts: int = self._day_start_epoch(first_day)
+        to_ts: int = min(self._day_start_epoch(last_day + 1), int(time.time()))
+        async with self._sync_lock:
+            covered_from: int | None
+            covered_to: int | None
+            covered_from, covered_to, _ = await asyncio.to_thread(self._read_sync_state)
+            if covered_from is None or covered_to is None:
+                return
+            refresh_from: int = max(from_ts, covered_from)
+            refresh_to: int = min(to_ts, covered_to)
+            if refresh_from >= refresh_to:
+                return
+            try:
+                await self._fetch_and_store(refresh_from, refresh_to)
+            except Exception:
+                get_logger().warning("KIT API недоступен, закрытые дни не перечитаны", exc_info=True)
+                get_metrics().increment("stale_served", cache="sqlite_refresh")
+
+    async def backfill(self, first_day: date, last_day: date, chunk_days: int) -> BackfillResult:
+        """Загружает продажи за локальные дни [first_day, last_day] частями по chunk_days дней.
+
+        Границы частей зависят только от запрошенных дней, поэтому отметки о завершении совпадают
+        между запусками. Части запрашиваются параллельно (не больше fetch_concurrency запросов
+        одновременно), и каждая записывается своей транзакцией вместе с отметкой. Из части
+        запрашивается только то, что уже наступило и чего нет в покрытии хранилища; часть,
+        заходящая в будущее, не отмечается и загружается заново при каждом запуске.
+        Когда загружены все части, промежуток до уже имеющегося покрытия догружается окнами,
+        и покрытие расширяется до запрошенного интервала.
+        """
+        logger: logging.Logger = get_logger()
+        from_ts: int = self._day_start_epoch(first_day.toordinal())
+        to_ts: int = self._day_start_epoch(last_day.toordinal() + 1)
+        now_ts: int = int(time.time())
+        covered_from: int | None
+        covered_to: int | None
+        covered_from, covered_to, _ = await asyncio.to_thread(self._read_sync_state)
+
+        chunks: list[tuple[int, int]] = self._split_into_windows(from_ts, to_ts, chunk_days)
+        completed: set[tuple[int, int]] = await asyncio.to_thread(self._read_backfill_chunks)
+        pending: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        chunk: tuple[int, int]
+        for chunk in chunks:
+            if chunk in completed:
+                continue
+            parts: list[tuple[int, int]] = self._uncovered_parts(
+                chunk[0], min(chunk[1], now_ts), covered_from, covered_to,
+            )
+            if parts:
+                pending[chunk] = parts
+        logger.info(
+            "Загрузка истории: частей=%s, уже загружено=%s, осталось=%s",
+            len(chunks),
+            len(chunks) - len(pending),
+            len(pending),
+        )
+        outcomes: list[int | BaseException] = await asyncio.gather(
+            *(self._backfill_chunk(chunk, parts, is_final=chunk[1] <= now_ts) for chunk, parts in pending.items()),
+            return_exceptions=True,
+        )
+        failed: int = 0
+        records: int = 0
+        outcome: int | BaseException
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                failed += 1
+                logger.error("Не удалось загрузить часть истории", exc_info=outcome)
+            else:
+                records += outcome
+        loaded_to: int = min(to_ts, now_ts)
+        if not failed and from_ts < loaded_to:
+            if covered_from is not None and covered_to is not None:
+                if loaded_to < covered_from:
+                    logger.info("Догружается промежуток до начала покрытия хранилища")
+                    await self._fetch_and_store(loaded_to, covered_from, newest_first=True)
+                if from_ts > covered_to:
+                    logger.info("Догружается промежуток от конца покрытия хранилища")
+                    await self._fetch_and_store(covered_to, from_ts)
+            await asyncio.to_thread(self._complete_backfill, from_ts, loaded_to, to_ts)
+        return BackfillResult(
+            chunks_total=len(chunks),
+            chunks_skipped=len(chunks) - len(pending),
+            chunks_loaded=len(pending) - failed,
+            chunks_failed=failed,
+            records=records,
+        )
+
+    async def _backfill_chunk(self, chunk: tuple[int, int], parts: list[tuple[int, int]], is_final: bool) -> int:
+        windows: list[tuple[int, int]] = [
+            window
+            for part_from, part_to in parts
+            for window in self._split_into_windows(part_from, part_to, self._fetch_window_days)
+        ]
+        window_rows: list[list[tuple[int, float, int]]] = await asyncio.gather(
+            *(self._fetch_window(window_from, window_to) for window_from, window_to in windows),
+        )
+        rows: list[tuple[int, float, int]] = [row for part in window_rows for row in part]
+        metrics: MetricsRegistry = get_metrics()
+        with metrics.span("sqlite_write"):
+            await asyncio.to_thread(self._store_backfill_chunk, chunk if is_final else None, parts, rows)
+        metrics.increment("records", len(rows), source="backfill")
+        get_logger().info(
+            "Загружена часть истории: %s — %s, продаж=%s",
+            datetime.fromtimestamp(chunk[0], _PROJECT_TZ).date(),
+            datetime.fromtimestamp(chunk[1] - 1, _PROJECT_TZ).date(),
+            len(rows),
+        )
+        return len(rows)
+
+    @staticmethod
+    def _uncovered_parts(
+            from_ts: int,
+            to_ts: int,
+            covered_from: int | None,
+            covered_to: int | None,
+    ) -> list[tuple[int, int]]:
+        """Части [from_ts, to_ts) вне покрытия [covered_from, covered_to)."""
+        if from_ts >= to_ts:
+            return []
+        if covered_from is None or covered_to is None or to_ts <= covered_from or from_ts >= covered_to:
+            return [(from_ts, to_ts)]
+        parts: list[tuple[int, int]] = []
+        if from_ts < covered_from:
+            parts.append((from_ts, covered_from))
+        if covered_to < to_ts:
+            parts.append((covered_to, to_ts))
+        return parts
+
+    @staticmethod
+    def _day_start_epoch(day: int) -> int:
+        return int(datetime.combine(date.fromordinal(day), dt_time.min).replace(tzinfo=_PROJECT_TZ).timestamp())
+
+    @staticmethod
+    def _to_epoch(value: datetime) -> int:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=_PROJECT_TZ)
+        return int(value.timestamp())
+
+    def _connect(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection = sqlite3.connect(self._db_path, timeout=_BUSY_TIMEOUT_SECONDS)
+        if not self._is_initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._is_initialized = True
+        return connection
+
+    async def _sync(self, from_ts: int, to_ts: int) -> None:
+        now_ts: int = int(time.time())
+        fetch_to: int = min(to_ts, now_ts)
+        covered_from: int | None
+        covered_to: int | None
+        last_sale_ts: int | None
+        covered_from, covered_to, last_sale_ts = await asyncio.to_thread(self._read_sync_state)
+
+        if covered_from is None or covered_to is None:
+            if from_ts < fetch_to:
+                await self._fetch_and_store(from_ts, fetch_to)
+            return
+
+        if from_ts < covered_from:
+            await self._fetch_and_store(from_ts, covered_from, newest_first=True)
+
+        if fetch_to - covered_to < self._min_sync_interval_seconds:
+            get_metrics().increment("cache_hits", cache="sqlite_sync")
+            return
+        get_metrics().increment("cache_misses", cache="sqlite_sync")
+        delta_from: int = covered_to if last_sale_ts is None else min(covered_to, last_sale_ts)
+        try:
+            await self._fetch_and_store(delta_from, fetch_to)
+        except Exception:
+            get_logger().warning("KIT API недоступен, используются сохраненные продажи", exc_info=True)
+            get_metrics().increment("stale_served", cache="sqlite_sync")
+
+    def _read_sync_state(self) -> tuple[int | None, int | None, int | None]:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            state: dict[str, int] = dict(connection.execute("SELECT name, value FROM sync_state").fetchall())
+            last_sale_ts: int | None = connection.execute("SELECT MAX(timestamp) FROM sales").fetchone()[0]
+        finally:
+            connection.close()
+        return state.get("covered_from"), state.get("covered_to"), last_sale_ts
+
+    async def _fetch_and_store(self, from_ts: int, to_ts: int, newest_first: bool = False) -> None:
+        """Догружает [from_ts, to_ts), примыкающий к покрытию справа (или слева при newest_first).
+
+        Окна идут от границы покрытия, поэтому после каждой транзакции покрытие остается
+        непрерывным, а при сбое уже записанные окна не запрашиваются повторно.
+        """
+        windows: list[tuple[int, int]] = self._split_into_windows(from_ts, to_ts, self._fetch_window_days)
+        if newest_first:
+            windows.reverse()
+        metrics: MetricsRegistry = get_metrics()
+        start: int
+        for start in range(0, len(windows), self._fetch_concurrency):
+            batch: list[tuple[int, int]] = windows[start:start + self._fetch_concurrency]
+            window_rows: list[list[tuple[int, float, int]]] = await asyncio.gather(
+                *(self._fetch_window(window_from, window_to) for window_from, window_to in batch),
+            )
+            window_from: int
+            window_to: int
+            rows: list[tuple[int, float, int]]
+            for (window_from, window_to), rows in zip(batch, window_rows):
+                metrics.increment("records", len(rows), source="kit_api_sales")
+                with metrics.span("sqlite_write"):
+                    await asyncio.to_thread(self._replace_range, window_from, window_to, rows)
+
+    @staticmethod
+    def _split_into_windows(from_ts: int, to_ts: int, window_days: int) -> list[tuple[int, int]]:
+        windows: list[tuple[int, int]] = []
+        window_from: int = from_ts
+        while window_from < to_ts:
+            day_start: datetime = datetime.combine(
+                datetime.fromtimestamp(window_from, _PROJECT_TZ).date() + timedelta(days=max(1, window_days)),
+                dt_time.min,
+            ).replace(tzinfo=_PROJECT_TZ)
+            window_to: int = min(to_ts, int(day_start.timestamp()))
+            windows.append((window_from, window_to))
+            window_from = window_to
+        return windows
+
+    async def _fetch_window(self, from_ts: int, to_ts: int) -> list[tuple[int, float, int]]:
+        async with self._fetch_semaphore:
+            with get_metrics().span("kit_api_sales_fetch"):
+                sales_model: SalesCollection = await self._client.get_sales(
+                    from_date=datetime.fromtimestamp(from_ts, _PROJECT_TZ),
+                    to_date=datetime.fromtimestamp(to_ts, _PROJECT_TZ),
+                )
+        rows: list[tuple[int, float, int]] = []
+        sale_model: SaleModel
+        for sale_model in sales_model.get_all():
+            row: tuple[int, float, int] = map_sale_model(sale_model)
+            if from_ts <= row[2] < to_ts:
+                rows.append(row)
+        return rows
+
+    def _replace_range(self, from_ts: int, to_ts: int, rows: list[tuple[int, float, int]]) -> None:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM sales WHERE timestamp >= ? AND timestamp < ?", (from_ts, to_ts))
+            connection.executemany(
+                "INSERT INTO sales (vending_machine_id, amount, timestamp) VALUES (?, ?, ?)",
+                rows,
+            )
+            connection.execute(
+                "INSERT INTO sync_state (name, value) VALUES ('covered_from', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = MIN(value, excluded.value)",
+                (from_ts,),
+            )
+            connection.execute(
+                "INSERT INTO sync_state (name, value) VALUES ('covered_to', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)",
+                (to_ts,),
+            )
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _read_backfill_chunks(self) -> set[tuple[int, int]]:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            return set(connection.execute("SELECT from_ts, to_ts FROM backfill_chunks").fetchall())
+        finally:
+            connection.close()
+
+    def _store_backfill_chunk(
+            self,
+            chunk: tuple[int, int] | None,
+            parts: list[tuple[int, int]],
+            rows: list[tuple[int, float, int]],
+    ) -> None:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany("DELETE FROM sales WHERE timestamp >= ? AND timestamp < ?", parts)
+            connection.executemany(
+                "INSERT INTO sales (vending_machine_id, amount, timestamp) VALUES (?, ?, ?)",
+                rows,
+            )
+            if chunk is not None:
+                connection.execute(
+                    "INSERT OR REPLACE INTO backfill_chunks (from_ts, to_ts, records) VALUES (?, ?, ?)",
+                    (chunk[0], chunk[1], len(rows)),
+                )
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _complete_backfill(self, from_ts: int, loaded_to: int, to_ts: int) -> None:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT INTO sync_state (name, value) VALUES ('covered_from', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = MIN(value, excluded.value)",
+                (from_ts,),
+            )
+            connection.execute(
+                "INSERT INTO sync_state (name, value) VALUES ('covered_to', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)",
+                (loaded_to,),
+            )
+            connection.execute("DELETE FROM backfill_chunks WHERE from_ts >= ? AND to_ts <= ?", (from_ts, to_ts))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _select_daily_totals(self, first_day: int, last_day: int) -> list[tuple[int, int, float, int, int]]:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            rows: list[tuple[int, int, float, int, int]] = []
+            day: int
+            for day in range(first_day, last_day + 1):
+                cursor: sqlite3.Cursor = connection.execute(
+                    "SELECT vending_machine_id, SUM(amount), COUNT(*), MAX(timestamp) FROM sales "
+                    "WHERE timestamp >= ? AND timestamp < ? GROUP BY vending_machine_id",
+                    (self._day_start_epoch(day), self._day_start_epoch(day + 1)),
+                )
+                rows.extend((day, vm_id, total, count, last_timestamp) for vm_id, total, count, last_timestamp in cursor)
+            return rows
+        finally:
+            connection.close()
+
+    def _select_sales(
+            self,
+            from_ts: int,
+            to_ts: int,
+            vending_machine_id: int | None,
+    ) -> list[tuple[int, float, int]]:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            if vending_machine_id is None:
+                cursor: sqlite3.Cursor = connection.execute(
+                    "SELECT vending_machine_id, amount, timestamp FROM sales "
+                    "WHERE timestamp >= ? AND timestamp < ? ORDER BY vending_machine_id, timestamp",
+                    (from_ts, to_ts),
+                )
+            else:
+                cursor = connection.execute(
+                    "SELECT vending_machine_id, amount, timestamp FROM sales "
+                    "WHERE vending_machine_id = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+                    (vending_machine_id, from_ts, to_ts),
+                )
+            return cursor.fetchall()
+        finally:
+            connection.close()
@@ -0,0 +1,277 @@
+import asyncio
+import json
+import sqlite3
+from collections.abc import Iterable
+from pathlib import Path
+
+from srс.domain.entities.machine_sales_stats import MachineSalesStats
+from srс.domain.ports.sales_stats_repository import SalesStatsRepository
+
+_BUSY_TIMEOUT_SECONDS: float = 30.0
+_EWMA_ALPHA: float = 0.1
+_WEEKDAY_EWMA_ALPHA: float = 0.3
+_RECLOSE_DAYS: int = 1
+_STATS_TABLE: str = "machine_stats"
+_SETTLED_STATS_TABLE: str = "machine_settled_stats"
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS machine_daily_totals (
+    vending_machine_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (vending_machine_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_machine_daily_totals_day ON machine_daily_totals (day);
+CREATE TABLE IF NOT EXISTS machine_stats (
+    vending_machine_id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS machine_settled_stats (
+    vending_machine_id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteSalesStatsRepository(SalesStatsRepository):
+    """Хранит скользящую статистику аппаратов и дневную выручку за history_days дней.
+
+    История нужна только для того, чтобы вычесть из скользящих сумм выпадающий день;
+    поэтому закрытие дня обходится в O(число окон) на аппарат независимо от длины окон.
+
+    KIT API может прислать продажу за уже закрытый день с опозданием, поэтому последние
+    reclose_days закрытых дней остаются открытыми для пересчета: отдельно хранится статистика,
+    «осевшая» на reclose_days дней раньше последнего закрытого дня, а актуальная получается
+    из нее повтором этих дней по сохраненной выручке. Поздние продажи за более старые дни не учитываются.
+    """
+
+    def __init__(
+            self,
+            db_path: Path,
+            windows: tuple[int, ...],
+            ewma_alpha: float = _EWMA_ALPHA,
+            weekday_alpha: float = _WEEKDAY_EWMA_ALPHA,
+            reclose_days: int = _RECLOSE_DAYS,
+    ):
+        self._db_path = db_path
+        self._windows = tuple(sorted(set(windows)))
+        self._history_days: int = self._windows[-1]
+        self._ewma_alpha = ewma_alpha
+        self._weekday_alpha = weekday_alpha
+        self._reclose_days = max(0, reclose_days)
+        self._is_initialized: bool = False
+
+    async def get_last_closed_day(self) -> int | None:
+        return await asyncio.to_thread(self._read_last_closed_day)
+
+    async def get_settled_day(self) -> int | None:
+        return await asyncio.to_thread(self._read_settled_day)
+
+    async def apply_closed_days(
+            self,
+            closed_days: list[tuple[int, dict[int, float]]],
+            reset: bool = False,
+    ) -> None:
+        await asyncio.to_thread(self._apply_closed_days, closed_days, reset)
+
+    async def get_stats(self, vending_machine_ids: Iterable[int]) -> dict[int, MachineSalesStats]:
+        wanted: set[int] = set(vending_machine_ids)
+        stats: dict[int, MachineSalesStats] = await asyncio.to_thread(self._read_stats)
+        return {vm_id: item for vm_id, item in stats.items() if vm_id in wanted}
+
+    def _connect(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection = sqlite3.connect(self._db_path, timeout=_BUSY_TIMEOUT_SECONDS)
+        if not self._is_initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._is_initialized = True
+        return connection
+
+    def _read_last_closed_day(self) -> int | None:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            return self._read_state(connection, "last_closed_day")
+        finally:
+            connection.close()
+
+    def _read_settled_day(self) -> int | None:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            settled_day: int | None = self._read_state(connection, "settled_day")
+            return settled_day if settled_day is not None else self._read_state(connection, "last_closed_day")
+        finally:
+            connection.close()
+
+    def _read_stats(self) -> dict[int, MachineSalesStats]:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            return self._load_stats(connection)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _read_state(connection: sqlite3.Connection, name: str) -> int | None:
+        row: tuple[int] | None = connection.execute("SELECT value FROM stats_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _load_stats(self, connection: sqlite3.Connection, table: str = _STATS_TABLE) -> dict[int, MachineSalesStats]:
+        stats: dict[int, MachineSalesStats] = {}
+        vm_id: int
+        payload: str
+        for vm_id, payload in connection.execute(f"SELECT vending_machine_id, payload FROM {table}"):
+            item: MachineSalesStats = self._decode(vm_id, json.loads(payload))
+            if set(item.rolling_sums) != set(self._windows):
+                item = self._with_recomputed_windows(connection, item)
+            stats[vm_id] = item
+        return stats
+
+    def _with_recomputed_windows(self, connection: sqlite3.Connection, item: MachineSalesStats) -> MachineSalesStats:
+        rolling_sums: dict[int, float] = {}
+        window: int
+        for window in self._windows:
+            total: float | None = connection.execute(
+                "SELECT SUM(total) FROM machine_daily_totals WHERE vending_machine_id = ? AND day > ? AND day <= ?",
+                (item.vending_machine_id, item.last_day - window, item.last_day),
+            ).fetchone()[0]
+            rolling_sums[window] = total or 0.0
+        return MachineSalesStats(
+            vending_machine_id=item.vending_machine_id,
+            last_day=item.last_day,
+            last_day_total=item.last_day_total,
+            rolling_sums=rolling_sums,
+            ewma=item.ewma,
+            weekday_ewma=item.weekday_ewma,
+            days_observed=item.days_observed,
+        )
+
+    def _apply_closed_days(self, closed_days: list[tuple[int, dict[int, float]]], reset: bool) -> None:
+        connection: sqlite3.Connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            if reset:
+                connection.execute("DELETE FROM machine_daily_totals")
+                connection.execute(f"DELETE FROM {_STATS_TABLE}")
+                connection.execute(f"DELETE FROM {_SETTLED_STATS_TABLE}")
+                connection.execute("DELETE FROM stats_state")
+            last_closed_day: int | None = self._read_state(connection, "last_closed_day")
+            settled_day: int | None = self._read_state(connection, "settled_day")
+            settled_table: str = _SETTLED_STATS_TABLE
+            if settled_day is None and last_closed_day is not None:
+                settled_day = last_closed_day
+                settled_table = _STATS_TABLE
+
+            changed: bool = False
+            day: int
+            totals: dict[int, float]
+            for day, totals in closed_days:
+                if settled_day is not None and day <= settled_day:
+                    continue
+                stored: dict[int, float] = dict(connection.execute(
+                    "SELECT vending_machine_id, total FROM machine_daily_totals WHERE day = ?",
+                    (day,),
+                ).fetchall())
+                if last_closed_day is not None and day <= last_closed_day and stored == {
+                    vm_id: total for vm_id, total in totals.items() if total
+                }:
+                    continue
+                changed = True
+                connection.execute("DELETE FROM machine_daily_totals WHERE day = ?", (day,))
+                connection.executemany(
+                    "INSERT INTO machine_daily_totals (vending_machine_id, day, total) VALUES (?, ?, ?)",
+                    [(vm_id, day, total) for vm_id, total in totals.items() if total],
+                )
+                if settled_day is None:
+                    settled_day = day - 1
+                last_closed_day = day if last_closed_day is None else max(last_closed_day, day)
+
+            if changed and last_closed_day is not None and settled_day is not None:
+                new_settled_day: int = max(settled_day, last_closed_day - self._reclose_days)
+                settled: dict[int, MachineSalesStats] = self._replay(
+                    connection, self._load_stats(connection, settled_table), settled_day + 1, new_settled_day,
+                )
+                stats: dict[int, MachineSalesStats] = self._replay(
+                    connection, dict(settled), new_settled_day + 1, last_closed_day,
+                )
+                connection.execute(
+                    "DELETE FROM machine_daily_totals WHERE day <= ?",
+                    (new_settled_day - self._history_days,),
+                )
+                self._save_stats(connection, _SETTLED_STATS_TABLE, settled)
+                self._save_stats(connection, _STATS_TABLE, stats)
+                connection.executemany(
+                    "INSERT OR REPLACE INTO stats_state (name, value) VALUES (?, ?)",
+                    [("settled_day", new_settled_day), ("last_closed_day", last_closed_day)],
+                )
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _replay(
+            self,
+            connection: sqlite3.Connection,
+            stats: dict[int, MachineSalesStats],
+            first_day: int,
+            last_day: int,
+    ) -> dict[int, MachineSalesStats]:
+        """Последовательно закрывает дни [first_day, last_day] по сохраненной дневной выручке."""
+        day: int
+        for day in range(first_day, last_day + 1):
+            totals: dict[int, float] = dict(connection.execute(
+                "SELECT vending_machine_id, total FROM machine_daily_totals WHERE day = ?",
+                (day,),
+            ).fetchall())
+            dropped: dict[int, dict[int, float]] = {
+                window: dict(connection.execute(
+                    "SELECT vending_machine_id, total FROM machine_daily_totals WHERE day = ?",
+                    (day - window,),
+                ).fetchall())
+                for window in self._windows
+            }
+            vm_id: int
+            for vm_id in stats.keys() | totals.keys():
+                current: MachineSalesStats = stats.get(vm_id) or MachineSalesStats.empty(vm_id, self._windows)
+                stats[vm_id] = current.with_closed_day(
+                    day=day,
+                    total=totals.get(vm_id, 0.0),
+                    dropped_totals={window: dropped[window].get(vm_id, 0.0) for window in self._windows},
+                    ewma_alpha=self._ewma_alpha,
+                    weekday_alpha=self._weekday_alpha,
+                )
+        return stats
+
+    def _save_stats(self, connection: sqlite3.Connection, table: str, stats: dict[int, MachineSalesStats]) -> None:
+        connection.execute(f"DELETE FROM {table}")
+        connection.executemany(
+            f"INSERT INTO {table} (vending_machine_id, payload) VALUES (?, ?)",
+            [(vm_id, json.dumps(self._encode(item))) for vm_id, item in stats.items()],
+        )
+
+    @staticmethod
+    def _encode(item: MachineSalesStats) -> dict[str, object]:
+        return {
+            "last_day": item.last_day,
+            "last_day_total": item.last_day_total,
+            "rolling_sums": {str(window): total for window, total in item.rolling_sums.items()},
+            "ewma": item.ewma,
+            "weekday_ewma": list(item.weekday_ewma),
+            "days_observed": item.days_observed,
+        }
+
+    @staticmethod
+    def _decode(vm_id: int, payload: dict) -> MachineSalesStats:
+        return MachineSalesStats(
+            vending_machine_id=vm_id,
+            last_day=payload["last_day"],
+            last_day_total=payload["last_day_total"],
+            rolling_sums={int(window): total for window, total in payload["rolling_sums"].items()},
+            ewma=payload["ewma"],
+            weekday_ewma=tuple(payload["weekday_ewma"]),
+            days_observed=payload["days_observed"],
+        )
@@ -0,0 +1,139 @@
+import importlib.abc
+import importlib.machinery
+import sys
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from types import ModuleType
+
+_TOP_MODULES: int = 15
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Обертка загрузчика, замеряющая выполнение модуля (вместе с вложенными импортами)."""
+
+    def __init__(self, loader: importlib.abc.Loader, name: str, profile: "StartupProfile"):
+        self._loader = loader
+        self._name = name
+        self._profile = profile
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> ModuleType | None:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        self._profile.enter_import()
+        started_at: float = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profile.exit_import(self._name, time.perf_counter() - started_at)
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self._loader, name)
+
+
+class StartupProfile(importlib.abc.MetaPathFinder):
+    """Разбивка времени запуска: этапы инициализации и собственное время импорта каждого модуля.
+
+    Собственное время модуля — время его выполнения за вычетом вложенных импортов, как в
+    python -X importtime. Замер ведется, только пока профиль установлен в sys.meta_path.
+    """
+
+    def __init__(self):
+        self._started_at: float = time.perf_counter()
+        self._phases: list[tuple[str, float]] = []
+        self._imports: list[tuple[str, float]] = []
+        self._children_time: list[float] = []
+        self._is_finding: bool = False
+
+    def install(self) -> None:
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started_at: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases.append((name, time.perf_counter() - started_at))
+
+    def find_spec(
+            self,
+            fullname: str,
+            path: Sequence[str] | None,
+            target: ModuleType | None = None,
+    ) -> importlib.machinery.ModuleSpec | None:
+        if self._is_finding:
+            return None
+        self._is_finding = True
+        try:
+            finder: object
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec: importlib.machinery.ModuleSpec | None = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._is_finding = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, fullname, self)
+        return spec
+
+    def enter_import(self) -> None:
+        self._children_time.append(0.0)
+
+    def exit_import(self, name: str, elapsed: float) -> None:
+        children: float = self._children_time.pop()
+        self._imports.append((name, elapsed - children))
+        if self._children_time:
+            self._children_time[-1] += elapsed
+
+    def render(self) -> str:
+        total: float = time.perf_counter() - self._started_at
+        lines: list[str] = [f"Профиль запуска: всего {total * 1000:.1f} мс"]
+        lines.append("Этапы:")
+        name: str
+        seconds: float
+        for name, seconds in self._phases:
+            lines.append(f"  {name}: {seconds * 1000:.1f} мс")
+
+        packages: dict[str, float] = {}
+        for name, seconds in self._imports:
+            package: str = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + seconds
+        lines.append(f"Импорт по пакетам ({len(self._imports)} модулей):")
+        for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {name}: {seconds * 1000:.1f} мс")
+        lines.append(f"Самые долгие модули (собственное время), топ-{_TOP_MODULES}:")
+        for name, seconds in sorted(self._imports, key=lambda item: item[1], reverse=True)[:_TOP_MODULES]:
+            lines.append(f"  {name}: {seconds * 1000:.1f} мс")
+        return "\n".join(lines)
+
+
+_startup_profile: StartupProfile | None = None
+
+
+def enable_startup_profile() -> StartupProfile:
+    global _startup_profile
+    if _startup_profile is None:
+        _startup_profile = StartupProfile()
+        _startup_profile.install()
+    return _startup_profile
+
+
+def get_startup_profile() -> StartupProfile | None:
+    return _startup_profile
+
+
+def startup_phase(name: str) -> AbstractContextManager[None]:
+    """Этап запуска для профиля; без --profile-startup ничего не замеряет."""
+    if _startup_profile is None:
+        return nullcontext()
+    return _startup_profile.phase(name)
@@ -1,102 +1,77 @@
 import os
+from types import TracebackType
 from typing import Optional
 
 from aiogram import Bot
-from dotenv import load_dotenv
+
+from srс.domain.entities.report_document import ReportDocument
+from srс.infra.markdown_v2_renderer import render_quote_markdown_v2_chunks
+from srс.infra.metrics import MetricsRegistry, get_metrics
+from srс.infra.telegram_rate_limiter import TelegramRateLimiter, get_shared_rate_limiter
 
 
 class TelegramClient:
-    def __init__(self, token: str, chat_id: str):
+    """Отправляет сообщения через один долгоживущий Bot (и его HTTP-сессию).
+
+    Переданный снаружи bot не закрывается в close(): им управляет владелец.
+    """
+
+    def __init__(
+            self,
+            token: str,
+            chat_id: str,
+            bot: Bot | None = None,
+            rate_limiter: TelegramRateLimiter | None = None,
+    ):
         self._token: str = token
         self._chat_id: str = chat_id
+        self._bot: Bot | None = bot
+        self._owns_bot: bool = bot is None
+        self._rate_limiter: TelegramRateLimiter = rate_limiter or get_shared_rate_limiter()
 
     @classmethod
-    def from_env(cls) -> "TelegramClient":
-        load_dotenv()
+    def from_env(cls, bot: Bot | None = None) -> "TelegramClient":
         token: Optional[str] = os.getenv("TELEGRAM_BOT_TOKEN")
         chat_id: Optional[str] = os.getenv("TELEGRAM_CHAT_ID")
         if not token or not chat_id:
             raise ValueError("Не заданы TELEGRAM_BOT_TOKEN или TELEGRAM_CHAT_ID")
-        return cls(token=token, chat_id=chat_id)
+        return cls(token=token, chat_id=chat_id, bot=bot)
 
-    async def send_message(self, text: str, as_quote: bool = False):
-        payload_text: str
-        parse_mode: str = "MarkdownV2"
-        if as_quote:
-            payload_text = self.format_quote_markdown_v2(text)
-        else:
-            payload_text = self._escape_markdown_v2(text)
-        async with Bot(token=self._token) as bot:
-            await bot.send_message(chat_id=self._chat_id, text=payload_text, parse_mode=parse_mode)
+    async def __aenter__(self) -> "TelegramClient":
+        return self
 
-    @staticmethod
-    def _escape_markdown_v2(text: str) -> str:
-        to_escape: tuple[str, ...] = (
-            "_",
-            "[",
-            "]",
-            "(",
-            ")",
-            "~",
-            "`",
-            ">",
-            "#",
-            "+",
-            "-",
-            "=",
-            "|",
-            "{",
-            "}",
-            ".",
-            "!",
-        )
-        result: str = text
-        for ch in to_escape:
-            result = result.replace(ch, f"\\{ch}")
-        return result
+    async def __aexit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc: BaseException | None,
+            traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
 
-    @staticmethod
-    def format_quote_markdown_v2(text: str) -> str:
-        bold_prefix: str = "[[B]]"
-        bold_suffix: str = "[[/B]]"
-        lines: list[str] = text.split("\n")
-        quoted_lines: list[str] = []
-        line: str
-        for line in lines:
-            if line.startswith(bold_prefix) and line.endswith(bold_suffix):
-                content: str = line[len(bold_prefix): -len(bold_suffix)]
-                escaped_content: str = TelegramClient._escape_markdown_v2_for_quote(content)
-                quoted_line: str = f"> *{escaped_content}*"
-            else:
-                escaped_line: str = TelegramClient._escape_markdown_v2_for_quote(line)
-                quoted_line = f"> {escaped_line}" if escaped_line else "> "
-            quoted_lines.append(quoted_line)
-        return "\n".join(quoted_lines)
+    async def close(self) -> None:
+        if self._bot is not None and self._owns_bot:
+            await self._bot.session.close()
+            self._bot = None
 
-    @staticmethod
-    def _escape_markdown_v2_for_quote(text: str) -> str:
-        to_escape: tuple[str, ...] = (
-            "\\",
-            "_",
-            "*",
-            "[",
-            "]",
-            "(",
-            ")",
-            ">",
-            "#",
-            "+",
-            "-",
-            "=",
-            "|",
-            "{",
-            "}",
-            ".",
-            "!",
-            "~",
-            "`",
-        )
-        result: str = text
-        for ch in to_escape:
-            result = result.replace(ch, f"\\{ch}")
-        return result
+    async def send_report(self, document: ReportDocument, chat_id: str | None = None):
+        with get_metrics().span("render"):
+            payload_texts: list[str] = render_quote_markdown_v2_chunks(document)
+        await self._send_payloads(payload_texts, chat_id or self._chat_id)
+
+    def _get_bot(self) -> Bot:
+        if self._bot is None:
+            self._bot = Bot(token=self._token)
+        return self._bot
+
+    async def _send_payloads(self, payload_texts: list[str], chat_id: str) -> None:
+        bot: Bot = self._get_bot()
+        parse_mode: str = "MarkdownV2"
+        metrics: MetricsRegistry = get_metrics()
+        payload_text: str
+        for payload_text in payload_texts:
+            with metrics.span("telegram_send"):
+                await self._rate_limiter.send(
+                    chat_id,
+                    lambda text=payload_text: bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode),
+                )
+            metrics.increment("messages_sent", channel="telegram")
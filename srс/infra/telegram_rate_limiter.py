@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+
+T = TypeVar("T")
+
+_GLOBAL_MESSAGES_PER_SECOND: float = 30.0
+_CHAT_MESSAGES_PER_SECOND: float = 1.0
+_CHAT_BURST: float = 3.0
+_MAX_RETRIES: int = 3
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens: float = capacity
+        self._updated_at: float = time.monotonic()
+        self._blocked_until: float = 0.0
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now: float = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self._rate)
+
+    def block_for(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+
+class TelegramRateLimiter:
+    """Ограничивает отправку лимитами Telegram (общим и на чат) и повторяет запрос после retry_after."""
+
+    def __init__(
+            self,
+            global_rate: float = _GLOBAL_MESSAGES_PER_SECOND,
+            chat_rate: float = _CHAT_MESSAGES_PER_SECOND,
+            chat_burst: float = _CHAT_BURST,
+            max_retries: int = _MAX_RETRIES,
+    ):
+        self._global_bucket: TokenBucket = TokenBucket(rate=global_rate, capacity=global_rate)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._max_retries = max_retries
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+
+    async def send(self, chat_id: int | str, send: Callable[[], Awaitable[T]]) -> T:
+        chat_bucket: TokenBucket = self._get_chat_bucket(chat_id)
+        attempt: int = 0
+        while True:
+            await chat_bucket.acquire()
+            await self._global_bucket.acquire()
+            try:
+                return await send()
+            except TelegramRetryAfter as exc:
+                attempt += 1
+                if attempt > self._max_retries:
+                    raise
+                chat_bucket.block_for(exc.retry_after)
+                self._global_bucket.block_for(exc.retry_after)
+
+    def _get_chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket: TokenBucket | None = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(rate=self._chat_rate, capacity=self._chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+
+_shared_rate_limiter: TelegramRateLimiter | None = None
+
+
+def get_shared_rate_limiter() -> TelegramRateLimiter:
+    global _shared_rate_limiter
+    if _shared_rate_limiter is None:
+        _shared_rate_limiter = TelegramRateLimiter()
+    return _shared_rate_limiter
@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from srс.controllers.sales_report_controller import SalesReportController
+from srс.domain.entities.report_document import ReportDocument
+from srс.infra.app_logger import get_logger
+from srс.infra.cron_schedule import CronSchedule
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+_CRON_FIELDS_COUNT: int = 5
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduledReport:
+    schedule: CronSchedule
+    args: argparse.Namespace
+    definition: str
+
+
+def parse_schedule_definitions(text: str, parser: argparse.ArgumentParser) -> list[ScheduledReport]:
+    """Разбирает задания вида "0 3 * * *; 0 10 * * * --no-sales-today" (разделитель — ";" или перевод строки)."""
+    jobs: list[ScheduledReport] = []
+    definition: str
+    for definition in text.replace("\n", ";").split(";"):
+        definition = definition.strip()
+        if not definition:
+            continue
+        tokens: list[str] = definition.split()
+        if len(tokens) < _CRON_FIELDS_COUNT:
+            raise ValueError(f"Некорректное задание расписания: {definition}")
+        schedule: CronSchedule = CronSchedule.parse(" ".join(tokens[:_CRON_FIELDS_COUNT]))
+        args: argparse.Namespace = parser.parse_args(tokens[_CRON_FIELDS_COUNT:])
+        jobs.append(ScheduledReport(schedule=schedule, args=args, definition=definition))
+    return jobs
+
+
+class ReportScheduler:
+    """Запускает отчеты по расписанию внутри процесса бота, заранее прогревая кэши."""
+
+    def __init__(
+            self,
+            jobs: list[ScheduledReport],
+            controller: SalesReportController,
+            send_report: Callable[[ReportDocument], Awaitable[None]],
+            prefetch_lead_seconds: float,
+    ):
+        self._jobs = jobs
+        self._controller = controller
+        self._send_report = send_report
+        self._prefetch_lead = timedelta(seconds=prefetch_lead_seconds)
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._run_job(job) for job in self._jobs))
+
+    async def _run_job(self, job: ScheduledReport) -> None:
+        logger: logging.Logger = get_logger()
+        previous_run_at: datetime | None = None
+        while True:
+            now: datetime = datetime.now(_PROJECT_TZ)
+            if previous_run_at is not None and previous_run_at > now:
+                now = previous_run_at
+            run_at: datetime = job.schedule.next_after(now, _PROJECT_TZ)
+            logger.info("Следующий запуск по расписанию: %s в %s", job.definition, run_at.isoformat())
+
+            prefetch_at: datetime = run_at - self._prefetch_lead
+            if prefetch_at > now:
+                await self._sleep_until(prefetch_at)
+                await self._prefetch(job)
+
+            await self._sleep_until(run_at)
+            await self._execute(job)
+            previous_run_at = run_at
+
+    async def _prefetch(self, job: ScheduledReport) -> None:
+        logger: logging.Logger = get_logger()
+        try:
+            await self._controller.build_report(job.args)
+            logger.info("Данные для отчета по расписанию подготовлены: %s", job.definition)
+        except Exception:
+            logger.warning("Не удалось подготовить данные для отчета: %s", job.definition, exc_info=True)
+
+    async def _execute(self, job: ScheduledReport) -> None:
+        logger: logging.Logger = get_logger()
+        try:
+            report: ReportDocument = await self._controller.build_report(job.args)
+            if not report.is_empty():
+                await self._send_report(report)
+            logger.info("Отчет по расписанию отправлен: %s", job.definition)
+        except Exception:
+            logger.exception("Ошибка отчета по расписанию: %s", job.definition)
+
+    @staticmethod
+    async def _sleep_until(moment: datetime) -> None:
+        """Спит, пока часы не дойдут до moment: asyncio.sleep может проснуться чуть раньше."""
+        while True:
+            delay: float = (moment - datetime.now(_PROJECT_TZ)).total_seconds()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
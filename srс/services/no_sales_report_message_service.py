@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from srс.domain.entities.no_sales_report import NoSalesReport
+from srс.domain.entities.report_document import ReportEntry, ReportSection
 from srс.domain.value_objects.no_sales_item import NoSalesItem
 
 
@@ -8,23 +9,23 @@ class NoSalesReportMessageService:
     def __init__(self, last_sale_days: int):
         self._last_sale_days = last_sale_days
 
-    def create_message(self, report: NoSalesReport) -> str:
+    def create_section(self, report: NoSalesReport) -> ReportSection | None:
         if not report.items:
-            return ""
+            return None
 
-        parts: list[str] = ["Аппараты без продаж:"]
+        entries: list[ReportEntry] = []
         item: NoSalesItem
         for item in report.items:
-            line: str = self._format_item(item)
-            parts.append(line)
+            entry: ReportEntry = self._format_item(item)
+            entries.append(entry)
 
-        message: str = "\n\n".join(parts)
-        return message
+        section: ReportSection = ReportSection(heading="Аппараты без продаж:", entries=entries)
+        return section
 
-    def _format_item(self, item: NoSalesItem) -> str:
+    def _format_item(self, item: NoSalesItem) -> ReportEntry:
         name: str = item.vending_machine.name
         last_sale_text: str = self._format_last_sale(item.last_sale_timestamp)
-        return f"{name}\n{last_sale_text}"
+        return ReportEntry(lines=[name, last_sale_text])
 
     def _format_last_sale(self, timestamp: datetime | None) -> str:
         if timestamp is None:
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+from srс.domain.entities.sales_matrix import SalesMatrix, SalesMatrixBuilder
+from srс.domain.entities.vending_machine import VendingMachine
+from srс.domain.ports.sales_repository import SalesRepository
+from srс.infra.metrics import get_metrics
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+
+class SalesAggregationService:
+    def __init__(self, sales_repository: SalesRepository):
+        self._sales_repository = sales_repository
+
+    async def aggregate(
+            self,
+            vending_machines: Iterable[VendingMachine],
+            from_date: datetime,
+            to_date: datetime,
+    ) -> SalesMatrix:
+        """Агрегирует целые локальные дни, на которые приходится интервал [from_date, to_date)."""
+        first_day: int = from_date.astimezone(_PROJECT_TZ).date().toordinal()
+        last_day: int = (to_date - timedelta(microseconds=1)).astimezone(_PROJECT_TZ).date().toordinal()
+        builder: SalesMatrixBuilder = SalesMatrixBuilder(
+            vending_machine_ids=[vending_machine.kit_id for vending_machine in vending_machines],
+            first_day=first_day,
+            last_day=last_day,
+        )
+        with get_metrics().span("aggregation"):
+            await self._sales_repository.aggregate_daily_sales(builder)
+        matrix: SalesMatrix = builder.build()
+        return matrix
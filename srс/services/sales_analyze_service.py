@@ -1,46 +1,55 @@
-from collections import defaultdict
-from datetime import date, datetime, time, timedelta
-from typing import DefaultDict, Iterable
+from datetime import datetime
+from typing import Iterable
 from zoneinfo import ZoneInfo
 
-from srс.domain.entities.sale import Sale
+from srс.domain.entities.machine_sales_stats import MachineSalesStats
 from srс.domain.entities.sales_analyze_report import SalesAnalyzeReport
 from srс.domain.entities.vending_machine import VendingMachine
-from srс.domain.ports.sales_repository import SalesRepository
 from srс.domain.value_objects.sales_analyze_item import SalesAnalyzeItem
+from srс.services.sales_stats_service import SalesStatsService
 
 _PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
 
+BASELINE_MEAN: str = "mean"
+BASELINE_EWMA: str = "ewma"
+BASELINE_WEEKDAY: str = "weekday"
+BASELINES: tuple[str, ...] = (BASELINE_MEAN, BASELINE_EWMA, BASELINE_WEEKDAY)
+
 
 class SalesAnalyzeService:
-    def __init__(self, sales_repository: SalesRepository, days_for_average: int, decline_threshold: float):
-        self._sales_repository = sales_repository
+    def __init__(
+            self,
+            stats_service: SalesStatsService,
+            days_for_average: int,
+            decline_threshold: float,
+            baseline: str = BASELINE_MEAN,
+    ):
+        if baseline not in BASELINES:
+            raise ValueError(f"Неизвестная база сравнения: {baseline}")
+        self._stats_service = stats_service
 
         self._days_for_average = days_for_average
         self._decline_threshold = decline_threshold
+        self._baseline = baseline
 
     async def create_sales_analyze_report(self, vending_machines: Iterable[VendingMachine]) -> SalesAnalyzeReport:
-        """Пропускает аппараты, на которых совсем не было продаж (падение на 100%)."""
+        """Пропускает аппараты, на которых совсем не было продаж (падение на 100%).
 
-        from_date: datetime
-        to_date: datetime
-        yesterday: date
-        from_date, to_date, yesterday = self._get_date_range()
+        Вчерашняя выручка сравнивается с базой из сохраненной статистики: средним за
+        days_for_average дней (mean), экспоненциальным средним (ewma) или средним по тому же дню недели (weekday).
+        """
 
-        sales: list[Sale] = await self._sales_repository.get_sales(
-            from_date=from_date,
-            to_date=to_date,
-            vending_machine_id=None,
-        )
-        sales_by_vm: dict[int, list[Sale]] = self._group_sales_by_vm(sales)
+        yesterday: int = datetime.now(_PROJECT_TZ).date().toordinal() - 1
+        machines: list[VendingMachine] = list(vending_machines)
+        stats: dict[int, MachineSalesStats] = await self._stats_service.get_stats(machines)
 
         items: list[SalesAnalyzeItem] = []
-        for vending_machine in vending_machines:
-            vm_sales: list[Sale] = sales_by_vm.get(vending_machine.kit_id, [])
-            day_totals: dict[date, float] = self._sum_sales_by_day(vm_sales, from_date, to_date)
-            total_sum: float = sum(day_totals.values())
-            average: float = total_sum / self._days_for_average
-            yesterday_total: float = day_totals.get(yesterday, 0.0)
+        for vending_machine in machines:
+            machine_stats: MachineSalesStats | None = stats.get(vending_machine.kit_id)
+            if machine_stats is None or machine_stats.last_day != yesterday:
+                continue
+            average: float = self._get_baseline(machine_stats)
+            yesterday_total: float = machine_stats.last_day_total
 
             if average <= 0.0:
                 continue
@@ -63,31 +72,9 @@ class SalesAnalyzeService:
         report: SalesAnalyzeReport = SalesAnalyzeReport(items=items)
         return report
 
-    def _get_date_range(self) -> tuple[datetime, datetime, date]:
-        today: date = datetime.now(_PROJECT_TZ).date()
-        from_date: date = today - timedelta(days=self._days_for_average)
-        from_datetime: datetime = datetime.combine(from_date, time.min).replace(tzinfo=_PROJECT_TZ)
-        to_datetime: datetime = datetime.combine(today, time.max).replace(tzinfo=_PROJECT_TZ)
-        yesterday: date = today - timedelta(days=1)
-        return from_datetime, to_datetime, yesterday
-
-    @staticmethod
-    def _group_sales_by_vm(sales: list[Sale]) -> dict[int, list[Sale]]:
-        grouped: DefaultDict[int, list[Sale]] = defaultdict(list)
-        for sale in sales:
-            grouped[sale.vending_machine_id].append(sale)
-        return dict(grouped)
-
-    @staticmethod
-    def _sum_sales_by_day(
-            sales: list[Sale],
-            from_date: datetime,
-            to_date: datetime,
-    ) -> dict[date, float]:
-        totals: DefaultDict[date, float] = defaultdict(float)
-        for sale in sales:
-            if sale.timestamp < from_date or sale.timestamp >= to_date:
-                continue
-            sale_day: date = sale.timestamp.date()
-            totals[sale_day] += sale.amount
-        return dict(totals)
+    def _get_baseline(self, stats: MachineSalesStats) -> float:
+        if self._baseline == BASELINE_EWMA:
+            return stats.ewma
+        if self._baseline == BASELINE_WEEKDAY:
+            return stats.weekday_baseline(stats.last_day)
+        return stats.rolling_mean(self._days_for_average)
@@ -0,0 +1,124 @@
+from datetime import date, datetime, time
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from srс.domain.entities.sales_batch import SalesBatch
+from srс.domain.entities.sales_matrix import SalesMatrix, SalesMatrixBuilder
+from srс.domain.entities.vending_machine import VendingMachine
+from srс.domain.ports.sales_repository import SalesRepository
+from srс.domain.ports.vending_machine_repository import VendingMachineRepository
+from srс.infra.export_writers import ExportColumns, ExportWriter
+from srс.infra.metrics import MetricsRegistry, get_metrics
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+SALES_COLUMNS: ExportColumns = [
+    ("timestamp", str),
+    ("vending_machine_id", int),
+    ("vending_machine_name", str),
+    ("amount", float),
+]
+DAILY_COLUMNS: ExportColumns = [
+    ("day", str),
+    ("vending_machine_id", int),
+    ("vending_machine_name", str),
+    ("total", float),
+    ("sales_count", int),
+]
+
+
+class SalesExportService:
+    """Выгружает продажи или дневные итоги по аппаратам за локальные дни [first_day, last_day].
+
+    Интервал проходится кусками по chunk_days дней через те же репозитории, что и отчеты,
+    а строки уходят в writer пачками по batch_size: память не растет с длиной интервала.
+    """
+
+    def __init__(
+            self,
+            sales_repository: SalesRepository,
+            vending_machine_repository: VendingMachineRepository,
+            chunk_days: int,
+            batch_size: int,
+    ):
+        self._sales_repository = sales_repository
+        self._vending_machine_repository = vending_machine_repository
+        self._chunk_days = max(1, chunk_days)
+        self._batch_size = max(1, batch_size)
+
+    async def export_sales(self, first_day: date, last_day: date, writer: ExportWriter) -> int:
+        vending_machines: dict[int, VendingMachine] = await self._vending_machine_repository.get_index()
+        metrics: MetricsRegistry = get_metrics()
+        rows: list[tuple[Any, ...]] = []
+        exported: int = 0
+        chunk_first: int
+        chunk_last: int
+        for chunk_first, chunk_last in self._iter_chunks(first_day, last_day):
+            sales: SalesBatch = await self._sales_repository.get_sales(
+                from_date=self._day_start(chunk_first),
+                to_date=self._day_start(chunk_last + 1),
+            )
+            index: int
+            for index in range(len(sales)):
+                vm_id: int = sales.vending_machine_ids[index]
+                vending_machine: VendingMachine | None = vending_machines.get(vm_id)
+                rows.append((
+                    datetime.fromtimestamp(sales.timestamps[index], _PROJECT_TZ).isoformat(),
+                    vm_id,
+                    vending_machine.name if vending_machine is not None else "",
+                    sales.amounts[index],
+                ))
+                if len(rows) >= self._batch_size:
+                    exported += self._flush(writer, rows)
+        exported += self._flush(writer, rows)
+        metrics.increment("records", exported, source="export_sales")
+        return exported
+
+    async def export_daily_totals(self, first_day: date, last_day: date, writer: ExportWriter) -> int:
+        """Строки только для дней, в которые у аппарата были продажи; учитываются активные аппараты."""
+        vending_machines: dict[int, VendingMachine] = await self._vending_machine_repository.get_index()
+        rows: list[tuple[Any, ...]] = []
+        exported: int = 0
+        chunk_first: int
+        chunk_last: int
+        for chunk_first, chunk_last in self._iter_chunks(first_day, last_day):
+            builder: SalesMatrixBuilder = SalesMatrixBuilder(vending_machines.keys(), chunk_first, chunk_last)
+            with get_metrics().span("aggregation"):
+                await self._sales_repository.aggregate_daily_sales(builder)
+            matrix: SalesMatrix = builder.build()
+            day: int
+            for day in range(chunk_first, chunk_last + 1):
+                day_text: str = date.fromordinal(day).isoformat()
+                vm_id: int
+                vending_machine: VendingMachine
+                for vm_id, vending_machine in vending_machines.items():
+                    count: int = matrix.count(vm_id, day, day)
+                    if not count:
+                        continue
+                    rows.append((day_text, vm_id, vending_machine.name, matrix.total(vm_id, day, day), count))
+                    if len(rows) >= self._batch_size:
+                        exported += self._flush(writer, rows)
+        exported += self._flush(writer, rows)
+        get_metrics().increment("records", exported, source="export_daily")
+        return exported
+
+    def _iter_chunks(self, first_day: date, last_day: date) -> list[tuple[int, int]]:
+        last: int = last_day.toordinal()
+        return [
+            (chunk_first, min(chunk_first + self._chunk_days - 1, last))
+            for chunk_first in range(first_day.toordinal(), last + 1, self._chunk_days)
+        ]
+
+    @staticmethod
+    def _flush(writer: ExportWriter, rows: list[tuple[Any, ...]]) -> int:
+        if not rows:
+            return 0
+        written: int = len(rows)
+        with get_metrics().span("export_write"):
+            writer.write_batch(rows)
+        rows.clear()
+        return written
+
+    @staticmethod
+    def _day_start(day: int) -> datetime:
+        return datetime.combine(date.fromordinal(day), time.min).replace(tzinfo=_PROJECT_TZ)
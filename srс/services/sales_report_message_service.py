@@ -1,16 +1,19 @@
+from srс.domain.entities.report_document import ReportEntry, ReportSection
 from srс.domain.entities.sales_analyze_report import SalesAnalyzeReport
 
 
 class SalesReportMessageService:
-    def create_message(self, sales_report: SalesAnalyzeReport) -> str:
+    def create_section(self, sales_report: SalesAnalyzeReport) -> ReportSection | None:
         if not sales_report.items:
-            return ""
+            return None
 
-        lines: list[str] = ["\nАппараты с падением продаж:"]
+        entries: list[ReportEntry] = []
         for item in sales_report.items:
             percent: int = round(item.deviation_ratio * 100)
-            line: str = f"{item.vending_machine.name}\nПадение продаж за вчера на {percent}%"
-            lines.append(line)
+            entry: ReportEntry = ReportEntry(
+                lines=[item.vending_machine.name, f"Падение продаж за вчера на {percent}%"],
+            )
+            entries.append(entry)
 
-        message: str = "\n\n".join(lines)
-        return message
+        section: ReportSection = ReportSection(heading="Аппараты с падением продаж:", entries=entries)
+        return section
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+from srс.domain.entities.machine_sales_stats import MachineSalesStats
+from srс.domain.entities.sales_matrix import SalesMatrix, SalesMatrixBuilder
+from srс.domain.entities.vending_machine import VendingMachine
+from srс.domain.ports.sales_repository import SalesRepository
+from srс.domain.ports.sales_stats_repository import SalesStatsRepository
+from srс.infra.app_logger import get_logger
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+_RECHECK_INTERVAL_SECONDS: float = 600.0
+
+
+class SalesStatsService:
+    """Держит статистику аппаратов актуальной на вчерашний день, досчитывая только новые закрытые дни.
+
+    Первый запуск (или разрыв длиннее history_days) заполняет историю за history_days дней целиком.
+    Дни, еще не осевшие в хранилище статистики, заново запрашиваются у хранилища продаж и
+    пересчитываются, чтобы учесть запоздавшие продажи, но не чаще раза в recheck_interval_seconds:
+    новый закрытый день при этом учитывается сразу.
+    """
+
+    def __init__(
+            self,
+            sales_repository: SalesRepository,
+            stats_repository: SalesStatsRepository,
+            history_days: int,
+            recheck_interval_seconds: float = _RECHECK_INTERVAL_SECONDS,
+    ):
+        self._sales_repository = sales_repository
+        self._stats_repository = stats_repository
+        self._history_days = history_days
+        self._recheck_interval_seconds = recheck_interval_seconds
+        self._closed_through: int | None = None
+        self._checked_at: float = 0.0
+        self._refresh_lock: asyncio.Lock = asyncio.Lock()
+
+    async def get_stats(self, vending_machines: Iterable[VendingMachine]) -> dict[int, MachineSalesStats]:
+        vending_machine_ids: list[int] = [vending_machine.kit_id for vending_machine in vending_machines]
+        async with self._refresh_lock:
+            await self._close_pending_days(vending_machine_ids)
+        return await self._stats_repository.get_stats(vending_machine_ids)
+
+    async def _close_pending_days(self, vending_machine_ids: list[int]) -> None:
+        logger: logging.Logger = get_logger()
+        yesterday: int = datetime.now(_PROJECT_TZ).date().toordinal() - 1
+        if self._closed_through == yesterday and (time.monotonic() - self._checked_at) < self._recheck_interval_seconds:
+            return
+        settled_day: int | None = await self._stats_repository.get_settled_day()
+        reset: bool = settled_day is None or yesterday - settled_day > self._history_days
+        first_pending: int = yesterday - self._history_days + 1 if reset else settled_day + 1
+        if first_pending > yesterday:
+            self._mark_checked(yesterday)
+            return
+        if not reset:
+            last_closed_day: int | None = await self._stats_repository.get_last_closed_day()
+            if last_closed_day is not None and first_pending <= last_closed_day:
+                await self._sales_repository.refresh_days(first_pending, min(last_closed_day, yesterday))
+
+        builder: SalesMatrixBuilder = SalesMatrixBuilder(vending_machine_ids, first_pending, yesterday)
+        await self._sales_repository.aggregate_daily_sales(builder)
+        matrix: SalesMatrix = builder.build()
+        closed_days: list[tuple[int, dict[int, float]]] = []
+        day: int
+        for day in range(first_pending, yesterday + 1):
+            totals: dict[int, float] = {}
+            vm_id: int
+            for vm_id in vending_machine_ids:
+                total: float = matrix.total(vm_id, day, day)
+                if total:
+                    totals[vm_id] = total
+            closed_days.append((day, totals))
+        await self._stats_repository.apply_closed_days(closed_days, reset=reset)
+        self._mark_checked(yesterday)
+        logger.info(
+            "Статистика продаж обновлена: дней=%s, аппаратов=%s, с нуля=%s",
+            len(closed_days),
+            len(vending_machine_ids),
+            reset,
+        )
+
+    def _mark_checked(self, yesterday: int) -> None:
+        self._closed_through = yesterday
+        self._checked_at = time.monotonic()
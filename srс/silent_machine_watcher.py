@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+
+from kit_api import SalesCollection
+from kit_api.models.sales import SaleModel
+
+from srс.domain.entities.report_document import ReportDocument, ReportEntry, ReportSection
+from srс.domain.entities.sales_batch import SalesBatch
+from srс.domain.entities.sales_rhythm_index import SalesRhythmIndex
+from srс.domain.entities.vending_machine import VendingMachine
+from srс.domain.ports.sales_repository import SalesRepository
+from srс.domain.ports.vending_machine_repository import VendingMachineRepository
+from srс.infra.app_logger import get_logger
+from srс.infra.kit_api_sale_mapper import map_sale_model
+from srс.infra.kit_api_session import KitAPISession
+from srс.infra.metrics import MetricsRegistry, get_metrics
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+_OVERLAP_SECONDS: int = 600
+
+
+class SilentMachineWatcher:
+    """Следит в режиме бота за аппаратами, которые перестали продавать.
+
+    Один раз загружает историю за learn_days дней, дальше каждые poll_interval_seconds
+    запрашивает у KIT API только продажи после последней известной продажи или опроса (с небольшим перекрытием
+    на запоздавшие записи). У продаж нет идентификатора, поэтому повторы в перекрытии
+    отсекаются по числу уже учтенных продаж с тем же аппаратом, суммой и секундой.
+    Каждая продажа относится к дню по своему времени. Аппарат считается замолчавшим, если за время тишины по его
+    почасовому ритму ожидалось не меньше expected_sales_threshold продаж.
+    """
+
+    def __init__(
+            self,
+            client: KitAPISession,
+            sales_repository: SalesRepository,
+            vending_machine_repository: VendingMachineRepository,
+            send_report: Callable[[ReportDocument], Awaitable[None]],
+            poll_interval_seconds: float,
+            learn_days: int,
+            expected_sales_threshold: float,
+            min_silence_seconds: float,
+    ):
+        self._client = client
+        self._sales_repository = sales_repository
+        self._vending_machine_repository = vending_machine_repository
+        self._send_report = send_report
+        self._poll_interval_seconds = poll_interval_seconds
+        self._learn_days = learn_days
+        self._expected_sales_threshold = expected_sales_threshold
+        self._min_silence_seconds = min_silence_seconds
+        self._index: SalesRhythmIndex = SalesRhythmIndex(_PROJECT_TZ, learn_days)
+        self._is_learned: bool = False
+        self._cursor: int = 0
+        self._current_day: date | None = None
+        self._recent_counts: dict[tuple[int, float, int], int] = {}
+        self._alerted: dict[int, int] = {}
+
+    async def run(self) -> None:
+        logger: logging.Logger = get_logger()
+        while True:
+            try:
+                if not self._is_learned:
+                    await self._learn()
+                await self._poll()
+                await self._check()
+            except Exception:
+                logger.exception("Ошибка наблюдения за аппаратами без продаж")
+            await asyncio.sleep(self._poll_interval_seconds)
+
+    async def _learn(self) -> None:
+        """Загружает историю из хранилища; курсор ставится на самую позднюю полученную продажу.
+
+        Хранилище может отдать устаревшие данные (разомкнутая цепь, устаревший кэш), поэтому все, что
+        позже последней полученной продажи, дочитывается опросом KIT API сразу после загрузки.
+        """
+        now: datetime = datetime.now(_PROJECT_TZ)
+        today: date = now.date()
+        today_start: int = int(datetime.combine(today, dt_time.min).replace(tzinfo=_PROJECT_TZ).timestamp())
+        from_date: datetime = datetime.combine(today - timedelta(days=self._learn_days), dt_time.min).replace(
+            tzinfo=_PROJECT_TZ,
+        )
+        sales: SalesBatch = await self._sales_repository.get_sales(from_date=from_date, to_date=now)
+        self._cursor = min(max(sales.timestamps, default=today_start), int(now.timestamp()))
+        vm_id: int
+        amount: float
+        timestamp: int
+        for vm_id, amount, timestamp in zip(sales.vending_machine_ids, sales.amounts, sales.timestamps):
+            if timestamp < today_start:
+                self._index.learn(vm_id, timestamp)
+            else:
+                self._index.add_sale(vm_id, timestamp)
+            if timestamp >= self._cursor - _OVERLAP_SECONDS:
+                key: tuple[int, float, int] = (vm_id, amount, timestamp)
+                self._recent_counts[key] = self._recent_counts.get(key, 0) + 1
+        self._current_day = today
+        self._is_learned = True
+        get_logger().info("Ритм продаж загружен: продаж=%s, дней=%s", len(sales), self._learn_days)
+
+    async def _poll(self) -> None:
+        now: datetime = datetime.now(_PROJECT_TZ)
+        from_ts: int = self._cursor - _OVERLAP_SECONDS
+        to_ts: int = int(now.timestamp())
+        metrics: MetricsRegistry = get_metrics()
+        with metrics.span("watcher_poll"):
+            sales_model: SalesCollection = await self._client.get_sales(
+                from_date=datetime.fromtimestamp(from_ts, _PROJECT_TZ),
+                to_date=now,
+            )
+        counts: dict[tuple[int, float, int], int] = {}
+        sale_model: SaleModel
+        for sale_model in sales_model.get_all():
+            key: tuple[int, float, int] = map_sale_model(sale_model)
+            if key[2] >= from_ts:
+                counts[key] = counts.get(key, 0) + 1
+
+        new_sales: list[tuple[int, int]] = []
+        count: int
+        for key, count in counts.items():
+            seen: int = self._recent_counts.get(key, 0)
+            if count > seen:
+                new_sales.extend((key[0], key[2]) for _ in range(count - seen))
+                self._recent_counts[key] = count
+        vm_id: int
+        timestamp: int
+        for vm_id, timestamp in sorted(new_sales, key=lambda sale: sale[1]):
+            self._add_sale(vm_id, timestamp)
+        self._advance_day(now.date())
+
+        self._cursor = to_ts
+        self._recent_counts = {
+            key: count for key, count in self._recent_counts.items() if key[2] >= to_ts - _OVERLAP_SECONDS
+        }
+        metrics.increment("records", len(new_sales), source="watcher_delta")
+
+    def _add_sale(self, vm_id: int, timestamp: int) -> None:
+        day: date = datetime.fromtimestamp(timestamp, _PROJECT_TZ).date()
+        if self._current_day is not None and day < self._current_day:
+            self._index.learn(vm_id, timestamp)
+            return
+        self._advance_day(day)
+        self._index.add_sale(vm_id, timestamp)
+
+    def _advance_day(self, day: date) -> None:
+        if self._current_day is not None and day > self._current_day:
+            self._index.close_day()
+        if self._current_day is None or day > self._current_day:
+            self._current_day = day
+
+    async def _check(self) -> None:
+        now_ts: int = int(time.time())
+        vending_machines: dict[int, VendingMachine] = await self._vending_machine_repository.get_index()
+        silent: list[ReportEntry] = []
+        recovered: list[ReportEntry] = []
+        newly_alerted: dict[int, int] = {}
+        recovered_ids: list[int] = []
+        vm_id: int
+        vending_machine: VendingMachine
+        for vm_id, vending_machine in vending_machines.items():
+            last_timestamp: int | None = self._index.last_timestamp(vm_id)
+            if last_timestamp is None:
+                continue
+            alerted_at: int | None = self._alerted.get(vm_id)
+            if alerted_at is not None:
+                if last_timestamp > alerted_at:
+                    recovered_ids.append(vm_id)
+                    recovered.append(ReportEntry(lines=[
+                        vending_machine.name,
+                        f"Продажа в {self._format_time(last_timestamp)} после простоя с {self._format_time(alerted_at)}",
+                    ]))
+                continue
+            if now_ts - last_timestamp < self._min_silence_seconds:
+                continue
+            expected: float = self._index.expected_sales(vm_id, last_timestamp, now_ts)
+            if expected < self._expected_sales_threshold:
+                continue
+            newly_alerted[vm_id] = last_timestamp
+            silent.append(ReportEntry(lines=[
+                vending_machine.name,
+                f"Нет продаж с {self._format_time(last_timestamp)}, обычно за это время ~{round(expected)}",
+            ]))
+
+        sections: list[ReportSection] = []
+        if silent:
+            sections.append(ReportSection(heading="Аппараты перестали продавать:", entries=silent))
+        if recovered:
+            sections.append(ReportSection(heading="Аппараты снова продают:", entries=recovered))
+        if sections:
+            get_metrics().increment("watcher_alerts", len(silent), kind="silent")
+            get_metrics().increment("watcher_alerts", len(recovered), kind="recovered")
+            await self._send_report(ReportDocument(sections=sections))
+        self._alerted.update(newly_alerted)
+        for vm_id in recovered_ids:
+            del self._alerted[vm_id]
+
+    @staticmethod
+    def _format_time(timestamp: int) -> str:
+        return datetime.fromtimestamp(timestamp, _PROJECT_TZ).strftime("%d.%m.%Y %H:%M")
@@ -1,19 +1,40 @@
 import argparse
+import asyncio
 import logging
 import os
 import shlex
 from typing import Any, Awaitable, Callable, Optional
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
 from aiogram.filters import Command
 from aiogram.types import Message
-from dotenv import load_dotenv
-from kit_api import KitVendingAPIClient
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
+from srс.controllers.coalescing_report_controller import CoalescingReportController
 from srс.controllers.sales_report_controller import SalesReportController
 from srс.infra.app_logger import get_logger
+from srс.infra.kit_api_session import KitAPISession
+from srс.domain.entities.report_document import ReportDocument, ReportSection
+from srс.infra.metrics import MetricsRegistry, get_metrics, start_metrics_server
+from srс.infra.markdown_v2_renderer import quote_markdown_v2, render_quote_markdown_v2_chunks
 from srс.infra.telegram_client import TelegramClient
+from srс.infra.telegram_rate_limiter import TelegramRateLimiter, get_shared_rate_limiter
+from srс.report_scheduler import ReportScheduler, ScheduledReport, parse_schedule_definitions
+from srс.silent_machine_watcher import SilentMachineWatcher
+
+_DEFAULT_REPORT_CACHE_TTL_SECONDS: float = 30.0
+_DEFAULT_SCHEDULE_PREFETCH_SECONDS: float = 300.0
+_DEFAULT_REPORT_DEADLINE_SECONDS: float = 60.0
+_PLACEHOLDER_TEXT: str = "Формирую отчет…"
+_DEFAULT_METRICS_HOST: str = "127.0.0.1"
+_DEFAULT_METRICS_PORT: int = 9108
+_DEFAULT_WEBHOOK_HOST: str = "0.0.0.0"
+_DEFAULT_WEBHOOK_PORT: int = 8080
+_DEFAULT_WEBHOOK_PATH: str = "/telegram/webhook"
 
 
 class BotArgumentParser(argparse.ArgumentParser):
@@ -21,20 +42,6 @@ class BotArgumentParser(argparse.ArgumentParser):
         raise ValueError(message)
 
 
-def apply_heading_bold(message: str) -> str:
-    headings: tuple[str, ...] = (
-        "Аппараты без продаж:",
-        "Аппараты с падением продаж:",
-    )
-    lines: list[str] = message.split("\n")
-    index: int
-    line: str
-    for index, line in enumerate(lines):
-        if line in headings:
-            lines[index] = f"[[B]]{line}[[/B]]"
-    return "\n".join(lines)
-
-
 def _build_bot_parser() -> argparse.ArgumentParser:
     parser: BotArgumentParser = BotArgumentParser(description="Команда отчета бота")
     _add_report_args(parser)
@@ -69,21 +76,207 @@ def _parse_bot_args(text: str, parser: argparse.ArgumentParser) -> argparse.Name
 
 
 def _get_bot_token() -> str:
-    load_dotenv()
     token: Optional[str] = os.getenv("TELEGRAM_BOT_TOKEN")
     if not token:
         raise ValueError("Не задан TELEGRAM_BOT_TOKEN")
     return token
 
 
+def _get_webhook_secret() -> str:
+    secret: Optional[str] = os.getenv("WEBHOOK_SECRET")
+    if not secret:
+        raise ValueError("Не задан WEBHOOK_SECRET")
+    return secret
+
+
+def _create_bot(token: str) -> Bot:
+    """TELEGRAM_API_URL подменяет сервер Bot API (локальный сервер или заглушка для проверки вебхука)."""
+    api_url: Optional[str] = os.getenv("TELEGRAM_API_URL")
+    if not api_url:
+        return Bot(token=token)
+    session: AiohttpSession = AiohttpSession(api=TelegramAPIServer.from_base(api_url))
+    return Bot(token=token, session=session)
+
+
+def _get_report_cache_ttl() -> float:
+    value: Optional[str] = os.getenv("REPORT_CACHE_TTL_SECONDS")
+    if not value:
+        return _DEFAULT_REPORT_CACHE_TTL_SECONDS
+    return float(value)
+
+
+def _get_report_deadline() -> float | None:
+    """Срок сборки отчета по команде; 0 отключает срок."""
+    value: Optional[str] = os.getenv("REPORT_DEADLINE_SECONDS")
+    deadline: float = float(value) if value else _DEFAULT_REPORT_DEADLINE_SECONDS
+    return deadline if deadline > 0 else None
+
+
+def _get_schedule_prefetch_seconds() -> float:
+    value: Optional[str] = os.getenv("SCHEDULE_PREFETCH_SECONDS")
+    if not value:
+        return _DEFAULT_SCHEDULE_PREFETCH_SECONDS
+    return float(value)
+
+
+async def _start_metrics_endpoint() -> web.AppRunner | None:
+    port: int = int(os.getenv("METRICS_PORT") or _DEFAULT_METRICS_PORT)
+    if port == 0:
+        return None
+    host: str = os.getenv("METRICS_HOST") or _DEFAULT_METRICS_HOST
+    runner: web.AppRunner = await start_metrics_server(host, port)
+    get_logger().info("Метрики доступны по адресу http://%s:%s/metrics", host, port)
+    return runner
+
+
+async def _run_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+    """Принимает обновления на WEBHOOK_HOST:WEBHOOK_PORT по пути WEBHOOK_PATH, пока задачу не отменят.
+
+    Запросы без заголовка X-Telegram-Bot-Api-Secret-Token, равного WEBHOOK_SECRET, отклоняются.
+    Адрес у Telegram регистрируется только при заданном WEBHOOK_URL: за обратным прокси
+    с несколькими экземплярами бота его задает один экземпляр (или администратор вручную).
+    """
+    logger: logging.Logger = get_logger()
+    secret: str = _get_webhook_secret()
+    host: str = os.getenv("WEBHOOK_HOST") or _DEFAULT_WEBHOOK_HOST
+    port: int = int(os.getenv("WEBHOOK_PORT") or _DEFAULT_WEBHOOK_PORT)
+    path: str = os.getenv("WEBHOOK_PATH") or _DEFAULT_WEBHOOK_PATH
+
+    application: web.Application = web.Application()
+    request_handler: SimpleRequestHandler = SimpleRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=secret,
+    )
+    request_handler.register(application, path=path)
+    setup_application(application, dispatcher, bot=bot)
+    runner: web.AppRunner = web.AppRunner(application, access_log=None)
+    await runner.setup()
+    try:
+        site: web.TCPSite = web.TCPSite(runner, host=host, port=port)
+        await site.start()
+        logger.info("Вебхук бота слушает http://%s:%s%s", host, port, path)
+        public_url: Optional[str] = os.getenv("WEBHOOK_URL")
+        if public_url:
+            await bot.set_webhook(
+                url=public_url,
+                secret_token=secret,
+                allowed_updates=dispatcher.resolve_used_update_types(),
+            )
+            logger.info("Вебхук зарегистрирован в Telegram: %s", public_url)
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def _run_polling(dispatcher: Dispatcher, bot: Bot) -> None:
+    """Снимает вебхук, оставшийся от режима --webhook: пока он задан, getUpdates отвечает конфликтом.
+
+    Накопившиеся обновления сохраняются и будут получены первым же опросом.
+    """
+    await bot.delete_webhook(drop_pending_updates=False)
+    await dispatcher.start_polling(bot)
+
+
+def _start_scheduler(
+    controller: SalesReportController,
+    bot_parser: argparse.ArgumentParser,
+    bot: Bot,
+) -> asyncio.Task[None] | None:
+    schedule_text: str = os.getenv("BOT_SCHEDULE", "")
+    jobs: list[ScheduledReport] = parse_schedule_definitions(schedule_text, bot_parser)
+    if not jobs:
+        return None
+    telegram_client: TelegramClient = TelegramClient.from_env(bot=bot)
+
+    async def _send_scheduled_report(report: ReportDocument) -> None:
+        await telegram_client.send_report(report)
+
+    scheduler: ReportScheduler = ReportScheduler(
+        jobs=jobs,
+        controller=controller,
+        send_report=_send_scheduled_report,
+        prefetch_lead_seconds=_get_schedule_prefetch_seconds(),
+    )
+    get_logger().info("Запуск планировщика отчетов: %s заданий", len(jobs))
+    return asyncio.create_task(scheduler.run())
+
+
+def _start_watcher(
+    build_watcher: Callable[[KitAPISession, Callable[[ReportDocument], Awaitable[None]]], SilentMachineWatcher | None],
+    client: KitAPISession,
+    bot: Bot,
+) -> asyncio.Task[None] | None:
+    """Клиент Telegram для оповещений создается, только если наблюдение включено: без него TELEGRAM_CHAT_ID не нужен."""
+    telegram_client: TelegramClient | None = None
+
+    async def _send_alert(report: ReportDocument) -> None:
+        await telegram_client.send_report(report)
+
+    watcher: SilentMachineWatcher | None = build_watcher(client, _send_alert)
+    if watcher is None:
+        return None
+    telegram_client = TelegramClient.from_env(bot=bot)
+    get_logger().info("Запуск наблюдения за аппаратами без продаж")
+    return asyncio.create_task(watcher.run())
+
+
+class _ProgressiveReply:
+    """Ответ на команду по частям: первая часть заменяет сообщение-заглушку, остальные уходят следом."""
+
+    def __init__(self, message: Message, placeholder: Message, rate_limiter: TelegramRateLimiter):
+        self._message: Message = message
+        self._placeholder: Message | None = placeholder
+        self._rate_limiter: TelegramRateLimiter = rate_limiter
+        self.parts: int = 0
+        self.payload_len: int = 0
+
+    async def send_section(self, section: ReportSection) -> None:
+        with get_metrics().span("render"):
+            payload_texts: list[str] = render_quote_markdown_v2_chunks(ReportDocument(sections=[section]))
+        payload_text: str
+        for payload_text in payload_texts:
+            await self._send(payload_text)
+
+    async def send_text(self, text: str) -> None:
+        await self._send(quote_markdown_v2(text))
+
+    async def discard_placeholder(self) -> None:
+        if self._placeholder is not None:
+            placeholder: Message = self._placeholder
+            self._placeholder = None
+            await placeholder.delete()
+
+    async def _send(self, payload_text: str) -> None:
+        metrics: MetricsRegistry = get_metrics()
+        placeholder: Message | None = self._placeholder
+        self._placeholder = None
+        with metrics.span("telegram_send"):
+            if placeholder is not None:
+                await self._rate_limiter.send(
+                    self._message.chat.id,
+                    lambda: placeholder.edit_text(payload_text, parse_mode="MarkdownV2"),
+                )
+            else:
+                await self._rate_limiter.send(
+                    self._message.chat.id,
+                    lambda: self._message.answer(payload_text, parse_mode="MarkdownV2"),
+                )
+        metrics.increment("messages_sent", channel="telegram")
+        self.parts += 1
+        self.payload_len += len(payload_text)
+
+
 class BotContextMiddleware(BaseMiddleware):
     def __init__(
         self,
-        controller: SalesReportController,
+        controller: CoalescingReportController,
         bot_parser: argparse.ArgumentParser,
+        rate_limiter: TelegramRateLimiter,
     ):
-        self._controller: SalesReportController = controller
+        self._controller: CoalescingReportController = controller
         self._bot_parser: argparse.ArgumentParser = bot_parser
+        self._rate_limiter: TelegramRateLimiter = rate_limiter
 
     async def __call__(
         self,
@@ -93,13 +286,15 @@ class BotContextMiddleware(BaseMiddleware):
     ) -> Any:
         data["controller"] = self._controller
         data["bot_parser"] = self._bot_parser
+        data["rate_limiter"] = self._rate_limiter
         return await handler(event, data)
 
 
 async def handle_sales_report(
     message: Message,
-    controller: SalesReportController,
+    controller: CoalescingReportController,
     bot_parser: argparse.ArgumentParser,
+    rate_limiter: TelegramRateLimiter,
 ):
     logger: logging.Logger = get_logger()
     raw_text: str = message.text or ""
@@ -116,7 +311,7 @@ async def handle_sales_report(
         args: argparse.Namespace = _parse_bot_args(text, bot_parser)
     except ValueError as exc:
         error_text: str = f"Неверные аргументы: {exc}\nИспользование: {_format_bot_usage()}"
-        formatted_error: str = TelegramClient.format_quote_markdown_v2(error_text)
+        formatted_error: str = quote_markdown_v2(error_text)
         await message.answer(formatted_error, parse_mode="MarkdownV2")
         logger.warning(
             "Ошибка аргументов команды бота: user_id=%s, chat_id=%s, error=%s",
@@ -125,19 +320,33 @@ async def handle_sales_report(
             exc,
         )
         return
+    placeholder: Message = await rate_limiter.send(
+        message.chat.id,
+        lambda: message.answer(quote_markdown_v2(_PLACEHOLDER_TEXT), parse_mode="MarkdownV2"),
+    )
+    reply: _ProgressiveReply = _ProgressiveReply(message, placeholder, rate_limiter)
     try:
-        report_message: str = await controller.build_report(args)
-        if report_message:
-            formatted_message: str = apply_heading_bold(report_message)
-            payload_text: str = TelegramClient.format_quote_markdown_v2(formatted_message)
-            await message.answer(payload_text, parse_mode="MarkdownV2")
+        deadline_seconds: float | None = _get_report_deadline()
+        report: ReportDocument = await controller.build_report(
+            args,
+            on_section=reply.send_section,
+            deadline_seconds=deadline_seconds,
+        )
+        if report.is_partial():
+            await reply.send_text(
+                f"Отчет неполный: за {deadline_seconds:g} с не готовы разделы: {', '.join(report.missing_sections)}",
+            )
+        if reply.parts:
             logger.info(
-                "Команда бота обработана: user_id=%s, chat_id=%s, payload_len=%s",
+                "Команда бота обработана: user_id=%s, chat_id=%s, payload_len=%s, parts=%s, partial=%s",
                 user_id,
                 chat_id,
-                len(payload_text),
+                reply.payload_len,
+                reply.parts,
+                report.is_partial(),
             )
         else:
+            await reply.discard_placeholder()
             logger.info(
                 "Команда бота обработана: user_id=%s, chat_id=%s, пустой отчет",
                 user_id,
@@ -145,8 +354,7 @@ async def handle_sales_report(
             )
     except Exception as exc:
         error_text: str = f"Ошибка формирования отчета: {exc}"
-        formatted_error: str = TelegramClient.format_quote_markdown_v2(error_text)
-        await message.answer(formatted_error, parse_mode="MarkdownV2")
+        await reply.send_text(error_text)
         logger.exception(
             "Ошибка обработки команды бота: user_id=%s, chat_id=%s",
             user_id,
@@ -155,26 +363,53 @@ async def handle_sales_report(
 
 
 async def run_bot(
-    create_client: Callable[[], KitVendingAPIClient],
-    build_controller: Callable[[KitVendingAPIClient], SalesReportController],
+    create_client: Callable[[], KitAPISession],
+    build_controller: Callable[[KitAPISession], SalesReportController],
+    build_watcher: Callable[
+        [KitAPISession, Callable[[ReportDocument], Awaitable[None]]],
+        SilentMachineWatcher | None,
+    ] | None = None,
+    webhook: bool = False,
 ):
     logger: logging.Logger = get_logger()
-    client: KitVendingAPIClient = create_client()
+    client: KitAPISession = create_client()
     bot_token: str = _get_bot_token()
+    metrics_runner: web.AppRunner | None = None
     try:
         logger.info("Запуск Telegram-бота")
-        controller: SalesReportController = build_controller(client)
+        metrics_runner = await _start_metrics_endpoint()
+        report_controller: SalesReportController = build_controller(client)
+        controller: CoalescingReportController = CoalescingReportController(
+            controller=report_controller,
+            ttl_seconds=_get_report_cache_ttl(),
+        )
         bot_parser: argparse.ArgumentParser = _build_bot_parser()
-        async with Bot(token=bot_token) as bot:
+        async with _create_bot(bot_token) as bot:
+            scheduler_task: asyncio.Task[None] | None = _start_scheduler(report_controller, bot_parser, bot)
+            watcher_task: asyncio.Task[None] | None = (
+                _start_watcher(build_watcher, client, bot) if build_watcher is not None else None
+            )
             dispatcher: Dispatcher = Dispatcher()
             context_middleware: BotContextMiddleware = BotContextMiddleware(
                 controller=controller,
                 bot_parser=bot_parser,
+                rate_limiter=get_shared_rate_limiter(),
             )
             dispatcher.message.middleware(context_middleware)
             dispatcher.message.register(handle_sales_report, Command("get_sales_report"))
-            await dispatcher.start_polling(bot)
+            try:
+                if webhook:
+                    await _run_webhook(dispatcher, bot)
+                else:
+                    await _run_polling(dispatcher, bot)
+            finally:
+                if scheduler_task is not None:
+                    scheduler_task.cancel()
+                if watcher_task is not None:
+                    watcher_task.cancel()
     finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         await client.close()
         logger.info("Остановка Telegram-бота")
 
@@ -0,0 +1,79 @@
+import unittest
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from srс.infra.cron_schedule import CronSchedule
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+
+
+def _at(year: int, month: int, day: int, hour: int = 0, minute: int = 0) -> datetime:
+    return datetime(year, month, day, hour, minute, tzinfo=_PROJECT_TZ)
+
+
+def _next(expression: str, moment: datetime) -> datetime:
+    return CronSchedule.parse(expression).next_after(moment, _PROJECT_TZ)
+
+
+class CronScheduleParseTest(unittest.TestCase):
+    def test_steps(self):
+        self.assertEqual(CronSchedule.parse("*/15 * * * *").minutes, frozenset({0, 15, 30, 45}))
+        self.assertEqual(CronSchedule.parse("5/20 * * * *").minutes, frozenset({5, 25, 45}))
+        self.assertEqual(CronSchedule.parse("0 8-18/4 * * *").hours, frozenset({8, 12, 16}))
+
+    def test_ranges_and_lists(self):
+        schedule: CronSchedule = CronSchedule.parse("0,30 9-11,20 * * 1-5")
+        self.assertEqual(schedule.minutes, frozenset({0, 30}))
+        self.assertEqual(schedule.hours, frozenset({9, 10, 11, 20}))
+        self.assertEqual(schedule.days_of_week, frozenset({1, 2, 3, 4, 5}))
+
+    def test_sunday_as_seven(self):
+        self.assertEqual(CronSchedule.parse("0 0 * * 7").days_of_week, frozenset({0}))
+
+    def test_invalid_expressions(self):
+        expression: str
+        for expression in ("0 0 * *", "*/0 * * * *", "60 * * * *", "0 17-9 * * *", "0 0 0 * *"):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    CronSchedule.parse(expression)
+
+
+class CronScheduleNextAfterTest(unittest.TestCase):
+    def test_next_slot_is_strictly_after_moment(self):
+        self.assertEqual(_next("0 3 * * *", _at(2026, 10, 1, 3, 0)), _at(2026, 10, 2, 3, 0))
+        self.assertEqual(_next("0 3 * * *", _at(2026, 10, 1, 2, 59)), _at(2026, 10, 1, 3, 0))
+
+    def test_step_minutes(self):
+        self.assertEqual(_next("*/15 * * * *", _at(2026, 10, 1, 10, 7)), _at(2026, 10, 1, 10, 15))
+        self.assertEqual(_next("*/15 * * * *", _at(2026, 10, 1, 23, 50)), _at(2026, 10, 2, 0, 0))
+
+    def test_range_rolls_over_to_next_day(self):
+        self.assertEqual(_next("0 9-17 * * *", _at(2026, 10, 1, 17, 30)), _at(2026, 10, 2, 9, 0))
+
+    def test_list_of_hours(self):
+        self.assertEqual(_next("0,30 8,20 * * *", _at(2026, 10, 1, 8, 30)), _at(2026, 10, 1, 20, 0))
+
+    def test_day_of_month_or_day_of_week(self):
+        # 13-е число или пятница: 2026-10-02 — пятница, 2026-10-13 — вторник.
+        self.assertEqual(_next("0 0 13 * 5", _at(2026, 10, 1)), _at(2026, 10, 2))
+        self.assertEqual(_next("0 0 13 * 5", _at(2026, 10, 3)), _at(2026, 10, 9))
+        self.assertEqual(_next("0 0 13 * 5", _at(2026, 10, 10)), _at(2026, 10, 13))
+
+    def test_only_day_of_week_restricted(self):
+        self.assertEqual(_next("0 0 * * 1", _at(2026, 10, 1)), _at(2026, 10, 5))
+
+    def test_step_day_of_month_is_not_a_restriction(self):
+        # «*/2» в дне месяца, как в cron, не включает правило «или»: нужен нечетный день и понедельник.
+        self.assertEqual(_next("0 0 */2 * 1", _at(2026, 10, 1)), _at(2026, 10, 5))
+        self.assertEqual(_next("0 0 */2 * 1", _at(2026, 10, 5)), _at(2026, 10, 19))
+
+    def test_step_day_of_week_is_not_a_restriction(self):
+        # Первое число, выпавшее на воскресенье, вторник, четверг или субботу: 2026-11-01 — воскресенье.
+        self.assertEqual(_next("0 0 1 * */2", _at(2026, 10, 2)), _at(2026, 11, 1))
+
+    def test_month_restriction(self):
+        self.assertEqual(_next("0 0 1 1 *", _at(2026, 10, 1)), _at(2027, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
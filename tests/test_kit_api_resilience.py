@@ -0,0 +1,73 @@
+import asyncio
+import gc
+import unittest
+
+from srс.infra.kit_api_resilience import ResiliencePolicy, ResilientCaller
+
+
+def _caller(**overrides: object) -> ResilientCaller:
+    return ResilientCaller(ResiliencePolicy(timeout_seconds=1.0, backoff_base_seconds=0.0, **overrides))
+
+
+class ResilientCallerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_externally_cancelled_attempt_is_retried(self):
+        calls: list[int] = []
+
+        async def request() -> int:
+            calls.append(1)
+            if len(calls) == 1:
+                raise asyncio.CancelledError()
+            return 42
+
+        self.assertEqual(await _caller(max_attempts=2).call("sales", request), 42)
+        self.assertEqual(len(calls), 2)
+
+    async def test_hedged_loser_is_cancelled_and_awaited(self):
+        caller: ResilientCaller = _caller(hedge_quantile=0.5, hedge_min_samples=1)
+        started: list[asyncio.Task] = []
+
+        async def fast() -> int:
+            return 1
+
+        await caller.call("sales", fast)
+
+        async def request() -> int:
+            started.append(asyncio.current_task())
+            if len(started) == 1:
+                await asyncio.sleep(10)
+            return 2
+
+        self.assertEqual(await caller.call("sales", request), 2)
+        self.assertEqual(len(started), 2)
+        self.assertTrue(all(task.done() for task in started))
+        self.assertTrue(started[0].cancelled())
+
+    async def test_failed_hedge_exceptions_are_retrieved(self):
+        caller: ResilientCaller = _caller(hedge_quantile=0.5, hedge_min_samples=1)
+        reports: list[dict] = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: reports.append(context))
+        release: asyncio.Event = asyncio.Event()
+        started: list[int] = []
+
+        async def fast() -> int:
+            return 1
+
+        await caller.call("sales", fast)
+
+        async def request() -> int:
+            started.append(1)
+            if len(started) == 1:
+                await release.wait()
+                raise OSError("сбой первой попытки")
+            release.set()
+            await asyncio.sleep(0)
+            return 2
+
+        self.assertEqual(await caller.call("sales", request), 2)
+        gc.collect()
+        await asyncio.sleep(0)
+        self.assertEqual(reports, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
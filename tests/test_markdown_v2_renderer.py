@@ -0,0 +1,53 @@
+import unittest
+
+from srс.domain.entities.report_document import ReportDocument, ReportEntry, ReportSection
+from srс.infra.markdown_v2_renderer import MESSAGE_LENGTH_LIMIT, render_quote_markdown_v2_chunks
+
+_HEADING: str = "Отчет"
+_QUOTED_HEADING: str = "> *Отчет*"
+
+
+def _document(*entries: list[str]) -> ReportDocument:
+    return ReportDocument(sections=[ReportSection(heading=_HEADING, entries=[ReportEntry(lines) for lines in entries])])
+
+
+def _unquote(chunks: list[str]) -> str:
+    return "".join(line[2:] for chunk in chunks for line in chunk.split("\n")).replace("\\", "")
+
+
+class RenderQuoteMarkdownV2ChunksTest(unittest.TestCase):
+    def test_small_document_is_one_chunk(self):
+        chunks: list[str] = render_quote_markdown_v2_chunks(_document(["a.b"], ["c"]))
+        self.assertEqual(chunks, ["> *Отчет*\n> \n> a\\.b\n> \n> c"])
+
+    def test_heading_is_never_sent_alone(self):
+        document: ReportDocument
+        for document in (_document(["." * 5000]), _document(["x" * 4094]), _document(["ok", "." * 5000])):
+            chunks: list[str] = render_quote_markdown_v2_chunks(document)
+            lines: list[str] = chunks[0].split("\n")
+            self.assertEqual(lines[0], _QUOTED_HEADING)
+            self.assertTrue(any(line != "> " for line in lines[1:]), chunks[0])
+
+    def test_chunks_respect_limit_and_keep_escapes(self):
+        chunks: list[str] = render_quote_markdown_v2_chunks(_document(["." * 5000], ["a-b" * 3000]))
+        self.assertTrue(all(len(chunk) <= MESSAGE_LENGTH_LIMIT for chunk in chunks))
+        chunk: str
+        for chunk in chunks:
+            line: str
+            for line in chunk.split("\n"):
+                self.assertTrue(line.startswith("> "))
+                self.assertFalse(line.endswith("\\") and not line.endswith("\\\\"))
+        self.assertEqual(_unquote(chunks), "*Отчет*" + "." * 5000 + "a-b" * 3000)
+
+    def test_line_that_fits_a_message_is_not_split(self):
+        chunks: list[str] = render_quote_markdown_v2_chunks(_document(["short"], ["y" * 4090]))
+        self.assertEqual(chunks, ["> *Отчет*\n> \n> short", "> " + "y" * 4090])
+
+    def test_oversized_line_fills_messages(self):
+        chunks: list[str] = render_quote_markdown_v2_chunks(_document(["." * 5000]))
+        # Заголовок, пустая строка и 2040 экранированных точек; затем 2047 точек и остаток.
+        self.assertEqual([len(chunk) for chunk in chunks], [4095, 4096, 1828])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import tempfile
+import unittest
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from srс.domain.entities.machine_sales_stats import MachineSalesStats
+from srс.domain.entities.vending_machine import VendingMachine
+from srс.domain.ports.sales_repository import SalesRepository
+from srс.infra.kit_api_sales_repository import KitAPISalesRepository
+from srс.infra.sqlite_sales_repository import SQLiteSalesRepository
+from srс.infra.sqlite_sales_stats_repository import SQLiteSalesStatsRepository
+from srс.services.sales_stats_service import SalesStatsService
+
+_PROJECT_TZ = ZoneInfo("Asia/Yekaterinburg")
+_VM_ID: int = 1
+_WINDOW: int = 7
+
+
+@dataclass(frozen=True, slots=True)
+class _Sale:
+    vending_machine_id: int
+    price: float
+    timestamp: datetime
+
+
+class _Sales:
+    def __init__(self, sales: list[_Sale]):
+        self._sales = sales
+
+    def get_all(self) -> list[_Sale]:
+        return self._sales
+
+
+class _FakeKitClient:
+    """Отдает продажи из списка, в который тест может дописать продажу «задним числом»."""
+
+    def __init__(self):
+        self.sales: list[_Sale] = []
+
+    async def get_sales(self, from_date: datetime, to_date: datetime) -> _Sales:
+        return _Sales([sale for sale in self.sales if from_date <= sale.timestamp < to_date])
+
+
+def _at(day: date, hour: int) -> datetime:
+    return datetime.combine(day, time(hour)).replace(tzinfo=_PROJECT_TZ)
+
+
+class LateSaleTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self._db_path: Path = Path(self._directory.name) / "sales.sqlite3"
+        self._client: _FakeKitClient = _FakeKitClient()
+        today: date = datetime.now(_PROJECT_TZ).date()
+        self._yesterday: date = today - timedelta(days=1)
+        offset: int
+        for offset in range(1, _WINDOW + 1):
+            self._client.sales.append(_Sale(_VM_ID, 100.0, _at(today - timedelta(days=offset), 12)))
+
+    async def asyncTearDown(self):
+        self._directory.cleanup()
+
+    async def _assert_late_sale_changes_averages(self, sales_repository: SalesRepository) -> None:
+        service: SalesStatsService = SalesStatsService(
+            sales_repository,
+            SQLiteSalesStatsRepository(self._db_path, windows=(_WINDOW,)),
+            history_days=_WINDOW,
+            recheck_interval_seconds=0.0,
+        )
+        machines: list[VendingMachine] = [VendingMachine(kit_id=_VM_ID, name="Аппарат")]
+        before: MachineSalesStats = (await service.get_stats(machines))[_VM_ID]
+        self.assertEqual(before.rolling_sums[_WINDOW], 700.0)
+
+        # Раньше последней сохраненной продажи: дельта синхронизации ее уже не захватывает.
+        self._client.sales.append(_Sale(_VM_ID, 50.0, _at(self._yesterday, 6)))
+        after: MachineSalesStats = (await service.get_stats(machines))[_VM_ID]
+        self.assertEqual(after.rolling_sums[_WINDOW], 750.0)
+        self.assertEqual(after.last_day_total, 150.0)
+        self.assertGreater(after.rolling_mean(_WINDOW), before.rolling_mean(_WINDOW))
+        self.assertGreater(after.ewma, before.ewma)
+
+    async def test_sqlite_store_picks_up_late_sale(self):
+        await self._assert_late_sale_changes_averages(
+            SQLiteSalesRepository(self._client, self._db_path, min_sync_interval_seconds=0.0),
+        )
+
+    async def test_memory_store_picks_up_late_sale(self):
+        await self._assert_late_sale_changes_averages(KitAPISalesRepository(self._client))
+
+
+if __name__ == "__main__":
+    unittest.main()